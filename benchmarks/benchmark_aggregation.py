@@ -0,0 +1,46 @@
+#------------------------------------
+# Benchmark: slot aggregation, one pass
+# per operation vs single (fused) pass
+#------------------------------------
+import time
+from luna.datatypes.dimensional import TimePoint, PhysicalDataTimePoint, PhysicalData, DataTimeSeries, TimeSlot
+from luna.aggregators.utilities import compute_1D_coverage, compute_1D_aggregates
+from luna.aggregators import operations
+
+N_SLOTS = 500
+POINTS_PER_SLOT = 15
+
+def make_slot_series(Points_data_labels):
+    '''A 15 minutes slot series with the previous and the next points, as built by the aggregation process'''
+    dataTimeSeries = DataTimeSeries()
+    validity_region = TimeSlot(span='1m')
+    for i in range(-1, POINTS_PER_SLOT+1):
+        data = PhysicalData(labels=Points_data_labels, values=[float(i+j) for j in range(len(Points_data_labels))])
+        dataTimeSeries.append(PhysicalDataTimePoint(t=1436022000 + (i*60), tz='Europe/Rome', data=data, validity_region=validity_region))
+    return dataTimeSeries
+
+def per_operation(dataTimeSeries, start_Point, end_Point, Points_data_labels, ops):
+    compute_1D_coverage(dataTimeSeries, start_Point, end_Point)
+    for label in Points_data_labels:
+        for op in ops:
+            getattr(operations, op).compute_on_Points(dataTimeSeries.lazy_filter_data_label(label=label), start_Point, end_Point)
+
+def fused(dataTimeSeries, start_Point, end_Point, Points_data_labels, ops):
+    compute_1D_aggregates(dataTimeSeries, start_Point, end_Point, Points_data_labels)
+
+
+start_Point = TimePoint(t=1436022000, tz='Europe/Rome')
+end_Point   = TimePoint(t=1436022000 + (POINTS_PER_SLOT*60), tz='Europe/Rome')
+ops = ['AVG', 'MIN', 'MAX']
+
+print('BENCHMARK: {} slots of {} points'.format(N_SLOTS, POINTS_PER_SLOT))
+for n_labels in [1, 3, 6]:
+    Points_data_labels = ['label{}_W'.format(i) for i in range(n_labels)]
+    dataTimeSeries = make_slot_series(Points_data_labels)
+    timings = []
+    for function in [per_operation, fused]:
+        start = time.time()
+        for _ in range(N_SLOTS):
+            function(dataTimeSeries, start_Point, end_Point, Points_data_labels, ops)
+        timings.append((time.time() - start) / N_SLOTS * 1000)
+    print('{:>2} Slots_data_labels: per-operation {:>8.3f} ms/slot, fused {:>8.3f} ms/slot, {:>6.1f}x'.format(n_labels*len(ops), timings[0], timings[1], timings[0]/timings[1]))
@@ -0,0 +1,46 @@
+#------------------------------------
+# Benchmark: serial vs partitioned
+# (parallel) aggregation of a series
+#------------------------------------
+import time
+from multiprocessing import cpu_count
+from luna.datatypes.dimensional import PhysicalDataTimePoint, PhysicalData, DataTimeSeries, TimeSlot
+from luna.aggregators.components import DataTimeSeriesAggregatorProcess
+from luna.sensors import PhysicalDataTimeSensor
+from luna.spacetime.time import TimeSlotSpan, dt_from_s
+
+N_POINTS = 20000
+
+class BenchmarkSensor(PhysicalDataTimeSensor):
+    type_ID = 1
+    Points_data_labels = ['power_W', 'voltage_V']
+    Points_validity_region = TimeSlot(span='10s')
+    Slots_data_labels =  ['power_W_AVG', 'power_W_MIN', 'power_W_MAX', 'voltage_V_AVG', 'voltage_V_MIN', 'voltage_V_MAX']
+    timezone = 'Europe/Rome'
+
+if __name__ == '__main__':
+
+    sensor = BenchmarkSensor('benchmark')
+    dataTimeSeries = DataTimeSeries.from_arrays(t               = [1436022000 + i*10 for i in range(N_POINTS)],
+                                                values_by_label = [('power_W', [float(i%100) for i in range(N_POINTS)]),
+                                                                   ('voltage_V', [230.0+(i%7) for i in range(N_POINTS)])],
+                                                tz              = sensor.timezone,
+                                                point_type      = PhysicalDataTimePoint,
+                                                validity_region = sensor.Points_validity_region)
+    start_dt = dt_from_s(1436022000, tz=sensor.timezone)
+    end_dt   = dt_from_s(1436022000 + (N_POINTS-1)*10 - (N_POINTS-1)*10 % 900, tz=sensor.timezone)
+
+    print('BENCHMARK: {} points in 15m slots, {} cores'.format(N_POINTS, cpu_count()))
+    process = DataTimeSeriesAggregatorProcess(timeSlotSpan=TimeSlotSpan('15m'), Sensor=sensor, data_to_aggregate=PhysicalDataTimePoint)
+    start = time.time()
+    process.start(dataTimeSeries=dataTimeSeries, start_dt=start_dt, end_dt=end_dt)
+    serial_s = time.time() - start
+    print('serial:                  {:>8.3f} s'.format(serial_s))
+    process.get_results()
+
+    for max_workers in [1, 2, 4, 8]:
+        start = time.time()
+        process.start_partitioned(dataTimeSeries=dataTimeSeries, start_dt=start_dt, end_dt=end_dt, max_workers=max_workers)
+        partitioned_s = time.time() - start
+        print('partitioned, {} workers: {:>8.3f} s, {:>6.1f}x'.format(max_workers, partitioned_s, serial_s/partitioned_s))
+        process.get_results()
@@ -0,0 +1,77 @@
+#------------------------------------
+# Benchmark: TimePoints memory and
+# construction time, standard vs compact
+#------------------------------------
+import time
+import tracemalloc
+from luna.datatypes.dimensional import TimePoint, PhysicalDataTimePoint, PhysicalData, TimeSlot
+from luna.datatypes.dimensional import CompactTimePoint, CompactPhysicalDataTimePoint, DataTimeSeries, ColumnarDataTimeSeries
+
+N = 100000
+
+# The goal, in bytes per point and in construction time
+GOAL = 3.0
+
+def benchmark(name, Point_class, with_data):
+
+    validity_region = TimeSlot(span='1m')
+    data = PhysicalData(labels=['temperature_C'], values=[20.0])
+
+    # Memory
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    if with_data:
+        points = [Point_class(t=1436021994 + i, tz='Europe/Rome', data=data, validity_region=validity_region) for i in range(N)]
+    else:
+        points = [Point_class(t=1436021994 + i, tz='Europe/Rome') for i in range(N)]
+    bytes_per_point = (tracemalloc.get_traced_memory()[0] - before) / float(N)
+    tracemalloc.stop()
+    del points
+
+    # Construction time
+    start = time.time()
+    if with_data:
+        for i in range(N):
+            Point_class(t=1436021994 + i, tz='Europe/Rome', data=data, validity_region=validity_region)
+    else:
+        for i in range(N):
+            Point_class(t=1436021994 + i, tz='Europe/Rome')
+    us_per_point = (time.time() - start) / N * 1000000
+
+    print('{:<30} {:>10.1f} bytes/point {:>10.2f} us/point'.format(name, bytes_per_point, us_per_point))
+    return bytes_per_point, us_per_point
+
+
+print('BENCHMARK: {} points'.format(N))
+for standard, compact, with_data in [(TimePoint, CompactTimePoint, False),
+                                     (PhysicalDataTimePoint, CompactPhysicalDataTimePoint, True)]:
+    standard_bytes, standard_us = benchmark(standard.__name__, standard, with_data)
+    compact_bytes, compact_us   = benchmark(compact.__name__, compact, with_data)
+    print('{:<30} {:>10.1f}x memory {:>16.1f}x time'.format('Improvement', standard_bytes/compact_bytes, standard_us/compact_us))
+    print('{:<30} {:>17} {:>21}'.format('Goal ({:.0f}x)'.format(GOAL), 'met' if standard_bytes/compact_bytes >= GOAL else 'NOT met',
+                                         'met' if standard_us/compact_us >= GOAL else 'NOT met'))
+
+
+def benchmark_series(name, DataTimeSeries_class, Point_class):
+
+    # Memory of a series where every point has its own data, as when loaded
+    validity_region = TimeSlot(span='1m')
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    dataTimeSeries = DataTimeSeries_class()
+    for i in range(N):
+        data = PhysicalData(labels=['temperature_C'], values=[20.0 + i % 10])
+        dataTimeSeries.append(Point_class(t=1436021994 + i, tz='Europe/Rome', data=data, validity_region=validity_region))
+    bytes_per_point = (tracemalloc.get_traced_memory()[0] - before) / float(N)
+    tracemalloc.stop()
+    print('{:<30} {:>10.1f} bytes/point'.format(name, bytes_per_point))
+    return bytes_per_point
+
+
+print('BENCHMARK: series of {} points, with their own data'.format(N))
+standard_bytes = benchmark_series('DataTimeSeries', DataTimeSeries, PhysicalDataTimePoint)
+for name, DataTimeSeries_class, Point_class in [('DataTimeSeries (compact)', DataTimeSeries, CompactPhysicalDataTimePoint),
+                                                ('ColumnarDataTimeSeries', ColumnarDataTimeSeries, PhysicalDataTimePoint)]:
+    bytes_per_point = benchmark_series(name, DataTimeSeries_class, Point_class)
+    print('{:<30} {:>10.1f}x memory, goal ({:.0f}x) {}'.format('Improvement', standard_bytes/bytes_per_point, GOAL,
+                                                             'met' if standard_bytes/bytes_per_point >= GOAL else 'NOT met'))
@@ -3,9 +3,15 @@ from luna.datatypes.dimensional import TimePoint, TimeSlot
 from luna.datatypes.dimensional import DataTimePoint, DataTimeSlot, PhysicalData, DataTimeSeries, DataPoint, DataSlot
 from luna.datatypes.auxiliary import PhysicalQuantity
 from luna.common.exceptions import ConsistencyException, ConfigurationException, InputException, NoDataException
-from luna.aggregators.utilities import compute_1D_coverage
-from luna.spacetime.time import s_from_dt
-from luna.datatypes.dimensional import Slot
+from luna.aggregators.utilities import compute_1D_coverage, compute_1D_aggregates, compute_1D_Slots_coverage, Aggregates1DAccumulator
+from luna.spacetime.time import s_from_dt, dt_from_s, t_range, get_tz_transitions, TimeSlotSpan
+from luna.datatypes.dimensional import Slot, SequenceSliceView, ColumnarDataTimeSeries
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count
+from bisect import bisect_left, bisect_right
+from array import array
+import datetime
 
 #--------------------------
 #    Logger
@@ -28,6 +34,216 @@ class Aggregator(object):
     '''Base Aggregator class'''
     pass
 
+# Operations computed by compute_1D_aggregates in a single pass (their compute_on_Points is the reference)
+FUSED_OPERATIONS = ['AVG', 'MIN', 'MAX']
+
+
+#-------------------------------------
+# Aggregation plans
+#-------------------------------------
+
+class AggregationStep(namedtuple('AggregationStep', ['label', 'op', 'Generator', 'Operation', 'operate_on', 'operate_on_index', 'fused', 'streaming', 'depends', 'intermediate'])):
+    '''How to generate a Slot data label: by running a Generator, or by applying an Operation to the Points
+    data label "operate_on" (which is at position "operate_on_index" in the Sensor Points_data_labels).
+    Streaming Operations and Generators (is_stremaing set) do not need the Points of the slot. The depends are
+    the Slot data labels the step needs, and intermediate steps are computed only to be given to other steps.'''
+    __slots__ = ()
+
+
+def _declared(Generator, attribute):
+    '''Get the depends or provides a Generator declares (as a class attribute), None if it does not'''
+    value = getattr(Generator, attribute, None)
+    return list(value) if isinstance(value, (list, tuple)) else None
+
+
+class AggregationPlan(namedtuple('AggregationPlan', ['Slot_data_labels', 'steps', 'Points_data_labels_to_aggregate', 'streaming_operations'])):
+    '''The (immutable) aggregation plan of a Sensor class: the steps to generate its Slot data labels, in dependency
+    order, the Points data labels to aggregate in the single pass and the streaming operations to compute in it, as
+    (label, Operation) pairs. Use get_aggregation_plan() to get the (cached) one for a Sensor.
+
+    Dependencies are resolved when compiling the plan: Generators declaring their depends get them (also if not in
+    the Slot data labels, as intermediate steps computed once per slot), and the ones which do not are run after the
+    operations and the previous undeclared ones, in the Slot data labels order. Generators can be found by name or
+    by what they declare to provide. Missing dependencies and cycles raise a ConfigurationException.'''
+    __slots__ = ()
+
+    @classmethod
+    def compile(cls, Sensor_class):
+
+        Slot_data_labels = tuple(Sensor_class.Slots_data_labels)
+        Points_data_labels = list(Sensor_class.Points_data_labels)
+
+        # Resolve the steps for the Slot data labels and, recursively, for their dependencies
+        steps = {}
+        resolution_order = []
+        undeclared_Generators_labels = []
+
+        def resolve(label, required_by=None):
+            if label in steps:
+                return
+            step = cls._compile_step(Sensor_class, label, Points_data_labels, required_by)._replace(intermediate=label not in Slot_data_labels)
+            if step.Generator and step.depends is None:
+                undeclared_Generators_labels.append(label)
+            steps[label] = step
+            resolution_order.append(label)
+            for dependency in step.depends or []:
+                # Dependencies on Points data labels are always satisfied
+                if dependency not in Points_data_labels:
+                    resolve(dependency, required_by=label)
+
+        for Slot_data_label in Slot_data_labels:
+            resolve(Slot_data_label)
+
+        # Generators not declaring their depends get the operations and the previous undeclared ones
+        operations_labels = [label for label in resolution_order if steps[label].Operation]
+        for i, label in enumerate(undeclared_Generators_labels):
+            steps[label] = steps[label]._replace(depends=tuple(operations_labels + undeclared_Generators_labels[0:i]))
+
+        # Sort the steps in dependency order (topologically), operations first and then in resolution order
+        priorities = {label: (0 if steps[label].Operation else 1, i) for i, label in enumerate(resolution_order)}
+        pending = sorted(resolution_order, key=lambda label: priorities[label])
+        done = set()
+        sorted_steps = []
+        while pending:
+            for label in pending:
+                if all(dependency in done or dependency in Points_data_labels for dependency in steps[label].depends):
+                    break
+            else:
+                raise ConfigurationException('Sorry, found a dependency cycle between {} for sensor {}'.format(pending, Sensor_class.__name__))
+            pending.remove(label)
+            done.add(label)
+            sorted_steps.append(steps[label])
+
+        operation_steps = [step for step in sorted_steps if step.Operation]
+
+        # Points data labels to aggregate in the single pass, in the Points order
+        Points_data_labels_to_aggregate = tuple(label for label in Points_data_labels if label in [step.operate_on for step in operation_steps])
+
+        # Streaming operations to compute in the single pass (the fused ones are already computed by the kernel)
+        streaming_operations = tuple((step.operate_on, step.Operation) for step in operation_steps if step.streaming and not step.fused)
+
+        return cls(Slot_data_labels=Slot_data_labels,
+                   steps=tuple(sorted_steps),
+                   Points_data_labels_to_aggregate=Points_data_labels_to_aggregate,
+                   streaming_operations=streaming_operations)
+
+    @staticmethod
+    def _compile_step(Sensor_class, Slot_data_label_to_generate, Points_data_labels, required_by=None):
+        '''Compile the step to generate a Slot data label (an intermediate one if required by another step)'''
+        from luna.aggregators import generators
+
+        handled    = False
+        Generator  = None
+        Operation  = None
+        operate_on = None
+
+        # Labels could already be PhysicalQuantiy objects
+        if isinstance(Slot_data_label_to_generate, PhysicalQuantity):
+            physicalQuantity_to_generate = Slot_data_label_to_generate
+        else:
+            physicalQuantity_to_generate = PhysicalQuantity(Slot_data_label_to_generate)
+
+        if physicalQuantity_to_generate.op is None:
+            if required_by:
+                raise ConfigurationException('Sorry, "{}" (required by "{}") is neither in the Points nor an aggregated PhysicalQuantity, cannot generate it.'.format(physicalQuantity_to_generate, required_by))
+            raise ConfigurationException('Sorry, PhysicalQuantity "{}" has no operation defined, cannot aggregate.'.format(physicalQuantity_to_generate))
+
+        # Is this physicalQuantity generated by a custom generator defined inside the sensor class?
+        try:
+            Generator = getattr(Sensor_class, Slot_data_label_to_generate)
+            handled = True
+        except AttributeError:
+            pass
+
+        # Is this physicalQuantity generated by a standard generator?
+        try:
+            Generator = getattr(generators, Slot_data_label_to_generate)
+            handled = True
+        except AttributeError:
+            pass
+
+        # Is this physicalQuantity provided by a generator (defined inside the sensor class first)?
+        if not handled:
+            for source in [Sensor_class, generators]:
+                for name in dir(source):
+                    candidate = getattr(source, name)
+                    if isinstance(candidate, type) and issubclass(candidate, (generators.PhysicalQuantityGenerator, generators.QuantityGenerator)):
+                        if Slot_data_label_to_generate in (_declared(candidate, 'provides') or []):
+                            Generator = candidate
+                            handled = True
+                            break
+                if handled:
+                    break
+
+        # Generators integrating a physicalQuantity of the Points over time are computed as (streaming) operations on it
+        if getattr(Generator, 'integrand', None) in Points_data_labels:
+            Operation  = Generator.get_Operation()
+            operate_on = Generator.integrand
+            Generator  = None
+
+        # Is this physicalQuantity_to_generate generated by applying the operation to another
+        # physicalQuantity_to_generate defined in the Points?
+        for Point_physicalQuantity in Points_data_labels:
+            if physicalQuantity_to_generate.name_unit == Point_physicalQuantity:
+                Operation = get_Operation(Sensor_class, physicalQuantity_to_generate.op)
+                if Operation is None:
+                    # TODO: add more info (i.e. sensor class etc?)
+                    raise ConfigurationException('Sorry, I cannot find any valid operation for {} in the sensor nor in luna.aggregators.operations'.format(physicalQuantity_to_generate.op))
+                operate_on = Point_physicalQuantity
+                handled = True
+                break
+
+        logger.debug('For generating %s I will use generator %s and operation %s', physicalQuantity_to_generate, Generator, Operation)
+
+        if not handled:
+            if required_by:
+                raise ConfigurationException('Could not handle "{}", required by "{}", as I did not find any way to generate it. Please check your configuration for this sensor'.format(Slot_data_label_to_generate, required_by))
+            raise ConfigurationException('Could not handle "{}", as I did not find any way to generate it. Please check your configuration for this sensor'.format(Slot_data_label_to_generate))
+
+        if Generator:
+            depends = _declared(Generator, 'depends')
+            return AggregationStep(label=Slot_data_label_to_generate, op=physicalQuantity_to_generate.op,
+                                   Generator=Generator, Operation=None, operate_on=None, operate_on_index=None, fused=False,
+                                   streaming=getattr(Generator, 'is_stremaing', False),
+                                   depends=tuple(depends) if depends is not None else None, intermediate=False)
+        elif Operation:
+            return AggregationStep(label=Slot_data_label_to_generate, op=Operation.__name__,
+                                   Generator=None, Operation=Operation, operate_on=operate_on,
+                                   operate_on_index=Points_data_labels.index(operate_on),
+                                   fused=physicalQuantity_to_generate.op in FUSED_OPERATIONS,
+                                   streaming=getattr(Operation, 'is_stremaing', False),
+                                   depends=(), intermediate=False)
+        else:
+            raise ConsistencyException('No generator nor Operation?!')
+
+
+def get_Operation(Sensor, op):
+    '''Get the Operation for an operation name: the one defined in the Sensor (as an Operation subclass), if
+    any, otherwise the one in luna.aggregators.operations (also any "P<percentile>" quantile one). Returns None if
+    there is no such Operation.'''
+    from luna.aggregators import operations
+    Operation = getattr(Sensor, op, None) if op else None
+    if isinstance(Operation, type) and issubclass(Operation, operations.Operation):
+        return Operation
+    Operation = getattr(operations, op, None) if op else None
+    if isinstance(Operation, type) and issubclass(Operation, operations.Operation):
+        return Operation
+    # Any other percentile (i.e. P75)
+    return operations.get_quantile_Operation(op)
+
+
+# Cache of the aggregation plans, by Sensor class
+_aggregation_plans = {}
+
+def get_aggregation_plan(Sensor):
+    '''Get the aggregation plan for a Sensor (class or instance), compiling it only the first time'''
+    Sensor_class = Sensor if isinstance(Sensor, type) else Sensor.__class__
+    try:
+        return _aggregation_plans[Sensor_class]
+    except KeyError:
+        _aggregation_plans[Sensor_class] = AggregationPlan.compile(Sensor_class)
+        return _aggregation_plans[Sensor_class]
+
 # Should be: PhysicalDataTimePointsAggregator ( and PhysicalDataTimeSeries)
  
  
@@ -38,8 +254,9 @@ class DataTimePointsAggregator(Aggregator):
     
     # TODO: Merge me into a DataTimeSeriesAggregator, using the data type to understand how to aggregate? 
  
-    def __init__(self, Sensor):
+    def __init__(self, Sensor, aggregation_plan=None):
         self.Sensor = Sensor
+        self.aggregation_plan = aggregation_plan if aggregation_plan is not None else get_aggregation_plan(Sensor)
     
     def aggregate(self, dataTimeSeries, start_dt, end_dt, timeSlotSpan, raise_if_no_data=False):
 
@@ -56,27 +273,43 @@ class DataTimePointsAggregator(Aggregator):
         #-------------------
         # Support vars
         #-------------------
-        Slot_data_labels_to_generate = self.Sensor.Slots_data_labels
-        Slot_data_labels             = [] # TODO: REMOVE, this is the same as Slot_data_labels_to_generate
-        Slot_data_values             = []
+        aggregation_plan             = self.aggregation_plan
         
         # Create start and end Points. TODO: is this not performant, also with the time zone? 
         start_Point = TimePoint(t=s_from_dt(start_dt), tz=start_dt.tzinfo)
         end_Point   = TimePoint(t=s_from_dt(end_dt), tz=start_dt.tzinfo)
 
-        #-------------------
-        # Compute coverage
-        #-------------------
-        Slot_coverage = compute_1D_coverage(dataSeries  = dataTimeSeries,
-                                            start_Point = start_Point,
-                                            end_Point   = end_Point)
+        #-------------------------------------
+        # Compute coverage and the aggregates
+        #-------------------------------------
+
+        # Coverage and the aggregates for the standard operations are computed all together, in a single
+        # pass over the data (see compute_1D_aggregates), for the Points labels which are operated on.
+        Slot_coverage, Points_aggregates = compute_1D_aggregates(dataSeries  = dataTimeSeries,
+                                                                 start_Point = start_Point,
+                                                                 end_Point   = end_Point,
+                                                                 labels      = aggregation_plan.Points_data_labels_to_aggregate,
+                                                                 operations  = aggregation_plan.streaming_operations)
+
+        return self.build_Slot(dataTimeSeries, start_Point, end_Point, timeSlotSpan, Slot_coverage, Points_aggregates, raise_if_no_data)
+
+    def build_Slot(self, dataTimeSeries, start_Point, end_Point, timeSlotSpan, Slot_coverage, Points_aggregates, raise_if_no_data=False):
+        '''Build the DataTimeSlot given the coverage and the aggregates computed on the Points (see compute_1D_aggregates),
+        following the aggregation plan. The dataTimeSeries can be None if every operation is computed in the aggregates
+        (as in the online aggregation) and in this case the generators will not get the Points.'''
+
+        aggregation_plan             = self.aggregation_plan
+        Slot_data_labels_to_generate = aggregation_plan.Slot_data_labels
+        Slot_data_labels             = []
+        Slot_data_values             = []
+        Slot_states                  = {}
 
         # If no coverage return list of None in None data is allowed, otherwise raise.
         if Slot_coverage == 0.0:
             if raise_if_no_data:
                 raise NoDataException('This slot has coverage of 0.0, cannot compute any data! (start={}, end={})'.format(start_Point, end_Point))
             else:
-                Slot_physicalData = self.Sensor.Points_type.data_type(labels  = Slot_data_labels_to_generate,
+                Slot_physicalData = self.Sensor.Points_type.data_type(labels  = list(Slot_data_labels_to_generate),
                                                                       values  = [None for _ in Slot_data_labels_to_generate], # Force "trustme" to allow None in data
                                                                       trustme = True)
                 
@@ -89,131 +322,53 @@ class DataTimePointsAggregator(Aggregator):
                 logger.debug('Done aggregating, slot: %s', dataTimeSlot)
                 return dataTimeSlot
 
-        #--------------------------------------------
-        # Understand the labels to produce and to 
-        # operate on according to the sensor type
-        #--------------------------------------------
-        
-        # TODO: define a mapping somwhere and perform this operations only once.
-
-        for Slot_data_label_to_generate in Slot_data_labels_to_generate:
-            
-            handled      = False
-            Generator    = None
-            Operation    = None
-            operate_on   = None
-            
-            # Labels could already be PhysicalQuantiy objects
-            if not isinstance(Slot_data_label_to_generate, PhysicalQuantity):
-                physicalQuantity_to_generate = PhysicalQuantity(Slot_data_label_to_generate)
-        
-            if physicalQuantity_to_generate.op is None:
-                raise ConfigurationException('Sorry, PhysicalQuantity "{}" has no operation defined, cannot aggregate.'.format(physicalQuantity_to_generate))
-
-
-            #--------------------------------------
-            #   Handle generators
-            #--------------------------------------
-
-            # Is this physicalQuantity generated by a custom generator defined inside the sensor class?
-            try:
-                # TODO: Use the 'provides' logic
-                Generator = getattr(self.Sensor, Slot_data_label_to_generate)
-                handled = True
-            except AttributeError:
-                pass
-
-            
-            # Is this physicalQuantity generated by a standard generator?
-            try:
-                from luna.aggregators import generators
-                Generator = getattr(generators, Slot_data_label_to_generate)
-                handled = True
-            except AttributeError:
-                pass
-
-            #--------------------------------------
-            #   Handle operations
-            #--------------------------------------
-
-            # Is this physicalQuantity_to_generate generated  by applying the operation to another
-            # physicalQuantity_to_generate defined in the Points?
-            
-            for Point_physicalQuantity in self.Sensor.Points_data_labels:
-                
-                # Standard operation
-                if physicalQuantity_to_generate.name_unit == Point_physicalQuantity:
-                    try:
-                        from luna.aggregators import operations
-                        Operation = getattr(operations, physicalQuantity_to_generate.op)
-                    except AttributeError:
-                        # TODO: add more info (i.e. sensor class etc?)
-                        raise ConfigurationException('Sorry, I cannot find any valid operation for {} in luna.aggregators.operations'.format(physicalQuantity_to_generate.op))
-    
-                    operate_on = Point_physicalQuantity
-                    handled = True
-                    break
-                 
-            logger.debug('For generating %s I will use generator %s and operation %s', physicalQuantity_to_generate, Generator, Operation)
-
-
-            #----------------------
-            # Now compute
-            #----------------------
-
-            if not handled:
-                # TODO: add more info (i.e. sensor class etc?)
-                raise ConfigurationException('Could not handle "{}", as I did not find any way to generate it. Please check your configuration for this sensor'.format(Slot_data_label_to_generate))
+        #----------------------
+        # Now compute
+        #----------------------
 
-            # Set if streaming Operation/generator: 
-            try:
-                Generator_is_streaming = Generator.is_stremaing
-            except AttributeError:
-                Generator_is_streaming = False
-            try:
-                Operation_is_streaming = Operation.is_stremaing
-            except AttributeError:
-                Operation_is_streaming = False
+        # Follow the aggregation plan (see AggregationPlan), which is in dependency order
+        for step in aggregation_plan.steps:
 
-            if Generator and not Generator_is_streaming:
+            if step.Generator:
                 
-                logger.debug('Running generator %s on to generate %s', Generator, Slot_data_label_to_generate)
+                logger.debug('Running generator %s on to generate %s', step.Generator, step.label)
 
                 # A generator also requires access to the aggregated data, so we initialize it also here**
                 Slot_physicalData = self.Sensor.Points_type.data_type(labels = Slot_data_labels,
                                                                       values = Slot_data_values)
-                # Run the generator
-                result = Generator.generate(dataSeries      = dataTimeSeries,
-                                            start_Point     = start_Point,
-                                            end_Point       = end_Point,
-                                            aggregated_data = Slot_physicalData)
-
-
-                # Ok, append the operation/generator results to the labels and values
-                logger.debug('Done running generator')
-                Slot_data_labels.append(Slot_data_label_to_generate)
-                Slot_data_values.append(result)
+                # Run the generator (streaming ones do not get the Points)
+                result = step.Generator.generate(dataSeries      = None if step.streaming else dataTimeSeries,
+                                                 start_Point     = start_Point,
+                                                 end_Point       = end_Point,
+                                                 aggregated_data = Slot_physicalData)
 
-            elif Operation and not Operation_is_streaming:
-                
-                logger.debug('Running operation %s on %s to generate %s', Operation, operate_on, Slot_data_label_to_generate)
-                
-                # Run the operation
-                result = Operation.compute_on_Points(dataSeries  = dataTimeSeries.lazy_filter_data_label(label=operate_on),
-                                                     start_Point = start_Point,
-                                                     end_Point   = end_Point)
-            
-                # Ok, append the operation/generator results to the labels and values
-                logger.debug('Done running operation')
-                Slot_data_labels.append(Slot_data_label_to_generate)
-                Slot_data_values.append(result)
-                
             else:
-                raise ConsistencyException('No generator nor Operation?! (maybe got streaming which is not yet supported)')
-            
-  
+                
+                logger.debug('Running operation %s on %s to generate %s', step.Operation, step.operate_on, step.label)
+
+                # Use the result from the single pass aggregates if any, otherwise run the operation
+                if (step.fused or step.streaming) and step.op in Points_aggregates[step.operate_on]:
+                    result = Points_aggregates[step.operate_on][step.op]
+                    # Keep the state in the Slot if the operation needs it to aggregate Slots
+                    if step.Operation.keeps_state and not step.intermediate:
+                        Slot_states[step.label] = Points_aggregates[step.operate_on]['STATES'][step.op]
+                elif dataTimeSeries is None:
+                    raise ConsistencyException('Cannot compute {} without the Points, as it is not computed in the single pass'.format(step.label))
+                else:
+                    result = step.Operation.compute_on_Points(dataSeries  = dataTimeSeries.lazy_filter_data_label(label=step.operate_on),
+                                                              start_Point = start_Point,
+                                                              end_Point   = end_Point)
+
+            # Ok, append the operation/generator results to the labels and values
+            logger.debug('Done running operation/generator')
+            Slot_data_labels.append(step.label)
+            Slot_data_values.append(result)
+
+        # Put results in the Sensor's Slots_data_labels order
+        if Slot_data_labels != list(Slot_data_labels_to_generate):
+            Slot_data_values = [Slot_data_values[Slot_data_labels.index(label)] for label in Slot_data_labels_to_generate]
+            Slot_data_labels = list(Slot_data_labels_to_generate)
 
-          
         #----------------------
         # Build results
         #----------------------
@@ -225,7 +380,8 @@ class DataTimePointsAggregator(Aggregator):
                                               end      = end_Point,
                                               data     = Slot_physicalData,
                                               span     = timeSlotSpan,
-                                              coverage = Slot_coverage)
+                                              coverage = Slot_coverage,
+                                              states   = Slot_states or None)
 
         # Return results
         logger.debug('Done aggregating, slot: %s', dataTimeSlot)
@@ -233,18 +389,143 @@ class DataTimePointsAggregator(Aggregator):
     
 
 class DataTimeSlotsAggregator(Aggregator):
-    '''Aggregate DataTimeSlots of a DataTimeSeries into a wider DataTimeSlot.
+    '''Aggregate DataTimeSlots of a DataTimeSeries into a wider DataTimeSlot (i.e. 1h slots from 5m slots).
+    Every Slot data label is aggregated by applying its operation to the same label of the Slots (see the
+    operations compute_on_Slots), also if it was provided by a generator when aggregating the Points.
     The Aggregator is STATELESS'''
     
     # TODO: Merge me into a DataTimeSeriesAggregator, using the data type to understand how to aggregate? 
 
-    pass
+    def __init__(self, Sensor, aggregation_plan=None):
+        self.Sensor = Sensor
+
+        # The Operation to apply for each Slot data label
+        self.Slots_operations = []
+        for Slot_data_label in Sensor.Slots_data_labels:
+            physicalQuantity = Slot_data_label if isinstance(Slot_data_label, PhysicalQuantity) else PhysicalQuantity(Slot_data_label)
+            Operation = get_Operation(Sensor, physicalQuantity.op)
+            if Operation is None:
+                raise ConfigurationException('Sorry, I cannot find any valid operation for {} in the sensor nor in luna.aggregators.operations to aggregate Slots'.format(Slot_data_label))
+            self.Slots_operations.append((Slot_data_label, Operation))
+
+    def aggregate(self, dataTimeSeries, start_dt, end_dt, timeSlotSpan, raise_if_no_data=False):
+
+        # Create start and end Points
+        start_Point = TimePoint(t=s_from_dt(start_dt), tz=start_dt.tzinfo)
+        end_Point   = TimePoint(t=s_from_dt(end_dt), tz=start_dt.tzinfo)
+        Slot_data_labels = [Slot_data_label for Slot_data_label, _ in self.Slots_operations]
+        Slot_states      = {}
+
+        # Compute coverage
+        Slot_coverage = compute_1D_Slots_coverage(dataSeries  = dataTimeSeries,
+                                                  start_Point = start_Point,
+                                                  end_Point   = end_Point)
+
+        # If no coverage return list of None in None data is allowed, otherwise raise.
+        if Slot_coverage == 0.0:
+            if raise_if_no_data:
+                raise NoDataException('This slot has coverage of 0.0, cannot compute any data! (start={}, end={})'.format(start_Point, end_Point))
+            Slot_data_values = [None for _ in Slot_data_labels]
+
+        # Otherwise, compute
+        else:
+            Slot_data_values = []
+            for Slot_data_label, Operation in self.Slots_operations:
+                logger.debug('Running operation %s on Slots to generate %s', Operation, Slot_data_label)
+                if Operation.keeps_state:
+                    # Merge the Slots states, and keep the merged one to aggregate this Slot further
+                    state = Operation.merge_on_Slots(dataTimeSeries, Slot_data_label)
+                    if state is not None:
+                        Slot_states[Slot_data_label] = state
+                    Slot_data_values.append(Operation.finalize(state, start_Point.values[0], end_Point.values[0]) if state is not None else None)
+                    continue
+                Slot_data_values.append(Operation.compute_on_Slots(dataSeries  = dataTimeSeries.lazy_filter_data_label(label=Slot_data_label),
+                                                                   start_Point = start_Point,
+                                                                   end_Point   = end_Point))
+
+        # Build results (force "trustme" to allow None in data)
+        Slot_physicalData = self.Sensor.Slots_type.data_type(labels  = Slot_data_labels,
+                                                             values  = Slot_data_values,
+                                                             trustme = None in Slot_data_values)
+
+        dataTimeSlot = self.Sensor.Slots_type(start    = start_Point,
+                                              end      = end_Point,
+                                              data     = Slot_physicalData,
+                                              span     = timeSlotSpan,
+                                              coverage = Slot_coverage,
+                                              states   = Slot_states or None)
+
+        logger.debug('Done aggregating, slot: %s', dataTimeSlot)
+        return dataTimeSlot
 
 
 #-------------------------------------
 # Aggregators Porcesses
 #-------------------------------------
 
+class DataTimeSeriesWindow(DataTimeSeries):
+    '''A window over the items of the DataTimeSeries being aggregated, reused from slot to slot as the DataTimeSeries of
+    the slot given to the Aggregators. Items are added by reference and without validating them again (the source
+    already did). Over an in-memory DataTimeSeries the window is zero-copy, as a range of positions of its items,
+    otherwise (i.e. when streaming from a storage) the items are kept in a list which is cleared for every slot.'''
+
+    @classmethod
+    def over(cls, dataTimeSeries):
+        '''Get a window over the items of the given DataTimeSeries'''
+        if isinstance(dataTimeSeries, ColumnarDataTimeSeries) and not dataTimeSeries.wrapped:
+            return ColumnarDataTimeSeriesWindow.over(dataTimeSeries)
+        window = cls()
+        window._view = None
+        if type(dataTimeSeries) is DataTimeSeries and not dataTimeSeries.wrapped and isinstance(dataTimeSeries._data, (list, SequenceSliceView)):
+            window._view = SequenceSliceView(dataTimeSeries._data, 0, 0)
+            window._offset = window._view.start
+            window._data = window._view
+        return window
+
+    def restart(self, position):
+        '''Restart the window (empty) at the given position of the source items'''
+        if self._view is not None:
+            self._view.start = self._view.stop = self._offset + position
+        else:
+            del self._data[:]
+
+    def add(self, item, position):
+        '''Add the item at the given position of the source items (which has to be the one after the last added)'''
+        if self._view is not None:
+            self._view.stop = self._offset + position + 1
+        else:
+            self._data.append(item)
+
+
+class ColumnarDataTimeSeriesWindow(ColumnarDataTimeSeries):
+    '''A DataTimeSeriesWindow over a ColumnarDataTimeSeries, which is itself a ColumnarDataTimeSeries sharing the
+    timestamps and the columns of the source (as views), so that the operations can use the NumPy backend.'''
+
+    @classmethod
+    def over(cls, dataTimeSeries):
+        '''Get a window over the DataTimePoints of the given ColumnarDataTimeSeries'''
+        window = cls(tz=dataTimeSeries._tz)
+        window._DataTimePoint_class = dataTimeSeries._DataTimePoint_class
+        window._Data_class          = dataTimeSeries._Data_class
+        window._data_labels         = dataTimeSeries._data_labels
+        window._points_tz_id        = dataTimeSeries._points_tz_id
+        window._validity_region     = dataTimeSeries._validity_region
+        window._t                   = SequenceSliceView(dataTimeSeries._t, 0, 0)
+        window._columns             = [SequenceSliceView(column, 0, 0) for column in dataTimeSeries._columns]
+        window._offset              = window._t.start
+        return window
+
+    def restart(self, position):
+        '''Restart the window (empty) at the given position of the source DataTimePoints'''
+        for view in [self._t] + self._columns:
+            view.start = view.stop = self._offset + position
+
+    def add(self, item, position):
+        '''Add the DataTimePoint at the given position of the source (which has to be the one after the last added)'''
+        for view in [self._t] + self._columns:
+            view.stop = self._offset + position + 1
+
+
 class DataTimeSeriesAggregatorProcess(object):
     '''A DataTimeSeriesAggregatorProcess run one or more DataTimePointsAggregator or DataTimeSlotsAggregator
     to generate a DataTimeSeries of DataTimeSlots. The destination DataTimeSlot drives the process (i.e. 
@@ -277,23 +558,23 @@ class DataTimeSeriesAggregatorProcess(object):
         else:
             raise ConsistencyException("Un-handable data type: got no DataTimePoint, no DataTimeSlot and not None (got {})".format(self.data_to_aggregate)) 
 
+        # Get the (cached) aggregation plan for this Sensor, compiled only once and then reused for every slot
+        self.aggregation_plan = get_aggregation_plan(self.Sensor)
+
     @property   
     def aggregator(self):
         
         # Instantiate the proper aggregator class if not already done
         if not self._aggregator:
-            self._aggregator = self.Aggregator(Sensor=self.Sensor)
+            self._aggregator = self.Aggregator(Sensor=self.Sensor, aggregation_plan=self.aggregation_plan)
         return self._aggregator
 
 
     #------------------
-    #  Start process
+    #  Start and end
     #------------------
-    def start(self, dataTimeSeries, start_dt, end_dt, rounded=False, threaded=False, callback=None, callback_trigger=None):
-        ''' Start the aggregator process. if start is not set, the first datapoint is used. If end is not set,
-        once the process will provide the results until the last datapoint (useful for online processing)
-        '''
-
+    def _check_start_end(self, start_dt, end_dt, rounded=False):
+        '''Check start and end (rounding them according to the timeSlotSpan if rounded is set)'''
         # For now start/end not set is not supported:
         if not start_dt or not end_dt:
             raise NotImplementedError('Empty start/end not yet implemented') 
@@ -315,13 +596,35 @@ class DataTimeSeriesAggregatorProcess(object):
                 
             if end_dt is not None:
                 if end_dt != self.timeSlotSpan.round_dt(end_dt):
-                    raise InputException('Sorry, provided end_dt is not consistent with the timeSlotSpan ({})'.format(end_dt))        
-        
-        # Set some support varibales
-        slot_start_dt      = None
-        slot_end_dt        = None
+                    raise InputException('Sorry, provided end_dt is not consistent with the timeSlotSpan ({})'.format(end_dt))
+        return start_dt, end_dt
+
+
+    #------------------
+    #  Start process
+    #------------------
+    def start(self, dataTimeSeries, start_dt, end_dt, rounded=False, threaded=False, callback=None, callback_trigger=None):
+        ''' Start the aggregator process. if start is not set, the first datapoint is used. If end is not set,
+        once the process will provide the results until the last datapoint (useful for online processing)
+        '''
+
+        # Check (and round if requested) start and end
+        start_dt, end_dt = self._check_start_end(start_dt, end_dt, rounded)
+
+        # Slots are aggregated in Slots differently
+        if self.Aggregator is DataTimeSlotsAggregator:
+            return self._start_on_Slots(dataTimeSeries, start_dt, end_dt, callback=callback, callback_trigger=callback_trigger)
+
+        # Set some support varibales. We work in epoch seconds, with the slot edges given by t_range.
+        tz                 = start_dt.tzinfo
+        start_t            = s_from_dt(start_dt)
+        end_t              = s_from_dt(end_dt)
+        slot_edges         = t_range(start_t, None, self.timeSlotSpan, tz=tz)
+        slot_start_t       = None
+        slot_end_t         = None
         prev_dataTimePoint      = None # TODO: rename in "item" to be able processing also slots 
-        filtered_dataTimeSeries = DataTimeSeries()
+        prev_position           = None
+        filtered_dataTimeSeries = DataTimeSeriesWindow.over(dataTimeSeries)
         process_ended      = False
 
         # Ok, start running the aggregators in a streaming-fashion way,
@@ -342,24 +645,22 @@ class DataTimeSeriesAggregatorProcess(object):
 
             # Increase counter
             count +=1
+            position = count-1
             
-            # Set start_dt if not already done
-            if not start_dt:
-                start_dt = self.timeSlotSpan.timeInterval.round_dt(dataTimePoint.dt) if rounded else dataTimePoint.dt
-            
-            if not slot_end_dt:   
-                slot_end_dt = start_dt
+            if slot_end_t is None:
+                slot_end_t = next(slot_edges)
 
             # First, check if we have some points to discard at the beginning       
-            if dataTimePoint.dt < start_dt:
+            if dataTimePoint.t < start_t:
                 # If we are here it means we are going data belonging to a previous slot
                 # (probably just spare data loaded to have access to the prev_datapoint)  
                 prev_dataTimePoint = dataTimePoint
+                prev_position = position
                 #logger.debug print 'dataTimePoint.dt (disc): ', dataTimePoint.dt
                 continue
 
             # Similar concept for the end
-            if dataTimePoint.dt >= end_dt:
+            if dataTimePoint.t >= end_t:
                 if process_ended:
                     continue
 
@@ -377,11 +678,11 @@ class DataTimeSeriesAggregatorProcess(object):
             # The following procedure works in general for slots at the beginning and in the middle.
             # The approach is to detect if the current slot is "outdated" and spin a new one if so.
 
-            if dataTimePoint.dt > slot_end_dt:
+            if dataTimePoint.t > slot_end_t:
                 # If the current slot is outdated:
                          
                 # 1) Add this last point to the dataTimeSeries:
-                filtered_dataTimeSeries.append(dataTimePoint)
+                filtered_dataTimeSeries.add(dataTimePoint, position)
                  
                 #2) keep spinning new slots until the current data point falls in one of them.
                 
@@ -389,17 +690,17 @@ class DataTimeSeriesAggregatorProcess(object):
                 # slot if there are empty slots between the one being closed and the dataTimePoint.dt.
                 # TODO: leave or remove the above if for code readability?
                 
-                while slot_end_dt < dataTimePoint.dt:
+                while slot_end_t < dataTimePoint.t:
                     
                     # If we are in the pre-first slot, just silently spin a new slot:
-                    if slot_start_dt is not None:
+                    if slot_start_t is not None:
                                 
-                        logger.debug('SlotStream: this slot (start={}, end={}) is closed, now aggregating it..'.format(slot_start_dt, slot_end_dt))
+                        logger.debug('SlotStream: this slot (start_t={}, end_t={}) is closed, now aggregating it..'.format(slot_start_t, slot_end_t))
 
                         # Aggregate
                         aggregator_results = self.aggregator.aggregate(dataTimeSeries     = filtered_dataTimeSeries,
-                                                                       start_dt           = slot_start_dt,
-                                                                       end_dt             = slot_end_dt,
+                                                                       start_dt           = dt_from_s(slot_start_t, tz=tz),
+                                                                       end_dt             = dt_from_s(slot_end_t, tz=tz),
                                                                        timeSlotSpan       = self.timeSlotSpan,
                                                                        raise_if_no_data   = self.raise_if_no_data)
                         # .. and append results 
@@ -413,20 +714,21 @@ class DataTimeSeriesAggregatorProcess(object):
                                 callback_counter = 1
                     
                     # Create a new slot
-                    slot_start_dt = slot_end_dt
-                    slot_end_dt   = slot_start_dt + self.timeSlotSpan
-                    
-                    # Create a new filtered_dataTimeSeries as part of the 'create a new slot' procedure
-                    filtered_dataTimeSeries = DataTimeSeries()
+                    slot_start_t = slot_end_t
+                    slot_end_t   = next(slot_edges)
                     
-                    # Append the previous dataprev_dataTimePoint to the new DataTimeSeries
+                    # Restart the filtered_dataTimeSeries window as part of the 'create a new slot' procedure
+                    # and add the previous dataprev_dataTimePoint to it
                     if prev_dataTimePoint:
-                        filtered_dataTimeSeries.append(prev_dataTimePoint)
+                        filtered_dataTimeSeries.restart(prev_position)
+                        filtered_dataTimeSeries.add(prev_dataTimePoint, prev_position)
+                    else:
+                        filtered_dataTimeSeries.restart(position)
 
-                    logger.debug('SlotStream: Spinned a new slot (start={}, end={})'.format(slot_start_dt, slot_end_dt))
+                    logger.debug('SlotStream: Spinned a new slot (start_t={}, end_t={})'.format(slot_start_t, slot_end_t))
                     
                     # If last slot mark process as ended:
-                    if dataTimePoint.dt >= end_dt:
+                    if dataTimePoint.t >= end_t:
                         process_ended = True
                     
        
@@ -435,11 +737,12 @@ class DataTimeSeriesAggregatorProcess(object):
             # Time series filtering
             #----------------------------
         
-            # Append this point
-            filtered_dataTimeSeries.append(dataTimePoint)
+            # Add this point
+            filtered_dataTimeSeries.add(dataTimePoint, position)
             
             # ..and save as previous point
             prev_dataTimePoint =  dataTimePoint           
+            prev_position      =  position
 
 
         #----------------------------
@@ -451,12 +754,12 @@ class DataTimeSeriesAggregatorProcess(object):
             # 1) Close the last slot and aggreagte it. You should never do it unless you knwo what you are doing
             if filtered_dataTimeSeries:
     
-                logger.debug('SlotStream: this slot (start={}, end={}) is closed, now aggregating it..'.format(slot_start_dt, slot_end_dt))
+                logger.debug('SlotStream: this slot (start_t={}, end_t={}) is closed, now aggregating it..'.format(slot_start_t, slot_end_t))
       
                 # Aggregate
                 aggregator_results =  self.aggregator.aggregate(dataTimeSeries     = filtered_dataTimeSeries,
-                                                                start_dt           = slot_start_dt,
-                                                                end_dt             = slot_end_dt,
+                                                                start_dt           = dt_from_s(slot_start_t, tz=tz),
+                                                                end_dt             = dt_from_s(slot_end_t, tz=tz),
                                                                 timeSlotSpan       = self.timeSlotSpan)
                 
                 # .. and append results
@@ -476,6 +779,187 @@ class DataTimeSeriesAggregatorProcess(object):
 
         logger.debug('Aggregation process ended, processed {} DataTimePoints.'.format(count))
  
+    #------------------
+    #  Slots in slots
+    #------------------
+    def _start_on_Slots(self, dataTimeSeries, start_dt, end_dt, callback=None, callback_trigger=None):
+        '''Aggregate the Slots of the dataTimeSeries in the (wider) slots of the timeSlotSpan. A slot is aggregated
+        as soon as a Slot after it is found, or at the end if the last Slot ends with it. Slots not contained in a
+        slot are not supported (they have to be aligned) while missing ones are accounted in the coverage.'''
+
+        tz                      = start_dt.tzinfo
+        start_t                 = s_from_dt(start_dt)
+        end_t                   = s_from_dt(end_dt)
+        slot_edges              = t_range(start_t, None, self.timeSlotSpan, tz=tz)
+        slot_start_t            = next(slot_edges)
+        slot_end_t              = next(slot_edges)
+        filtered_dataTimeSeries = DataTimeSeriesWindow.over(dataTimeSeries)
+        last_end_t              = None
+        started                 = False
+
+        logger.info('Aggregation process started from {} to {} with a sensor of class {} on {}'.format(start_dt,
+                                                                                                       end_dt,
+                                                                                                       self.Sensor.__class__.__name__,
+                                                                                                       dataTimeSeries))
+        # Counters
+        callback_counter = 1
+        count = 0
+
+        def close_slot():
+            # Aggregate and append results
+            logger.debug('SlotStream: this slot (start_t={}, end_t={}) is closed, now aggregating it..'.format(slot_start_t, slot_end_t))
+            self.results_dataTimeSeries.append(self.aggregator.aggregate(dataTimeSeries   = filtered_dataTimeSeries,
+                                                                         start_dt         = dt_from_s(slot_start_t, tz=tz),
+                                                                         end_dt           = dt_from_s(slot_end_t, tz=tz),
+                                                                         timeSlotSpan     = self.timeSlotSpan,
+                                                                         raise_if_no_data = self.raise_if_no_data))
+
+        for dataTimeSlot in dataTimeSeries:
+
+            if not isinstance(dataTimeSlot, Slot):
+                raise InputException('Expected Slots to aggregate, got {}'.format(dataTimeSlot))
+            count +=1
+            position = count-1
+
+            # Discard Slots before the start and stop at the end
+            if dataTimeSlot.start.t < start_t:
+                continue
+            if dataTimeSlot.start.t >= end_t:
+                break
+            if not started:
+                filtered_dataTimeSeries.restart(position)
+                started = True
+
+            # Close the current slot (and the empty ones, if any) if this Slot is after it
+            while dataTimeSlot.start.t >= slot_end_t:
+                close_slot()
+                callback_counter +=1
+                if callback_trigger and callback_counter > callback_trigger:
+                    if callback:
+                        callback(self)
+                        callback_counter = 1
+                slot_start_t = slot_end_t
+                slot_end_t   = next(slot_edges)
+                filtered_dataTimeSeries.restart(position)
+
+            if dataTimeSlot.end.t > slot_end_t:
+                raise InputException('Slot {} is not contained in the slot from {} to {}, cannot aggregate it'.format(dataTimeSlot, dt_from_s(slot_start_t, tz=tz), dt_from_s(slot_end_t, tz=tz)))
+
+            filtered_dataTimeSeries.add(dataTimeSlot, position)
+            last_end_t = dataTimeSlot.end.t
+
+        # Close the last slot, if complete
+        if last_end_t is not None and last_end_t == slot_end_t:
+            close_slot()
+
+        logger.debug('Aggregation process ended, processed {} DataTimeSlots.'.format(count))
+
+
+    #------------------
+    #  Partitioned
+    #------------------
+    def get_partitions(self, start_dt, end_dt, partitions):
+        '''Split start_dt-end_dt in (up to) the given number of partitions, aligned with the timeSlotSpan.
+        Returns the boundaries of the partitions, including start_dt and end_dt.'''
+        start_s = s_from_dt(start_dt)
+        end_s   = s_from_dt(end_dt)
+        boundaries = [start_dt]
+        for i in range(1, partitions):
+            boundary_dt = dt_from_s(self.timeSlotSpan.floor_t(start_s + (end_s-start_s)*i/float(partitions), tz=start_dt.tzinfo), tz=start_dt.tzinfo)
+            if boundary_dt > boundaries[-1]:
+                boundaries.append(boundary_dt)
+        boundaries.append(end_dt)
+        return boundaries
+
+    def start_partitioned(self, dataTimeSeries, start_dt, end_dt, rounded=False, partitions=None, max_workers=None):
+        '''Start the aggregator process splitting start_dt-end_dt in partitions aligned with the timeSlotSpan (by
+        default one for each worker) and aggregating them in parallel, over a pool of max_workers processes (by
+        default, one per core. With max_workers=0 the partitions are aggregated in this process). The data of
+        each partition is sent to the workers as arrays, and includes the point preceding the partition and the
+        one following it, so that the results are the same of the serial start().'''
+
+        # Check (and round if requested) start and end
+        start_dt, end_dt = self._check_start_end(start_dt, end_dt, rounded)
+        start_t = s_from_dt(start_dt)
+        end_t   = s_from_dt(end_dt)
+
+        # Load the data as arrays, only keeping the last point before the start and the first after the end
+        labels          = None
+        t               = array('d')
+        columns         = None
+        prev_point      = None
+        tz              = None
+        point_type      = None
+        validity_region = None
+        for dataTimePoint in dataTimeSeries:
+
+            # If slot not yet supported
+            if isinstance(dataTimePoint, Slot):
+                raise NotImplementedError('Aggregating slots in slots is not yet supported')
+
+            if labels is None:
+                labels          = list(dataTimePoint.data.labels)
+                columns         = [array('d') for _ in labels]
+                tz              = dataTimePoint.tz
+                point_type      = dataTimePoint.__class__
+                validity_region = getattr(dataTimePoint, '_validity_region', None)
+
+            if dataTimePoint.t < start_t:
+                prev_point = dataTimePoint
+                continue
+            for point in ([prev_point, dataTimePoint] if prev_point is not None else [dataTimePoint]):
+                t.append(point.t)
+                for i, value in enumerate(point.data.values):
+                    columns[i].append(value)
+            prev_point = None
+            if dataTimePoint.t > end_t:
+                break
+
+        if prev_point is not None:
+            t.append(prev_point.t)
+            for i, value in enumerate(prev_point.data.values):
+                columns[i].append(value)
+
+        # Split in partitions
+        if max_workers is None:
+            max_workers = cpu_count()
+        boundaries = self.get_partitions(start_dt, end_dt, partitions if partitions else max(max_workers, 1))
+        logger.info('Aggregation process started from {} to {} with a sensor of class {} on {} in {} partitions'.format(start_dt,
+                                                                                                                       end_dt,
+                                                                                                                       self.Sensor.__class__.__name__,
+                                                                                                                       dataTimeSeries,
+                                                                                                                       len(boundaries)-1))
+        jobs = []
+        for partition_start_dt, partition_end_dt in zip(boundaries[:-1], boundaries[1:]):
+            # The point preceding the partition and the one following it are included as well
+            first = max(bisect_left(t, s_from_dt(partition_start_dt))-1, 0)
+            last  = min(bisect_right(t, s_from_dt(partition_end_dt))+1, len(t))
+            values_by_label = list(zip(labels, [column[first:last] for column in columns])) if labels else []
+            # Aggregate the partitions (but the last one) one slot more, as the process would stop with the
+            # data at its end and its last slot would not be closed. That slot is then discarded.
+            if partition_end_dt != end_dt:
+                partition_end_dt = self.timeSlotSpan.shift_dt(partition_end_dt, times=1)
+            jobs.append((self.timeSlotSpan, self.Sensor, self.data_to_aggregate, self.raise_if_no_data, partition_start_dt, partition_end_dt,
+                         t[first:last], values_by_label, tz, point_type, validity_region))
+
+        # Aggregate
+        if max_workers == 0:
+            partitions_results = [aggregate_partition(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(aggregate_partition, *job) for job in jobs]
+                partitions_results = [future.result() for future in futures]
+
+        # Stitch the results. The slots after the end of a partition (if there were no data) belong to the next one.
+        for i, partition_results in enumerate(partitions_results):
+            partition_end_t = s_from_dt(boundaries[i+1])
+            for dataTimeSlot in partition_results:
+                if i < len(partitions_results)-1 and dataTimeSlot.start.t >= partition_end_t:
+                    break
+                self.results_dataTimeSeries.append(dataTimeSlot)
+
+        logger.debug('Aggregation process ended, processed {} partitions.'.format(len(partitions_results)))
+
     #------------------
     #  Get results
     #------------------
@@ -494,9 +978,445 @@ class DataTimeSeriesAggregatorProcess(object):
 
 
 
+class DataTimeSeriesMultiAggregatorProcess(object):
+    '''Aggregate a DataTimeSeries of DataTimePoints in slots of more (nested) timeSlotSpans at once, i.e. 5m, 15m and 1h.
+    The Points are read only once, to aggregate the slots of the finest timeSlotSpan, and every coarser timeSlotSpan is
+    then aggregated from the slots of the previous one (see the DataTimeSlotsAggregator), in cascade. The timeSlotSpans
+    have to be given from the finest to the coarsest, each one a multiple of the previous one. get_results() returns
+    a DataTimeSeries of DataTimeSlots for each timeSlotSpan, in the same order. The process is STATEFUL'''
+
+    def __init__(self, timeSlotSpans, Sensor, data_to_aggregate, raise_if_no_data=False):
+
+        # Sanity checks
+        if not timeSlotSpans:
+            raise InputException('No timeSlotSpans given')
+        for timeSlotSpan, coarser_timeSlotSpan in zip(timeSlotSpans[:-1], timeSlotSpans[1:]):
+            if not self._is_nested(timeSlotSpan, coarser_timeSlotSpan, tz=getattr(Sensor, 'timezone', None)):
+                raise InputException('Sorry, the timeSlotSpans have to be nested and given from the finest to the coarsest (got {} before {})'.format(timeSlotSpan, coarser_timeSlotSpan))
+
+        # Arguments
+        self.timeSlotSpans    = list(timeSlotSpans)
+        self.Sensor           = Sensor
+        self.raise_if_no_data = raise_if_no_data
+
+        # A process for every timeSlotSpan: the first one on the given data, the others on the slots of the previous one
+        self.processes = []
+        for i, timeSlotSpan in enumerate(self.timeSlotSpans):
+            self.processes.append(DataTimeSeriesAggregatorProcess(timeSlotSpan      = timeSlotSpan,
+                                                                  Sensor            = Sensor,
+                                                                  data_to_aggregate = data_to_aggregate if i == 0 else Sensor.Slots_type,
+                                                                  raise_if_no_data  = raise_if_no_data))
+        self.results = [DataTimeSeries() for _ in self.timeSlotSpans]
+
+    @staticmethod
+    def _is_nested(timeSlotSpan, coarser_timeSlotSpan, tz=None):
+        '''Check that every slot boundary of the coarser timeSlotSpan is also a slot boundary of the finer
+        one, on the given timezone, according to the slot alignments of the TimeSlotSpans'''
+        if timeSlotSpan.is_composite() or coarser_timeSlotSpan.is_composite():
+            return False
+
+        if timeSlotSpan.is_physical():
+            span_s = timeSlotSpan.duration_s()
+            if coarser_timeSlotSpan.is_physical():
+                coarser_span_s = coarser_timeSlotSpan.duration_s()
+                return coarser_span_s > span_s and coarser_span_s % span_s == 0
+
+            # Logical slots start on local midnights, which have to be on the (physical) slot boundaries. Check
+            # the first midnight after the Epoch and after each UTC offset transition of the timezone.
+            if 86400 % span_s != 0:
+                return False
+            tz_transitions = get_tz_transitions(tz)
+            transitions_t  = [t for t in tz_transitions[0] if t > 0] if tz_transitions else []
+            midnights_t    = TimeSlotSpan('1D').ceil_t([0] + transitions_t, tz=tz)
+            return all(timeSlotSpan.floor_t(midnight_t, tz=tz) == midnight_t for midnight_t in midnights_t)
+
+        # Only logical spans from now on
+        if not coarser_timeSlotSpan.is_logical():
+            return False
+        days,  coarser_days  = timeSlotSpan.days, coarser_timeSlotSpan.days
+        weeks, coarser_weeks = timeSlotSpan.weeks, coarser_timeSlotSpan.weeks
+        months, years        = timeSlotSpan.months, timeSlotSpan.years
+        coarser_months       = coarser_timeSlotSpan.months
+        coarser_years        = coarser_timeSlotSpan.years
+
+        if days:
+            if coarser_days:
+                return coarser_days > days and coarser_days % days == 0
+            if coarser_weeks:
+                # Days are aligned on 1970-01-01, weeks on Mondays (on 0001-01-01)
+                return (7*coarser_weeks) % days == 0 and (1 - datetime.date(1970,1,1).toordinal()) % days == 0
+            # Months and years start on any day of the week
+            return days == 1
+        if weeks:
+            if coarser_weeks:
+                return coarser_weeks > weeks and coarser_weeks % weeks == 0
+            return False
+        if months:
+            if coarser_months:
+                return coarser_months > months and coarser_months % months == 0
+            if coarser_years:
+                # Months are aligned on the months since year zero, years on the years
+                return (12*coarser_years) % months == 0
+            return False
+        if years:
+            if coarser_years:
+                return coarser_years > years and coarser_years % years == 0
+            return False
+        return False
+
+    def start(self, dataTimeSeries, start_dt, end_dt, rounded=False):
+        '''Start the aggregator process. Start and end have to be consistent with the coarsest timeSlotSpan
+        (or rounded according to it, if rounded is set)'''
+        start_dt, end_dt = self.processes[-1]._check_start_end(start_dt, end_dt, rounded)
+
+        logger.info('Multi aggregation process started from {} to {} in slots of {}'.format(start_dt, end_dt, ', '.join(str(timeSlotSpan) for timeSlotSpan in self.timeSlotSpans)))
+        for i, process in enumerate(self.processes):
+            process.start(dataTimeSeries = dataTimeSeries if i == 0 else self.results[i-1],
+                          start_dt       = start_dt,
+                          end_dt         = end_dt)
+            self.results[i] = process.get_results()
+            logger.debug('Done aggregating in slots of {}, got {} DataTimeSlots'.format(self.timeSlotSpans[i], len(self.results[i])))
+
+    def get_results(self):
+        '''Get the results, as a list of DataTimeSeries (one for each timeSlotSpan)'''
+        results = self.results
+        self.results = [DataTimeSeries() for _ in self.timeSlotSpans]
+        return results
+
+
+class DataTimeSeriesOnlineAggregatorProcess(object):
+    '''An online version of the DataTimeSeriesAggregatorProcess, for DataTimePoints: the points are pushed one at a
+    time (or in small batches) and the DataTimeSlots are returned as soon as they are closed, which is when a point
+    after their end is pushed (as in the DataTimeSeriesAggregatorProcess, so results are the same). Only the state of
+    the open slot is kept (constant size, see Aggregates1DAccumulator) and it can be saved with get_state() and
+    restored with set_state(), to resume after a restart. Only Sensors whose operations are all computed in the
+    single pass (see FUSED_OPERATIONS) or are streaming ones are supported, and their generators do not get the
+    Points. If start_dt is not set, the slot of the first point is the first one. The process is STATEFUL'''
+
+    def __init__(self, timeSlotSpan, Sensor, start_dt=None, raise_if_no_data=False):
+
+        # Arguments
+        self.timeSlotSpan     = timeSlotSpan
+        self.Sensor           = Sensor
+        self.raise_if_no_data = raise_if_no_data
+
+        # Sanity checks
+        if not timeSlotSpan.is_physical():
+            raise InputException('Sorry, only physical time slot spans are supported in the online aggregation (got {})'.format(timeSlotSpan))
+        if start_dt is not None and start_dt != timeSlotSpan.round_dt(start_dt):
+            raise InputException('Sorry, provided start_dt is not consistent with the timeSlotSpan ({})'.format(start_dt))
+
+        self.aggregation_plan = get_aggregation_plan(Sensor)
+        for step in self.aggregation_plan.steps:
+            if step.Operation and not (step.fused or step.streaming):
+                raise ConfigurationException('Sorry, {} cannot be computed in the online aggregation as its operation is not a streaming one'.format(step.label))
+        self.aggregator = DataTimePointsAggregator(Sensor=Sensor, aggregation_plan=self.aggregation_plan)
+        self._span_s = timeSlotSpan.duration_s()
+
+        # State
+        self.start_t      = s_from_dt(start_dt) if start_dt is not None else None
+        self.tz           = str(start_dt.tzinfo) if start_dt is not None else None
+        self.slot_start_t = None
+        self.slot_end_t   = None
+        self.accumulator  = None
+        self.prev_point   = None
+        self.last_t       = None
+
+        # Support vars
+        self._labels    = None
+        self._positions = None
+
+    #------------------
+    #  Push
+    #------------------
+    def push(self, data):
+        '''Push a DataTimePoint, or an iterable of them (i.e. a list or a DataTimeSeries), in time order.
+        Returns the list of the DataTimeSlots closed by the push (if any).'''
+        if isinstance(data, Slot):
+            raise NotImplementedError('Aggregating slots in slots is not supported in the online aggregation')
+        if isinstance(data, TimePoint):
+            data = [data]
+
+        dataTimeSlots = []
+        for dataTimePoint in data:
+
+            # Check order
+            t = dataTimePoint.t
+            if self.last_t is not None and t <= self.last_t:
+                raise InputException('Got a point (t={}) not after the last one (t={}), points must be pushed in time order'.format(t, self.last_t))
+
+            values, half_span = self._unpack(dataTimePoint)
+            self._push(t, values, half_span, dataTimePoint.tz, dataTimeSlots)
+            self.last_t = t
+
+        return dataTimeSlots
+
+    def _unpack(self, dataTimePoint):
+        '''Get the values to aggregate and the validity region half span of a point'''
+        labels = dataTimePoint.data.labels
+        if labels is not self._labels:
+            self._positions = [list(labels).index(label) for label in self.aggregation_plan.Points_data_labels_to_aggregate]
+            self._labels = labels
+        values = [dataTimePoint.data.values[position] for position in self._positions]
+        validity_region = getattr(dataTimePoint, '_validity_region', None)
+        half_span = validity_region.span.value[0]/2.0 if validity_region is not None else None
+        return values, half_span
+
+    def _push(self, t, values, half_span, tz, dataTimeSlots):
+
+        # Set the start if not already done
+        if self.start_t is None:
+            self.tz = str(tz)
+            self.start_t = self.timeSlotSpan.floor_t(t, tz=tz)
+        if self.slot_end_t is None:
+            self.slot_end_t = self.start_t
+
+        # Just keep the previous point before the start
+        if t < self.start_t:
+            self.prev_point = [t, values, half_span]
+            return
+
+        # Close the current slot (and spin new ones up to this point) if this point is after it
+        if t > self.slot_end_t:
+            if self.accumulator is not None:
+                self.accumulator.add(t, values, half_span)
+            while self.slot_end_t < t:
+                if self.slot_start_t is not None:
+                    dataTimeSlots.append(self._close())
+                self.slot_start_t = self.slot_end_t
+                self.slot_end_t   = self.slot_start_t + self._span_s
+                self.accumulator  = Aggregates1DAccumulator(start_t=self.slot_start_t, end_t=self.slot_end_t,
+                                                            labels=self.aggregation_plan.Points_data_labels_to_aggregate,
+                                                            operations=self.aggregation_plan.streaming_operations)
+                if self.prev_point is not None:
+                    self.accumulator.add(*self.prev_point)
+
+        if self.accumulator is not None:
+            self.accumulator.add(t, values, half_span)
+        self.prev_point = [t, values, half_span]
+
+    def _close(self):
+        logger.debug('Online aggregation: slot (start={}, end={}) is closed, now aggregating it..'.format(self.slot_start_t, self.slot_end_t))
+        Slot_coverage, Points_aggregates = self.accumulator.results()
+        return self.aggregator.build_Slot(dataTimeSeries    = None,
+                                          start_Point       = TimePoint(t=self.slot_start_t, tz=self.tz),
+                                          end_Point         = TimePoint(t=self.slot_end_t, tz=self.tz),
+                                          timeSlotSpan      = self.timeSlotSpan,
+                                          Slot_coverage     = Slot_coverage,
+                                          Points_aggregates = Points_aggregates,
+                                          raise_if_no_data  = self.raise_if_no_data)
+
+    #------------------
+    #  State
+    #------------------
+    def get_state(self):
+        '''Get the state of the process, as a dict of plain types (which can be serialized as JSON for example)'''
+        return {'timeSlotSpan': str(self.timeSlotSpan),
+                'start_t':      self.start_t,
+                'tz':           self.tz,
+                'slot_start_t': self.slot_start_t,
+                'slot_end_t':   self.slot_end_t,
+                'accumulator':  self.accumulator.get_state() if self.accumulator is not None else None,
+                'prev_point':   list(self.prev_point) if self.prev_point is not None else None,
+                'last_t':       self.last_t}
+
+    def set_state(self, state):
+        '''Restore a state got with get_state()'''
+        if state['timeSlotSpan'] != str(self.timeSlotSpan):
+            raise InputException('The state is for a timeSlotSpan of {}, but this process has a timeSlotSpan of {}'.format(state['timeSlotSpan'], self.timeSlotSpan))
+        self.start_t      = state['start_t']
+        self.tz           = state['tz']
+        self.slot_start_t = state['slot_start_t']
+        self.slot_end_t   = state['slot_end_t']
+        self.accumulator  = Aggregates1DAccumulator.from_state(state['accumulator'], operations=self.aggregation_plan.streaming_operations) if state['accumulator'] is not None else None
+        self.prev_point   = list(state['prev_point']) if state['prev_point'] is not None else None
+        self.last_t       = state['last_t']
+
+
+class DataTimeSeriesBufferedAggregatorProcess(object):
+    '''Online aggregation of DataTimePoints which can arrive late and out of order. Points are pushed in an ordered
+    buffer and passed to a DataTimeSeriesOnlineAggregatorProcess only when older than the newest point pushed minus the
+    allowed lateness (a TimeSlotSpan): within this window, points are just merged in order. Points arriving later than
+    that affect slots which are already closed: these slots are marked as dirty and only them are re-aggregated from
+    the Points in the storage and upserted (together with the online state, if the open slot is affected as well).
+    The storage (optional) receives both the Points passed to the online aggregation and the Slots, as they are
+    closed. The lookback (a TimeSlotSpan, defaults to the timeSlotSpan) is how much data before the dirty slots is loaded
+    to get their previous point. Without a storage, points arriving later than the allowed lateness are discarded.'''
+
+    def __init__(self, timeSlotSpan, Sensor, allowed_lateness=None, storage=None, lookback=None, start_dt=None, raise_if_no_data=False, can_initialize=False):
+
+        # Arguments
+        self.timeSlotSpan     = timeSlotSpan
+        self.Sensor           = Sensor
+        self.allowed_lateness = allowed_lateness
+        self.storage          = storage
+        self.raise_if_no_data = raise_if_no_data
+        self.can_initialize   = can_initialize
+        self._allowed_lateness_s = allowed_lateness.duration_s() if allowed_lateness is not None else 0
+        self._lookback_s         = lookback.duration_s() if lookback is not None else timeSlotSpan.duration_s()
+
+        # Online aggregation and buffer (the points, and their times to bisect on)
+        self.online_aggregator = DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan     = timeSlotSpan,
+                                                                       Sensor           = Sensor,
+                                                                       start_dt         = start_dt,
+                                                                       raise_if_no_data = raise_if_no_data)
+        self._buffer   = []
+        self._buffer_t = []
+        self.newest_t  = None
+
+        # Counters
+        self.late_points      = 0
+        self.discarded_points = 0
+
+    @property
+    def watermark_t(self):
+        '''Points older than the watermark are passed to the online aggregation (and any point arriving before it is late)'''
+        return self.newest_t - self._allowed_lateness_s if self.newest_t is not None else None
+
+    #------------------
+    #  Push
+    #------------------
+    def push(self, data):
+        '''Push a DataTimePoint, or an iterable of them (in any order). Returns the list of the DataTimeSlots closed
+        or re-aggregated (if any), which are also put in the storage.'''
+        if isinstance(data, TimePoint):
+            data = [data]
+
+        dataTimeSlots = []
+        for dataTimePoint in data:
+            t = dataTimePoint.t
+
+            # Late (the watermark is already past it)
+            if self.online_aggregator.last_t is not None and t <= self.online_aggregator.last_t:
+                self.late_points += 1
+                dataTimeSlots += self._reaggregate(dataTimePoint)
+                continue
+
+            # Merge in order in the buffer (a point with the same time replaces the buffered one)
+            position = bisect_left(self._buffer_t, t)
+            if position < len(self._buffer_t) and self._buffer_t[position] == t:
+                self._buffer[position] = dataTimePoint
+            else:
+                self._buffer_t.insert(position, t)
+                self._buffer.insert(position, dataTimePoint)
+            if self.newest_t is None or t > self.newest_t:
+                self.newest_t = t
+
+        # Pass to the online aggregation the points older than the watermark
+        dataTimeSlots += self._release(bisect_right(self._buffer_t, self.watermark_t) if self._buffer else 0)
+        return dataTimeSlots
+
+    def flush(self):
+        '''Pass all the buffered points to the online aggregation (i.e. at shutdown). Returns the closed DataTimeSlots.'''
+        return self._release(len(self._buffer))
+
+    def _release(self, count):
+        if not count:
+            return []
+        dataTimePoints = self._buffer[:count]
+        del self._buffer[:count]
+        del self._buffer_t[:count]
+        dataTimeSlots = self.online_aggregator.push(dataTimePoints)
+        if self.storage is not None:
+            self.storage.put(self._to_DataTimeSeries(dataTimePoints), sensor=self.Sensor, can_initialize=self.can_initialize)
+            self.storage.put(self._to_DataTimeSeries(dataTimeSlots), sensor=self.Sensor, can_initialize=self.can_initialize)
+        return dataTimeSlots
+
+    @staticmethod
+    def _to_DataTimeSeries(items):
+        dataTimeSeries = DataTimeSeries()
+        for item in items:
+            dataTimeSeries.append(item)
+        return dataTimeSeries
+
+    #------------------
+    #  Late data
+    #------------------
+    def _reaggregate(self, dataTimePoint):
+        '''Handle a late point: store it, then re-aggregate the (dirty) slots it affects and upsert them'''
+        if self.storage is None:
+            logger.warning('Discarding late point {} (t={}, already aggregated up to t={})'.format(dataTimePoint, dataTimePoint.t, self.online_aggregator.last_t))
+            self.discarded_points += 1
+            return []
+        self.storage.put(self._to_DataTimeSeries([dataTimePoint]), sensor=self.Sensor, can_initialize=self.can_initialize)
+
+        online_aggregator = self.online_aggregator
+        span_s     = online_aggregator._span_s
+        lookback_s = self._lookback_s
+        tz         = online_aggregator.tz
+        start_t    = online_aggregator.start_t
+        last_t     = online_aggregator.last_t
+
+        # The dirty slots go from the one of the previous point (the late point can be the one after its end) up to
+        # the one of the next point (the late point is the one before its start), but the open one.
+        prev_t = dataTimePoint.t
+        for prev_dataTimePoint in self.storage.get(sensor=self.Sensor, from_dt=dt_from_s(dataTimePoint.t - lookback_s, tz=tz), to_dt=dt_from_s(dataTimePoint.t, tz=tz)):
+            prev_t = prev_dataTimePoint.t
+        dirty_start_t = max(start_t + ((prev_t - start_t) // span_s - 1) * span_s, start_t)
+        dirty_end_t   = online_aggregator.slot_start_t if online_aggregator.slot_start_t is not None else start_t
+        for next_dataTimePoint in self.storage.get(sensor=self.Sensor, from_dt=dt_from_s(dataTimePoint.t, tz=tz), to_dt=dt_from_s(last_t+1, tz=tz)):
+            if next_dataTimePoint.t > dataTimePoint.t:
+                dirty_end_t = min(start_t + ((next_dataTimePoint.t - start_t) // span_s + 1) * span_s, dirty_end_t)
+                break
+        open_slot_dirty = dirty_end_t == online_aggregator.slot_start_t or online_aggregator.slot_start_t is None
+        logger.debug('Late point at t={}: dirty slots from t={} to t={}{}'.format(dataTimePoint.t, dirty_start_t, dirty_end_t, ' and the open slot' if open_slot_dirty else ''))
+
+        # Re-aggregate the dirty slots from the stored points and upsert them
+        dataTimeSlots = []
+        if dirty_end_t > dirty_start_t:
+            dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = self.timeSlotSpan,
+                                                                              Sensor            = self.Sensor,
+                                                                              data_to_aggregate = self.Sensor.Points_type,
+                                                                              raise_if_no_data  = self.raise_if_no_data)
+            dataTimeSeriesAggregatorProcess.start(dataTimeSeries = self.storage.get(sensor  = self.Sensor,
+                                                                                    from_dt = dt_from_s(dirty_start_t - lookback_s, tz=tz),
+                                                                                    to_dt   = dt_from_s(last_t+1, tz=tz)),
+                                                  start_dt       = dt_from_s(dirty_start_t, tz=tz),
+                                                  end_dt         = dt_from_s(dirty_end_t, tz=tz))
+            dataTimeSlots = [dataTimeSlot for dataTimeSlot in dataTimeSeriesAggregatorProcess.get_results() if dataTimeSlot.start.t < dirty_end_t]
+            self.storage.put(self._to_DataTimeSeries(dataTimeSlots), sensor=self.Sensor, can_initialize=self.can_initialize)
+
+        # Rebuild the state of the open slot from the stored points: its accumulator gets the last point
+        # not after its start and all the following ones, and the last point is the previous one.
+        if open_slot_dirty:
+            slot_start_t = online_aggregator.slot_start_t
+            accumulator  = None
+            if slot_start_t is not None:
+                accumulator = Aggregates1DAccumulator(start_t=slot_start_t, end_t=online_aggregator.slot_end_t,
+                                                      labels=online_aggregator.aggregation_plan.Points_data_labels_to_aggregate,
+                                                      operations=online_aggregator.aggregation_plan.streaming_operations)
+            prev_point = None
+            from_t = slot_start_t if slot_start_t is not None else start_t
+            for stored_dataTimePoint in self.storage.get(sensor=self.Sensor, from_dt=dt_from_s(from_t - lookback_s, tz=tz), to_dt=dt_from_s(last_t+1, tz=tz)):
+                values, half_span = online_aggregator._unpack(stored_dataTimePoint)
+                point = [stored_dataTimePoint.t, values, half_span]
+                if accumulator is not None and point[0] > slot_start_t:
+                    if prev_point is not None and prev_point[0] <= slot_start_t:
+                        accumulator.add(*prev_point)
+                    accumulator.add(*point)
+                prev_point = point
+            if accumulator is not None and prev_point is not None and prev_point[0] <= slot_start_t:
+                accumulator.add(*prev_point)
+            online_aggregator.accumulator = accumulator
+            online_aggregator.prev_point  = prev_point
+
+        return dataTimeSlots
+
+
 #-----------------------
 # Utility functions
 #-----------------------
+def aggregate_partition(timeSlotSpan, Sensor, data_to_aggregate, raise_if_no_data, start_dt, end_dt, t, values_by_label, tz, point_type, validity_region):
+    '''Aggregate a partition, given as arrays. Used by the DataTimeSeriesAggregatorProcess.start_partitioned()'''
+    kwargs = {'point_type': point_type, 'validity_region': validity_region} if point_type is not None else {}
+    dataTimeSeries = DataTimeSeries.from_arrays(t=t, values_by_label=values_by_label, tz=tz, **kwargs)
+    dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = timeSlotSpan,
+                                                                      Sensor            = Sensor,
+                                                                      data_to_aggregate = data_to_aggregate,
+                                                                      raise_if_no_data  = raise_if_no_data)
+    dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=start_dt, end_dt=end_dt)
+    return list(dataTimeSeriesAggregatorProcess.get_results())
+
 def obtain_data_type(dataTimeSeries):
     # Are we processing a DataTimeSeries of Points or Slots?
     if dataTimeSeries.data_type == DataTimePoint:
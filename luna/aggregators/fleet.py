@@ -0,0 +1,151 @@
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from luna.common.exceptions import InputException
+from luna.aggregators.components import DataTimeSeriesAggregatorProcess
+
+#--------------------------
+#    Logger
+#--------------------------
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+#-------------------------------------
+# Jobs and reports
+#-------------------------------------
+
+# A job aggregates the data of a sensor from start_dt to end_dt. The storage is not a storage instance but a
+# callable returning it (i.e. the storage class or a functools.partial of it) so that it can be sent to the
+# workers and every worker opens its own storage connection.
+AggregationJob = namedtuple('AggregationJob', ['sensor', 'storage', 'start_dt', 'end_dt'])
+
+# A report of a job, with the number of slots and batches stored, the timings in seconds (loading the data
+# and aggregating it are not distinguishable as the data is streamed from the storage) and the error, if any.
+AggregationJobReport = namedtuple('AggregationJobReport', ['index', 'sensor_id', 'start_dt', 'end_dt', 'slots', 'batches',
+                                                           'elapsed_s', 'storing_s', 'error', 'traceback'])
+
+
+def run_aggregation_job(index, job, timeSlotSpan, batch_size=None, lookback=None, rounded=False, can_initialize=False):
+    '''Run an aggregation job: open the storage, get the data of the sensor, aggregate it and put the results
+    back in the storage in batches of batch_size slots. Never raises, errors are reported in the returned
+    AggregationJobReport. This is the function executed by the workers of the FleetAggregationRunner.'''
+
+    started = time.time()
+    storing_s = [0.0]
+    slots = [0]
+    batches = [0]
+
+    try:
+        sensor = job.sensor
+
+        # Open the storage (in this process)
+        storage = job.storage()
+
+        # Get the data, including the spare points around the boundaries needed by the process
+        lookback = lookback if lookback is not None else timeSlotSpan
+        start_dt = timeSlotSpan.round_dt(job.start_dt) if rounded else job.start_dt
+        end_dt   = timeSlotSpan.round_dt(job.end_dt) if rounded else job.end_dt
+        dataTimeSeries = storage.get(sensor   = sensor,
+                                     from_dt  = lookback.shift_dt(start_dt, times=-1),
+                                     to_dt    = lookback.shift_dt(end_dt, times=1))
+
+        # Store the results as they are produced
+        def store(process):
+            results = process.get_results()
+            if results.is_empty():
+                return
+            storing_started = time.time()
+            storage.put(results, sensor=sensor, can_initialize=can_initialize)
+            storing_s[0] += time.time() - storing_started
+            slots[0] += len(results)
+            batches[0] += 1
+
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = timeSlotSpan,
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = sensor.Points_type)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries   = dataTimeSeries,
+                                              start_dt         = start_dt,
+                                              end_dt           = end_dt,
+                                              callback         = store if batch_size else None,
+                                              callback_trigger = batch_size)
+
+        # Store what is left
+        store(dataTimeSeriesAggregatorProcess)
+
+    except Exception as e:
+        logger.error('Aggregation job #{} for sensor {} failed: {}'.format(index, getattr(job.sensor, 'id', None), e))
+        return AggregationJobReport(index, getattr(job.sensor, 'id', None), job.start_dt, job.end_dt, slots[0], batches[0],
+                                    time.time() - started, storing_s[0], '{}: {}'.format(e.__class__.__name__, e), traceback.format_exc())
+
+    return AggregationJobReport(index, sensor.id, job.start_dt, job.end_dt, slots[0], batches[0],
+                                time.time() - started, storing_s[0], None, None)
+
+
+#-------------------------------------
+# Fleet runner
+#-------------------------------------
+
+class FleetAggregationRunner(object):
+    '''Run the aggregation of a fleet of sensors, fanning out the AggregationJobs over a pool of processes
+    so that the aggregation scales with the cores. Results are stored by the workers as they are produced,
+    in batches of batch_size slots. The lookback (a TimeSlotSpan, defaults to the timeSlotSpan) is how
+    much data before the start and after the end of a job is loaded to get its boundary points.
+    With max_workers=0 jobs are run serially in this process. Note: an SQLite database cannot be written by a
+    worker while another one is reading from it, so with SQLite use one database per worker (or no batches).'''
+
+    def __init__(self, timeSlotSpan, max_workers=None, batch_size=100, lookback=None, rounded=False, can_initialize=False):
+
+        if max_workers is not None and max_workers < 0:
+            raise InputException('max_workers must be a positive integer, zero or None (got {})'.format(max_workers))
+        if batch_size is not None and batch_size < 1:
+            raise InputException('batch_size must be a positive integer or None (got {})'.format(batch_size))
+
+        self.timeSlotSpan   = timeSlotSpan
+        self.max_workers    = max_workers
+        self.batch_size     = batch_size
+        self.lookback       = lookback
+        self.rounded        = rounded
+        self.can_initialize = can_initialize
+
+    def run(self, jobs):
+        '''Run the jobs and return their AggregationJobReports, in the same order as the jobs'''
+
+        jobs = [job if isinstance(job, AggregationJob) else AggregationJob(*job) for job in jobs]
+        for job in jobs:
+            if not callable(job.storage):
+                raise InputException('The storage of a job must be a callable returning the storage (i.e. its class or a partial of it), got {}'.format(job.storage))
+
+        kwargs = {'timeSlotSpan': self.timeSlotSpan, 'batch_size': self.batch_size, 'lookback': self.lookback,
+                  'rounded': self.rounded, 'can_initialize': self.can_initialize}
+
+        logger.info('Running {} aggregation jobs with {} workers'.format(len(jobs), self.max_workers))
+        started = time.time()
+
+        # Serial mode
+        if self.max_workers == 0:
+            reports = [run_aggregation_job(index, job, **kwargs) for index, job in enumerate(jobs)]
+
+        # Parallel mode
+        else:
+            reports = [None for _ in jobs]
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {}
+                for index, job in enumerate(jobs):
+                    futures[executor.submit(run_aggregation_job, index, job, **kwargs)] = index
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        reports[index] = future.result()
+                    except Exception as e:
+                        # The job could not even be run (i.e. not picklable or the worker died)
+                        job = jobs[index]
+                        reports[index] = AggregationJobReport(index, getattr(job.sensor, 'id', None), job.start_dt, job.end_dt, 0, 0,
+                                                              None, None, '{}: {}'.format(e.__class__.__name__, e), traceback.format_exc())
+                    logger.debug('Aggregation job #{} done: {}'.format(index, reports[index]))
+
+        logger.info('Done running {} aggregation jobs in {:.3f}s, {} failed'.format(len(jobs), time.time() - started,
+                                                                                   len([report for report in reports if report.error])))
+        return reports
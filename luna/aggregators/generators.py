@@ -1,4 +1,6 @@
 from luna.datatypes.auxiliary import Quantity, PhysicalQuantity
+from luna.common.exceptions import ConfigurationException, ConsistencyException
+from luna.aggregators.operations import StepTimeIntegral, TrapezoidalTimeIntegral
 
 #------------------------------
 # Base classes
@@ -69,33 +71,58 @@ class PhysicalQuantityGenerator(object):
 
 
 #------------------------------
-# Standard generators
+# Time integral generators
 #------------------------------
 
-class energy_kWh_TOT(PhysicalQuantityGenerator):
-    '''Energy generator. Expect to work on power_W_AVG'''
-    
-    # Depends
-    depends = ['power_W_AVG'] 
-
-    # Generator code
-    @staticmethod
-    def generate(dataSeries, aggregated_data, start_Point, end_Point):
-        return -9
-
-
-
-
-
-
-
-
-
-
-
-
+# Cache of the time integral Operations, by generator
+_time_integral_Operations = {}
+
+class TimeIntegralGenerator(PhysicalQuantityGenerator):
+    '''A generator of a total by integrating over time a rate-like quantity of the Points, the integrand (i.e. power_W
+    to generate energy_kWh_TOT), with the trapezoidal or step method and scaled by the factor (i.e. from Ws to kWh).
+    The integral is computed in the single pass over the Points as a streaming operation on the integrand (see the
+    TimeIntegral operations), honouring the validity regions and the gaps. Slots are aggregated by summing their totals.
+    If the integrand is not in the Points, its average in the aggregated data is integrated instead (as a step).'''
+
+    integrand = None
+    method    = 'trapezoidal'
+    factor    = 1.0
+
+    @classmethod
+    def get_Operation(cls):
+        '''Get the Operation computing the integral, on the integrand'''
+        try:
+            return _time_integral_Operations[cls]
+        except KeyError:
+            if cls.method == 'trapezoidal':
+                TimeIntegral = TrapezoidalTimeIntegral
+            elif cls.method == 'step':
+                TimeIntegral = StepTimeIntegral
+            else:
+                raise ConfigurationException('Unknown time integration method "{}" for {} (choices are "trapezoidal" and "step")'.format(cls.method, cls.__name__))
+            _time_integral_Operations[cls] = type(str(cls.__name__), (TimeIntegral,), {'factor': cls.factor})
+            return _time_integral_Operations[cls]
+
+    @classmethod
+    def generate(cls, dataSeries, aggregated_data, start_Point, end_Point):
+        average_label = cls.integrand + '_AVG'
+        if average_label not in aggregated_data.labels:
+            raise ConsistencyException('Cannot generate {}: {} is not in the Points and {} is not in the aggregated data'.format(cls.__name__, cls.integrand, average_label))
+        average = aggregated_data.content[average_label]
+        if average is None:
+            return None
+        return average * (end_Point.values[0] - start_Point.values[0]) * cls.factor
 
 
+#------------------------------
+# Standard generators
+#------------------------------
 
+class energy_kWh_TOT(TimeIntegralGenerator):
+    '''Energy generator, integrating power_W (or power_W_AVG if the Points have no power_W)'''
 
+    # Depends (when power_W is not in the Points, otherwise it is computed on them)
+    depends = ['power_W_AVG']
 
+    integrand = 'power_W'
+    factor    = 1 / 3600000.0
@@ -1,23 +1,115 @@
 
+import re
+import copy
+import math
 from luna.datatypes.dimensional import DataTimeSeries
-from luna.common.exceptions import ConsistencyException
+from luna.common.exceptions import ConsistencyException, InputException
+from luna.aggregators.vectorized import is_vectorizable, get_operation_label, compute_1D_aggregates_vectorized, compute_single_Point_avg
+from luna.aggregators.utilities import compute_1D_aggregates
+from luna.aggregators.sketches import QuantileSketch
 
 class Operation(object):
-    
+    '''Base Operation class. An Operation can also be a streaming one (is_stremaing set), implementing the streaming
+    protocol: init_state(), update(), merge() and finalize(). Streaming operations are computed in the single pass
+    over the Points (see Aggregates1DAccumulator) without ever needing them all, and their states can be merged.'''
+
+    is_stremaing = False
+
+    # If the state has to be kept in the Slots, to aggregate them (i.e. as quantiles cannot be computed from quantiles)
+    keeps_state = False
+
+    # If only the Points with their time in the slot have to update the state (i.e. to count them), and not also the
+    # ones around it which are representative of part of the slot (i.e. to weight the average)
+    in_slot_only = False
+
+    # If the state has to be updated with the time of the Points (i.e. to integrate over it): timed operations are
+    # updated with every Point as it is added, by update_on_Point() instead of update()
+    is_timed = False
+
     @staticmethod
     def compute_on_Points(dataSeries, start_Point, end_Point):
         raise NotImplementedError()
+
+    @classmethod
+    def compute_on_Points_vectorized(cls, dataSeries, start_Point, end_Point):
+        '''Compute the operation with the NumPy backend if possible (array-backed dataSeries), otherwise return
+        NotImplemented. Only operations computed by the vectorized kernel (AVG, MIN, MAX) are supported.'''
+        if not is_vectorizable(dataSeries):
+            return NotImplemented
+        label = get_operation_label(dataSeries)
+        if label is None:
+            return NotImplemented
+        results = compute_1D_aggregates_vectorized(dataSeries, start_Point, end_Point, labels=[label])[1][label]
+        return results.get(cls.__name__, NotImplemented)
     
+    @classmethod
+    def compute_on_Points_streaming(cls, dataSeries, start_Point, end_Point):
+        '''Compute a streaming operation with the streaming protocol, in a single pass (see compute_1D_aggregates)'''
+        label = get_operation_label(dataSeries)
+        if label is None:
+            raise InputException('Cannot find the data label to compute {} on, please filter the dataSeries by label'.format(cls.__name__))
+        return compute_1D_aggregates(dataSeries, start_Point, end_Point, labels=[label], operations=[(label, cls)])[1][label][cls.__name__]
+
     @staticmethod
     def compute_on_Slots(dataSeries, start_Point, end_Point):
         raise NotImplementedError()
 
+    @classmethod
+    def merge_on_Slots(cls, dataSeries, label):
+        '''Merge the states kept in the Slots (see keeps_state) for the given Slot data label, None if no Slot has it'''
+        state = None
+        for dataSlot in dataSeries:
+            Slot_states = getattr(dataSlot, 'states', None)
+            if not Slot_states or Slot_states.get(label) is None:
+                continue
+            state = cls.merge(state, Slot_states[label]) if state is not None else copy.deepcopy(Slot_states[label])
+        return state
+
+    #------------------
+    # Streaming protocol
+    #------------------
+    @staticmethod
+    def init_state():
+        '''Get a new state, made of plain types (so that it can be serialized, i.e. as JSON)'''
+        raise NotImplementedError()
+
+    @staticmethod
+    def update(state, value, weight):
+        '''Update the state with the value of a Point, weighted by the time (in seconds) the Point is representative
+        of in the slot according to its validity region (0 if outside it, None if Points have no validity region).
+        Returns the updated state.'''
+        raise NotImplementedError()
+
+    @staticmethod
+    def update_on_Point(state, t, value, half_span, start_t, end_t):
+        '''Update the state of a timed operation with a Point, given its time and the half span of its validity region
+        (None if the Point has no validity region), for the slot from start_t to end_t. Points around the slot are
+        given as well. Returns the updated state.'''
+        raise NotImplementedError()
+
+    @staticmethod
+    def merge(state, other_state):
+        '''Merge two states (i.e. of consecutive slots, or computed in parallel). Returns the merged state.'''
+        raise NotImplementedError()
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        '''Get the result of the operation from the state, for the slot from start_t to end_t (epoch seconds)'''
+        raise NotImplementedError()
+
 
 class AVG(Operation):
-    
+
+    is_stremaing = True
+
     @staticmethod
     def compute_on_Points(dataSeries, start_Point, end_Point):
-           
+
+        # Use the NumPy backend if the dataSeries is array-backed
+        result = AVG.compute_on_Points_vectorized(dataSeries, start_Point, end_Point)
+        if result is not NotImplemented:
+            return result
+
         sum = 0.0
         
         # Compute total lenght
@@ -40,18 +132,10 @@ class AVG(Operation):
             if weighted:
                 # Special case of only one point:
                 if len(dataSeries) == 1:
-                    
-                    sum = this_dataPoint.operation_value
-                    
-                    if this_dataPoint.validity_region.start < start_Point:
-                        # Weight differently
-                        pass
-                    if this_dataPoint.validity_region.end > end_Point:
-                        # Weight differently
-                        pass
-                    
-                    # Ok, break.
-                    break
+                    return compute_single_Point_avg(this_dataPoint.data.operation_value,
+                                                    this_dataPoint.validity_region.start.operation_value,
+                                                    this_dataPoint.validity_region.end.operation_value,
+                                                    start_Point.operation_value, end_Point.operation_value)
                 
                 # Special case of the first point and more than one point
                 if prev_dataPoint is None:
@@ -135,13 +219,61 @@ class AVG(Operation):
 
     @staticmethod
     def compute_on_Slots(dataSeries, start_Point, end_Point):
-        return None
+        '''Average of the Slots values, weighted by their length and coverage'''
+        sum = 0.0
+        total_weight = 0.0
+        for dataSlot in dataSeries:
+            value = dataSlot.data.operation_value
+            if value is None:
+                continue
+            coverage = dataSlot.coverage if dataSlot.coverage is not None else 1.0
+            weight = (dataSlot.end.values[0] - dataSlot.start.values[0]) * coverage
+            sum += weight * value
+            total_weight += weight
+        if not total_weight:
+            return None
+        return sum/total_weight
+
+    @staticmethod
+    def init_state():
+        # Weighted sum, sum, count and if weighted
+        return [0.0, 0.0, 0, True]
+
+    @staticmethod
+    def update(state, value, weight):
+        if weight is None:
+            state[3] = False
+        else:
+            state[0] += weight * value
+        state[1] += value
+        state[2] += 1
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return [state[0] + other_state[0], state[1] + other_state[1], state[2] + other_state[2], state[3] and other_state[3]]
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        if not state[2]:
+            return None
+        if state[3]:
+            return state[0] / (end_t - start_t)
+        return state[1] / state[2]
 
 
 class MIN(Operation):
 
+    is_stremaing = True
+
     @staticmethod
     def compute_on_Points(dataSeries, start_Point, end_Point):
+
+        # Use the NumPy backend if the dataSeries is array-backed
+        result = MIN.compute_on_Points_vectorized(dataSeries, start_Point, end_Point)
+        if result is not NotImplemented:
+            return result
+
         min = None
         for dataTimePoint in dataSeries:
             if min is None:
@@ -154,13 +286,45 @@ class MIN(Operation):
 
     @staticmethod
     def compute_on_Slots(dataSeries, start_Point, end_Point):
-        return None
+        '''Min of the Slots (min) values'''
+        min = None
+        for dataSlot in dataSeries:
+            value = dataSlot.data.operation_value
+            if value is not None and (min is None or value < min):
+                min = value
+        return min
+
+    @staticmethod
+    def init_state():
+        return [None]
+
+    @staticmethod
+    def update(state, value, weight):
+        if value is not None and (state[0] is None or value < state[0]):
+            state[0] = value
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return MIN.update(list(state), other_state[0], None)
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        return state[0]
 
 
 class MAX(Operation):
-    
+
+    is_stremaing = True
+
     @staticmethod
     def compute_on_Points(dataSeries, start_Point, end_Point):
+
+        # Use the NumPy backend if the dataSeries is array-backed
+        result = MAX.compute_on_Points_vectorized(dataSeries, start_Point, end_Point)
+        if result is not NotImplemented:
+            return result
+
         max = None
         for item in dataSeries:
             if max is None:
@@ -173,15 +337,410 @@ class MAX(Operation):
 
     @staticmethod
     def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''Max of the Slots (max) values'''
+        max = None
+        for dataSlot in dataSeries:
+            value = dataSlot.data.operation_value
+            if value is not None and (max is None or value > max):
+                max = value
+        return max
+
+    @staticmethod
+    def init_state():
+        return [None]
+
+    @staticmethod
+    def update(state, value, weight):
+        if value is not None and (state[0] is None or value > state[0]):
+            state[0] = value
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return MAX.update(list(state), other_state[0], None)
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        return state[0]
+
+
+class TOT(Operation):
+    '''Total (i.e. of an energy). On Points it has to be provided by a generator (see energy_kWh_TOT)'''
+
+    @staticmethod
+    def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''Sum of the Slots (total) values'''
+        tot = None
+        for dataSlot in dataSeries:
+            value = dataSlot.data.operation_value
+            if value is not None:
+                tot = value if tot is None else tot + value
+        return tot
+
+
+class SUM(Operation):
+    '''Sum of the values of the Points in the slot (the ones with their time in it, not weighted)'''
+
+    is_stremaing = True
+    in_slot_only = True
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''Sum of the Slots (sum) values'''
+        return TOT.compute_on_Slots(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def init_state():
+        return [None]
+
+    @staticmethod
+    def update(state, value, weight):
+        state[0] = value if state[0] is None else state[0] + value
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return [other_state[0] if state[0] is None else state[0] if other_state[0] is None else state[0] + other_state[0]]
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        return state[0]
+
+
+class COUNT(Operation):
+    '''Number of the Points in the slot (the ones with their time in it)'''
+
+    is_stremaing = True
+    in_slot_only = True
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''Sum of the Slots (count) values'''
+        return TOT.compute_on_Slots(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def init_state():
+        return [0]
+
+    @staticmethod
+    def update(state, value, weight):
+        state[0] += 1
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return [state[0] + other_state[0]]
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        return state[0]
+
+
+class FIRST(Operation):
+    '''Value of the first Point in the slot (with its time in it)'''
+
+    is_stremaing = True
+    in_slot_only = True
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''First of the Slots (first) values'''
+        for dataSlot in dataSeries:
+            if dataSlot.data.operation_value is not None:
+                return dataSlot.data.operation_value
         return None
 
+    @staticmethod
+    def init_state():
+        return [None]
+
+    @staticmethod
+    def update(state, value, weight):
+        if state[0] is None:
+            state[0] = value
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return list(state) if state[0] is not None else list(other_state)
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        return state[0]
+
+
+class LAST(Operation):
+    '''Value of the last Point in the slot (with its time in it)'''
+
+    is_stremaing = True
+    in_slot_only = True
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''Last of the Slots (last) values'''
+        last = None
+        for dataSlot in dataSeries:
+            if dataSlot.data.operation_value is not None:
+                last = dataSlot.data.operation_value
+        return last
+
+    @staticmethod
+    def init_state():
+        return [None]
+
+    @staticmethod
+    def update(state, value, weight):
+        state[0] = value
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return list(other_state) if other_state[0] is not None else list(state)
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        return state[0]
+
+
+class VAR(Operation):
+    '''Variance of the values, weighted by the time the Points are representative of in the slot as for the AVG
+    (or not weighted if the Points have no validity region). The state is made of the (mergeable) moments: the total
+    weight, the mean and the sum of the squared differences from it (Welford's algorithm, merged with Chan's one)
+    and it is kept in the Slots, so that they can be aggregated without loss.'''
+
+    is_stremaing = True
+    keeps_state  = True
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @classmethod
+    def compute_on_Slots(cls, dataSeries, start_Point, end_Point):
+        '''Variance from the merged Slots moments'''
+        state = cls.merge_on_Slots(dataSeries, get_operation_label(dataSeries))
+        return cls.finalize(state, start_Point.values[0], end_Point.values[0]) if state is not None else None
+
+    @staticmethod
+    def init_state():
+        # Total weight, mean and sum of the squared differences
+        return [0.0, 0.0, 0.0]
+
+    @staticmethod
+    def update(state, value, weight):
+        weight = 1.0 if weight is None else weight
+        if not weight:
+            return state
+        state[0] += weight
+        delta = value - state[1]
+        state[1] += delta * weight / state[0]
+        state[2] += weight * delta * (value - state[1])
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        total_weight = state[0] + other_state[0]
+        if not total_weight:
+            return [0.0, 0.0, 0.0]
+        delta = other_state[1] - state[1]
+        return [total_weight,
+                state[1] + delta * other_state[0] / total_weight,
+                state[2] + other_state[2] + delta * delta * state[0] * other_state[0] / total_weight]
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        if not state[0]:
+            return None
+        return max(state[2] / state[0], 0.0)
+
+
+class STD(VAR):
+    '''Standard deviation of the values, as the square root of the VAR'''
+
+    @staticmethod
+    def finalize(state, start_t, end_t):
+        variance = VAR.finalize(state, start_t, end_t)
+        return math.sqrt(variance) if variance is not None else None
+
+
+class TimeIntegral(Operation):
+    '''Base class for the integration over time of a rate-like quantity (i.e. a power) over the slot, scaled by the factor
+    (i.e. 1/3600000 to get kWh from W). Time integrals are streaming operations, used by the TimeIntegralGenerator
+    (see energy_kWh_TOT) and aggregated on Slots by summing their totals, as TOT.'''
+
+    is_stremaing = True
+    factor       = 1.0
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @staticmethod
+    def compute_on_Slots(dataSeries, start_Point, end_Point):
+        '''Sum of the Slots (total) values'''
+        return TOT.compute_on_Slots(dataSeries, start_Point, end_Point)
+
+
+class StepTimeIntegral(TimeIntegral):
+    '''Step (rectangle) integration: every Point value is held for the time it is representative of in the slot,
+    as in the AVG (which is the integral divided by the slot length). Points have to have a validity region.'''
+
+    @staticmethod
+    def init_state():
+        # Total and if weighted
+        return [0.0, True]
+
+    @staticmethod
+    def update(state, value, weight):
+        if weight is None:
+            state[1] = False
+        else:
+            state[0] += weight * value
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return [state[0] + other_state[0], state[1] and other_state[1]]
+
+    @classmethod
+    def finalize(cls, state, start_t, end_t):
+        return state[0] * cls.factor if state[1] else None
 
 
+class TrapezoidalTimeIntegral(TimeIntegral):
+    '''Trapezoidal integration: values are linearly interpolated between consecutive Points, if their validity
+    regions are contiguous (or if Points have no validity region). Across a gap every Point value is held for the
+    half of its validity region, as in the step integration, so that the gaps are not integrated.'''
 
+    is_timed = True
 
+    @staticmethod
+    def init_state():
+        # Total, and time, value and validity region half span of the last Point
+        return [0.0, None, None, None]
+
+    @staticmethod
+    def update_on_Point(state, t, value, half_span, start_t, end_t):
+        total, prev_t, prev_value, prev_half_span = state
+        if prev_t is None:
+            # First Point: hold its value for the first half of its validity region
+            if half_span:
+                total += value * max(min(t, end_t) - max(t - half_span, start_t), 0)
+        elif half_span is None or t - half_span <= prev_t + prev_half_span:
+            # Contiguous: linear interpolation between the two Points, limited to the slot
+            from_t  = max(prev_t, start_t)
+            until_t = min(t, end_t)
+            if until_t > from_t:
+                slope = (value - prev_value) / float(t - prev_t)
+                total += (prev_value + slope * (from_t - prev_t) + prev_value + slope * (until_t - prev_t)) / 2.0 * (until_t - from_t)
+        else:
+            # Gap: hold the values for the halves of the validity regions around it
+            total += prev_value * max(min(prev_t + prev_half_span, end_t) - max(prev_t, start_t), 0)
+            total += value * max(min(t, end_t) - max(t - half_span, start_t), 0)
+        state[0] = total
+        state[1] = t
+        state[2] = value
+        state[3] = half_span if half_span is not None else 0
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        # Totals of consecutive slots, keeping the last Point
+        if other_state[1] is None:
+            return list(state)
+        return [state[0] + other_state[0]] + list(other_state[1:])
+
+    @classmethod
+    def finalize(cls, state, start_t, end_t):
+        total, prev_t, prev_value, prev_half_span = state
+        if prev_t is None:
+            return None
+        # Last Point: hold its value for the second half of its validity region
+        total += prev_value * max(min(prev_t + prev_half_span, end_t) - max(prev_t, start_t), 0)
+        return total * cls.factor
+
+
+class Quantile(Operation):
+    '''Base class for the quantile operations (i.e. P95, the 95th percentile), estimated by a mergeable QuantileSketch
+    within its relative accuracy. Points are weighted by the time they are representative of in the slot (if they have
+    a validity region). The sketches are kept in the Slots states, so that Slots can be aggregated by merging them.'''
+
+    is_stremaing = True
+    keeps_state  = True
+    quantile     = None
+
+    @classmethod
+    def compute_on_Points(cls, dataSeries, start_Point, end_Point):
+        return cls.compute_on_Points_streaming(dataSeries, start_Point, end_Point)
+
+    @classmethod
+    def compute_on_Slots(cls, dataSeries, start_Point, end_Point):
+        '''Quantile of the merged Slots sketches'''
+        state = cls.merge_on_Slots(dataSeries, get_operation_label(dataSeries))
+        return cls.finalize(state, start_Point.values[0], end_Point.values[0]) if state is not None else None
+
+    @staticmethod
+    def init_state():
+        return QuantileSketch().state
+
+    @staticmethod
+    def update(state, value, weight):
+        QuantileSketch(state).add(value, 1.0 if weight is None else weight)
+        return state
+
+    @staticmethod
+    def merge(state, other_state):
+        return QuantileSketch(copy.deepcopy(state)).merge(other_state).state
+
+    @classmethod
+    def finalize(cls, state, start_t, end_t):
+        return QuantileSketch(state).quantile(cls.quantile)
 
 
+class P50(Quantile):
+    quantile = 0.5
 
 
+class P90(Quantile):
+    quantile = 0.9
 
 
+class P95(Quantile):
+    quantile = 0.95
+
+
+class P99(Quantile):
+    quantile = 0.99
+
+
+# Cache of the quantile operations by name, for the ones not defined above
+_quantile_Operations = {}
+
+def get_quantile_Operation(op):
+    '''Get the quantile Operation for an operation name as "P<percentile>" (i.e. P75 for the 75th percentile),
+    creating it if not already defined. Returns None if the name is not a quantile one.'''
+    match = re.match(r'^P(\d{1,2})$', op or '')
+    if not match:
+        return None
+    try:
+        return _quantile_Operations[op]
+    except KeyError:
+        quantile = int(match.group(1)) / 100.0
+        _quantile_Operations[op] = type(str(op), (Quantile,), {'quantile': quantile})
+        return _quantile_Operations[op]
@@ -0,0 +1,143 @@
+import math
+from luna.common.exceptions import InputException
+
+#--------------------------
+#    Logger
+#--------------------------
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+#-------------------------------------
+# Quantile sketch
+#-------------------------------------
+
+class QuantileSketch(object):
+    '''A mergeable sketch to estimate quantiles with a bounded relative error, in bounded memory (DDSketch style).
+    Values are counted (with a weight) in buckets of logarithmically increasing size, so that any quantile is
+    estimated within relative_accuracy of the real value. At most max_buckets buckets are kept for the positive
+    and the negative values: if exceeded, the lowest ones (the closest to zero) are collapsed together, losing
+    accuracy only there. Sketches with the same relative_accuracy can be merged without any loss. The sketch
+    works on its state, which is made of plain types (and can be serialized, i.e. as JSON).'''
+
+    # Values (in absolute value) below this one are counted as zeros
+    min_value = 1e-12
+
+    def __init__(self, state=None, relative_accuracy=0.01, max_buckets=2048):
+        if state is None:
+            if not 0 < relative_accuracy < 1:
+                raise InputException('The relative accuracy has to be between 0 and 1 (got {})'.format(relative_accuracy))
+            if max_buckets < 1:
+                raise InputException('The max buckets has to be a positive integer (got {})'.format(max_buckets))
+            state = {'relative_accuracy': relative_accuracy,
+                     'max_buckets':       max_buckets,
+                     'positive':          [0, []],
+                     'negative':          [0, []],
+                     'zero':              0.0,
+                     'count':             0.0,
+                     'min':               None,
+                     'max':               None}
+        self.state = state
+        self._gamma = (1 + state['relative_accuracy']) / (1 - state['relative_accuracy'])
+        self._log_gamma = math.log(self._gamma)
+
+    @property
+    def count(self):
+        return self.state['count']
+
+    def _key(self, value):
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def _value(self, key):
+        return 2.0 * (self._gamma ** key) / (self._gamma + 1)
+
+    def _add_to_store(self, store, key, weight):
+        offset, buckets = store
+        max_buckets = self.state['max_buckets']
+        if not buckets:
+            store[0] = key
+            buckets.append(weight)
+            return
+        if key < offset:
+            # Below the lowest bucket, and if they were too many in the collapsed one
+            key = max(key, offset + len(buckets) - max_buckets)
+            if key < offset:
+                buckets[0:0] = [0.0] * (offset - key)
+                store[0] = offset = key
+        elif key >= offset + len(buckets):
+            buckets.extend([0.0] * (key - offset - len(buckets) + 1))
+            # Collapse the lowest buckets if too many
+            if len(buckets) > max_buckets:
+                excess = len(buckets) - max_buckets
+                buckets[excess] += sum(buckets[:excess])
+                del buckets[:excess]
+                store[0] = offset = offset + excess
+        buckets[key - offset] += weight
+
+    def add(self, value, weight=1.0):
+        '''Add a value, with a weight (i.e. the time it lasted)'''
+        if value is None or not weight:
+            return self
+        state = self.state
+        if value > self.min_value:
+            self._add_to_store(state['positive'], self._key(value), weight)
+        elif value < -self.min_value:
+            self._add_to_store(state['negative'], self._key(-value), weight)
+        else:
+            state['zero'] += weight
+        state['count'] += weight
+        if state['min'] is None or value < state['min']:
+            state['min'] = value
+        if state['max'] is None or value > state['max']:
+            state['max'] = value
+        return self
+
+    def merge(self, other):
+        '''Merge another sketch (or its state) in this one'''
+        other_state = other.state if isinstance(other, QuantileSketch) else other
+        state = self.state
+        if other_state['relative_accuracy'] != state['relative_accuracy']:
+            raise InputException('Cannot merge sketches with different relative accuracies ({} and {})'.format(state['relative_accuracy'], other_state['relative_accuracy']))
+        for sign in ['positive', 'negative']:
+            offset, buckets = other_state[sign]
+            for i, weight in enumerate(buckets):
+                if weight:
+                    self._add_to_store(state[sign], offset + i, weight)
+        state['zero']  += other_state['zero']
+        state['count'] += other_state['count']
+        for key, function in [('min', min), ('max', max)]:
+            if other_state[key] is not None:
+                state[key] = other_state[key] if state[key] is None else function(state[key], other_state[key])
+        return self
+
+    def quantile(self, q):
+        '''Estimate the q quantile (i.e. 0.95 for the 95th percentile), None if the sketch is empty'''
+        if not 0 <= q <= 1:
+            raise InputException('The quantile has to be between 0 and 1 (got {})'.format(q))
+        state = self.state
+        if not state['count']:
+            return None
+        # The extremes are known exactly
+        if q == 0:
+            return state['min']
+        if q == 1:
+            return state['max']
+        rank = q * state['count']
+
+        # From the lowest values: the negative ones (highest keys first), zeros and then the positive ones
+        cumulative = 0.0
+        offset, buckets = state['negative']
+        for i in range(len(buckets)-1, -1, -1):
+            cumulative += buckets[i]
+            if buckets[i] and cumulative >= rank:
+                return max(-self._value(offset + i), state['min'])
+        cumulative += state['zero']
+        if state['zero'] and cumulative >= rank:
+            return 0.0
+        offset, buckets = state['positive']
+        for i, weight in enumerate(buckets):
+            cumulative += weight
+            if weight and cumulative >= rank:
+                return min(max(self._value(offset + i), state['min']), state['max'])
+        return state['max']
@@ -1,14 +1,18 @@
 import unittest
 from luna.datatypes.dimensional import DataTimeSeries, DataTimePoint, PhysicalDataTimePoint, PhysicalDataTimeSlot, StreamingDataTimeSeries
 from luna.datatypes.dimensional import *
-from luna.common.exceptions import InputException, StorageException
-from luna.spacetime.time import dt, TimeSlotSpan
+from luna.common.exceptions import InputException, StorageException, ConfigurationException
+from luna.spacetime.time import dt, TimeSlotSpan, s_from_dt
 from luna.datatypes.dimensional import TimePoint, Point, PhysicalData
 from luna.sensors import PhysicalDataTimeSensor
 from luna.storages.sqlite import sensor_storage as sqlite
-from luna.aggregators.generators import PhysicalQuantityGenerator
-from luna.aggregators.components import DataTimeSeriesAggregatorProcess
+from luna.aggregators.generators import PhysicalQuantityGenerator, TimeIntegralGenerator
+from luna.aggregators.operations import Operation
+from luna.aggregators.components import DataTimeSeriesAggregatorProcess, DataTimeSeriesOnlineAggregatorProcess, DataTimeSeriesBufferedAggregatorProcess, DataTimeSeriesMultiAggregatorProcess, DataTimeSeriesWindow, DataTimeSlotsAggregator, get_aggregation_plan
+from luna.aggregators import vectorized
 import os
+import json
+from unittest import mock
 
 
 #------------------------------------
@@ -271,3 +275,658 @@ class test_aggregators(unittest.TestCase):
 
 
 
+
+    def test_Slots_Aggregation(self):
+
+        sensor = SimpleSensor('084EB18E44FFA/7-MB-1')
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,11,0,0, tzinfo=sensor.timezone)
+
+        # Points every minute, with no data from 10:20 to 10:27
+        dataTimeSeries = DataTimeSeries()
+        for i in range(-2, 62):
+            if 20 <= i < 27:
+                continue
+            data = PhysicalData( labels = ['temp_C'], values = [20.0 + (i*7)%11] )
+            dataTimeSeries.append(PhysicalDataTimePoint(t    = 1458896400 + i*60,
+                                                        tz   = sensor.timezone,
+                                                        data = data,
+                                                        validity_region = sensor.Points_validity_region))
+
+        # Aggregate in 5m slots and store them
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('5m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=from_dt, end_dt=to_dt)
+        dataTimeSeriesSQLiteStorage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=True)
+        dataTimeSeriesSQLiteStorage.put(dataTimeSeriesAggregatorProcess.get_results(), sensor=sensor, can_initialize=True)
+
+        # Aggregate the stored 5m slots in 15m slots
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimeSlot)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries = dataTimeSeriesSQLiteStorage.get(sensor=sensor, timeSlotSpan=TimeSlotSpan('5m')),
+                                              start_dt       = from_dt,
+                                              end_dt         = to_dt)
+        slots = list(dataTimeSeriesAggregatorProcess.get_results())
+
+        # Same results as aggregating the points, where the data is complete
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=from_dt, end_dt=to_dt)
+        reference_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+
+        self.assertEqual(len(slots), 4)
+        for i in [0, 2, 3]:
+            self.assertEqual(str(slots[i]), str(reference_slots[i]))
+            self.assertEqual(slots[i].coverage, 1.0)
+            for label in sensor.Slots_data_labels:
+                self.assertAlmostEqual(slots[i].data.content[label], reference_slots[i].data.content[label])
+
+        # Where the data is missing, only the 10:15-10:20 slot has data
+        self.assertEqual(str(slots[1]), '''PhysicalDataTimeSlot: from 2016-03-25 10:15:00+01:00 to 2016-03-25 10:30:00+01:00 with span of 15m''')
+        self.assertAlmostEqual(slots[1].coverage, 0.3)
+        self.assertEqual(slots[1].data.content, {'temp_C_AVG': 22.0, 'temp_C_MIN': 21.0, 'temp_C_MAX': 29.0})
+
+
+
+class test_aggregation_plan(unittest.TestCase):
+
+    def test_plan(self):
+
+        # The plan is compiled once per Sensor class
+        plan = get_aggregation_plan(EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1'))
+        self.assertTrue(plan is get_aggregation_plan(EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-2')))
+        self.assertTrue(plan is get_aggregation_plan(EnergyElectricExtendedTriphase))
+        self.assertTrue(plan is DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                Sensor            = EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1'),
+                                                                data_to_aggregate = PhysicalDataTimePoint).aggregation_plan)
+
+        # Operations first, then generators
+        self.assertEqual(len(plan.steps), len(EnergyElectricExtendedTriphase.Slots_data_labels))
+        self.assertEqual(plan.steps[0].label, 'power-l1_W_AVG')
+        self.assertEqual(plan.steps[0].operate_on, 'power-l1_W')
+        self.assertEqual(plan.steps[0].operate_on_index, 0)
+        self.assertTrue(plan.steps[0].fused)
+        self.assertEqual(plan.steps[-1].label, 'rpower_VAr_MAX')
+        self.assertEqual(plan.steps[-1].Generator, EnergyElectricExtendedTriphase.rpower_VAr_MAX)
+        self.assertEqual(plan.Points_data_labels_to_aggregate, tuple(EnergyElectricExtendedTriphase.Points_data_labels))
+
+        # The plan is immutable
+        with self.assertRaises(AttributeError):
+            plan.steps = ()
+
+        # Configuration errors are raised when compiling it
+        class WrongSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'pressure_Pa_AVG']
+        with self.assertRaises(ConfigurationException):
+            DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                            Sensor            = WrongSensor('084EB18E44FFA/7-MB-1'),
+                                            data_to_aggregate = PhysicalDataTimePoint)
+
+    def test_plan_dependencies(self):
+
+        calls = []
+
+        class DependenciesSensor(SimpleSensor):
+            Points_data_labels = ['temp_C', 'humidity_percent']
+            Slots_data_labels = ['heatindex_C_AVG', 'temp_F_AVG', 'temp_K_AVG', 'humidity_percent_MAX']
+
+            # Listed before the (intermediate) generator it depends on
+            class heatindex_C_AVG(PhysicalQuantityGenerator):
+                depends = ['temp_K_AVG', 'humidity_percent_AVG']
+                @staticmethod
+                def generate(dataSeries, aggregated_data, start_Point, end_Point):
+                    return aggregated_data.content['temp_K_AVG'] - 273.15 + aggregated_data.content['humidity_percent_AVG'] / 100.0
+
+            # Found by what it provides, depending on a Slot data label which is not in the Slots (an intermediate one)
+            class Fahrenheit(PhysicalQuantityGenerator):
+                depends  = ['temp_C_AVG']
+                provides = ['temp_F_AVG']
+                @staticmethod
+                def generate(dataSeries, aggregated_data, start_Point, end_Point):
+                    return aggregated_data.content['temp_C_AVG'] * 9 / 5.0 + 32
+
+            class temp_K_AVG(PhysicalQuantityGenerator):
+                depends = ['temp_C_AVG']
+                @staticmethod
+                def generate(dataSeries, aggregated_data, start_Point, end_Point):
+                    calls.append(start_Point.t)
+                    return aggregated_data.content['temp_C_AVG'] + 273.15
+
+        sensor = DependenciesSensor('084EB18E44FFA/7-MB-1')
+        plan = get_aggregation_plan(sensor)
+        self.assertEqual([(step.label, step.intermediate) for step in plan.steps], [('temp_C_AVG', True), ('humidity_percent_AVG', True), ('humidity_percent_MAX', False),
+                                                                                    ('temp_K_AVG', False), ('heatindex_C_AVG', False), ('temp_F_AVG', False)])
+        self.assertEqual(plan.steps[-1].Generator, DependenciesSensor.Fahrenheit)
+        self.assertEqual(plan.Points_data_labels_to_aggregate, ('temp_C', 'humidity_percent'))
+
+        # Intermediate data labels are computed (once) but not in the Slots
+        dataTimeSeries = DataTimeSeries()
+        for i in range(20):
+            dataTimeSeries.append(PhysicalDataTimePoint(t=1458896400+i*60, tz=sensor.timezone, data=PhysicalData(labels=['temp_C', 'humidity_percent'], values=[20.0, 50.0]), validity_region=sensor.Points_validity_region))
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries = dataTimeSeries,
+                                              start_dt       = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone),
+                                              end_dt         = dt(2016,3,25,10,15,0, tzinfo=sensor.timezone))
+        dataTimeSlot = list(dataTimeSeriesAggregatorProcess.get_results())[0]
+        self.assertEqual(dataTimeSlot.data.labels, sensor.Slots_data_labels)
+        for label, value in [('heatindex_C_AVG', 20.5), ('temp_F_AVG', 68.0), ('temp_K_AVG', 293.15), ('humidity_percent_MAX', 50.0)]:
+            self.assertAlmostEqual(dataTimeSlot.data.content[label], value)
+        self.assertEqual(len(calls), 1)
+
+        # Cycles and missing dependencies are detected when compiling the plan
+        class CycleSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'temp_F_AVG', 'temp_K_AVG']
+            class temp_F_AVG(PhysicalQuantityGenerator):
+                depends = ['temp_K_AVG']
+            class temp_K_AVG(PhysicalQuantityGenerator):
+                depends = ['temp_F_AVG']
+        with self.assertRaises(ConfigurationException):
+            get_aggregation_plan(CycleSensor)
+
+        class MissingSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'temp_F_AVG']
+            class temp_F_AVG(PhysicalQuantityGenerator):
+                depends = ['temp_R_AVG']
+        with self.assertRaises(ConfigurationException):
+            get_aggregation_plan(MissingSensor)
+
+
+class test_window(unittest.TestCase):
+
+    def test_Window(self):
+
+        dataTimeSeries = DataTimeSeries()
+        for i in range(10):
+            dataTimeSeries.append(PhysicalDataTimePoint(t=1458896400+i*60, tz='Europe/Rome', data=PhysicalData(labels=['temp_C'], values=[20.0+i])))
+
+        # Zero-copy over in-memory DataTimeSeries (also filtered ones), backed by a list otherwise
+        filtered_dataTimeSeries = dataTimeSeries.filter(from_dt=dt(2016,3,25,10,2,0, tzinfo='Europe/Rome'))
+        dataTimeSeriesSQLiteStorage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=False, db_file=datasets_path + 'dataset1.sqlite')
+        for source, zero_copy in [(dataTimeSeries, True), (filtered_dataTimeSeries, True),
+                                  (dataTimeSeriesSQLiteStorage.get(sensor=EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1')), False)]:
+            window = DataTimeSeriesWindow.over(source)
+            self.assertEqual(window._view is not None, zero_copy)
+            items = list(source) if zero_copy else list(filtered_dataTimeSeries)
+            window.restart(1)
+            for position in range(1, 4):
+                window.add(items[position], position)
+            self.assertEqual(list(window), items[1:4])
+            self.assertEqual([item.data.operation_value for item in window.lazy_filter_data_label('temp_C')], [item.data.content['temp_C'] for item in items[1:4]])
+            window.restart(3)
+            self.assertTrue(window.is_empty())
+            window.add(items[3], 3)
+            self.assertEqual(list(window), [items[3]])
+
+        # The source is not modified
+        self.assertEqual(len(dataTimeSeries), 10)
+
+
+class test_partitioned_aggregation(unittest.TestCase):
+
+    def test_Partitioned_Aggregation(self):
+
+        sensor = EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1')
+        from_dt = dt(2016,3,25,9,45,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,45,0, tzinfo=sensor.timezone)
+        dataTimeSeriesSQLiteStorage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=False, db_file=datasets_path + 'dataset1.sqlite')
+
+        # Serial
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('5m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeriesSQLiteStorage.get(sensor=sensor), start_dt=from_dt, end_dt=to_dt)
+        serial_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+        self.assertEqual(len(serial_slots), 9)
+
+        # Partitioned, in this process and in parallel
+        for partitions, max_workers in [(1,0), (3,0), (5,0), (4,2)]:
+            dataTimeSeriesAggregatorProcess.start_partitioned(dataTimeSeries = dataTimeSeriesSQLiteStorage.get(sensor=sensor),
+                                                              start_dt       = from_dt,
+                                                              end_dt         = to_dt,
+                                                              partitions     = partitions,
+                                                              max_workers    = max_workers)
+            partitioned_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+            self.assertEqual(len(partitioned_slots), len(serial_slots))
+            for partitioned_slot, serial_slot in zip(partitioned_slots, serial_slots):
+                self.assertEqual(partitioned_slot.start.t, serial_slot.start.t)
+                self.assertEqual(partitioned_slot.coverage, serial_slot.coverage)
+                self.assertEqual(partitioned_slot.data.content, serial_slot.data.content)
+
+        # Partitions are aligned with the timeSlotSpan
+        self.assertEqual([str(boundary_dt) for boundary_dt in dataTimeSeriesAggregatorProcess.get_partitions(from_dt, to_dt, 5)],
+                         ['2016-03-25 09:45:00+01:00', '2016-03-25 09:55:00+01:00', '2016-03-25 10:05:00+01:00', '2016-03-25 10:20:00+01:00',
+                          '2016-03-25 10:30:00+01:00', '2016-03-25 10:45:00+01:00'])
+
+
+class test_online_aggregation(unittest.TestCase):
+
+    def test_Online_Aggregation(self):
+
+        sensor = EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1')
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)
+        dataTimeSeriesSQLiteStorage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=False, db_file=datasets_path + 'dataset1.sqlite')
+
+        # Serial
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('5m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeriesSQLiteStorage.get(sensor=sensor), start_dt=from_dt, end_dt=to_dt)
+        serial_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+        self.assertEqual(len(serial_slots), 6)
+
+        # Online, pushing one point at a time and restarting from a checkpoint in the middle
+        dataTimeSeriesOnlineAggregatorProcess = DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan = TimeSlotSpan('5m'),
+                                                                                      Sensor       = sensor,
+                                                                                      start_dt     = from_dt)
+        online_slots = []
+        for i, dataTimePoint in enumerate(dataTimeSeriesSQLiteStorage.get(sensor=sensor)):
+            if i == 200:
+                state = json.loads(json.dumps(dataTimeSeriesOnlineAggregatorProcess.get_state()))
+                dataTimeSeriesOnlineAggregatorProcess = DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan = TimeSlotSpan('5m'),
+                                                                                              Sensor       = sensor)
+                dataTimeSeriesOnlineAggregatorProcess.set_state(state)
+            online_slots += dataTimeSeriesOnlineAggregatorProcess.push(dataTimePoint)
+
+            # Slots are returned as soon as closed
+            if online_slots:
+                self.assertTrue(online_slots[-1].end.t < dataTimePoint.t)
+
+            # Points have to be pushed in order
+            with self.assertRaises(InputException):
+                dataTimeSeriesOnlineAggregatorProcess.push(dataTimePoint)
+
+        self.assertEqual(len(online_slots), len(serial_slots))
+        for online_slot, serial_slot in zip(online_slots, serial_slots):
+            self.assertEqual(str(online_slot), str(serial_slot))
+            self.assertEqual(online_slot.coverage, serial_slot.coverage)
+            self.assertEqual(online_slot.data.content, serial_slot.data.content)
+
+        # Operations not computed in the single pass are not supported
+        class TotalSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'temp_C_TOT']
+        with self.assertRaises(ConfigurationException):
+            DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan=TimeSlotSpan('5m'), Sensor=TotalSensor('084EB18E44FFA/7-MB-1'))
+
+    def test_Streaming_Aggregation(self):
+
+        # A custom streaming operation, defined in the sensor
+        class RangeSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'temp_C_MIN', 'temp_C_MAX', 'temp_C_RNG']
+            class RNG(Operation):
+                is_stremaing = True
+                @staticmethod
+                def init_state():
+                    return [None, None]
+                @staticmethod
+                def update(state, value, weight):
+                    return [value if state[0] is None else min(state[0], value), value if state[1] is None else max(state[1], value)]
+                @staticmethod
+                def merge(state, other_state):
+                    return [min(state[0], other_state[0]), max(state[1], other_state[1])]
+                @staticmethod
+                def finalize(state, start_t, end_t):
+                    return state[1] - state[0] if state[0] is not None else None
+
+        sensor = RangeSensor('084EB18E44FFA/7-MB-1')
+        plan = get_aggregation_plan(sensor)
+        self.assertEqual(plan.streaming_operations, (('temp_C', RangeSensor.RNG),))
+        self.assertTrue(plan.steps[0].streaming and plan.steps[0].fused)
+
+        dataTimeSeries = DataTimeSeries()
+        for i in range(40):
+            dataTimeSeries.append(PhysicalDataTimePoint(t=1458896400+i*60, tz=sensor.timezone, data=PhysicalData(labels=['temp_C'], values=[20.0+(i*7)%11]), validity_region=sensor.Points_validity_region))
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)
+
+        # Serial
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('10m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=from_dt, end_dt=to_dt)
+        serial_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+        self.assertEqual(len(serial_slots), 3)
+        for dataTimeSlot in serial_slots:
+            self.assertEqual(dataTimeSlot.data.content['temp_C_RNG'], dataTimeSlot.data.content['temp_C_MAX'] - dataTimeSlot.data.content['temp_C_MIN'])
+
+        # Online, with the streaming states in the checkpoint
+        dataTimeSeriesOnlineAggregatorProcess = DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan=TimeSlotSpan('10m'), Sensor=sensor, start_dt=from_dt)
+        online_slots = dataTimeSeriesOnlineAggregatorProcess.push(list(dataTimeSeries)[0:15])
+        state = json.loads(json.dumps(dataTimeSeriesOnlineAggregatorProcess.get_state()))
+        dataTimeSeriesOnlineAggregatorProcess = DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan=TimeSlotSpan('10m'), Sensor=sensor)
+        dataTimeSeriesOnlineAggregatorProcess.set_state(state)
+        online_slots += dataTimeSeriesOnlineAggregatorProcess.push(list(dataTimeSeries)[15:])
+        for online_slot, serial_slot in zip(online_slots[0:3], serial_slots):
+            self.assertEqual(online_slot.data.content, serial_slot.data.content)
+
+    @unittest.skipIf(vectorized.numpy is None, 'NumPy not available')
+    def test_Vectorized_Aggregation(self):
+
+        # On a ColumnarDataTimeSeries the slots are aggregated with the NumPy backend, with the same results
+        sensor = SimpleSensor('084EB18E44FFA/7-MB-1')
+        dataTimeSeries = DataTimeSeries()
+        columnarDataTimeSeries = ColumnarDataTimeSeries()
+        for i in range(-3, 40):
+            dataTimePoint = PhysicalDataTimePoint(t=1458896400+i*60+(i%3), tz=sensor.timezone, data=PhysicalData(labels=['temp_C'], values=[20.0+(i*7)%11]), validity_region=sensor.Points_validity_region)
+            dataTimeSeries.append(dataTimePoint)
+            columnarDataTimeSeries.append(dataTimePoint)
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)
+
+        results = []
+        for series in [dataTimeSeries, columnarDataTimeSeries]:
+            dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('10m'),
+                                                                              Sensor            = sensor,
+                                                                              data_to_aggregate = PhysicalDataTimePoint)
+            with mock.patch('luna.aggregators.vectorized.compute_1D_aggregates_on_arrays', wraps=vectorized.compute_1D_aggregates_on_arrays) as kernel:
+                dataTimeSeriesAggregatorProcess.start(dataTimeSeries=series, start_dt=from_dt, end_dt=to_dt)
+            self.assertEqual(kernel.call_count, 0 if series is dataTimeSeries else 3)
+            results.append(list(dataTimeSeriesAggregatorProcess.get_results()))
+
+        self.assertEqual(len(results[0]), 3)
+        for dataTimeSlot, vectorized_dataTimeSlot in zip(*results):
+            self.assertEqual(str(dataTimeSlot), str(vectorized_dataTimeSlot))
+            self.assertAlmostEqual(dataTimeSlot.coverage, vectorized_dataTimeSlot.coverage)
+            for label in sensor.Slots_data_labels:
+                self.assertAlmostEqual(dataTimeSlot.data.content[label], vectorized_dataTimeSlot.data.content[label])
+
+    def test_Sum_Count_Aggregation(self):
+
+        # Sum and count are on the points in the slot only, also if the ones around it are there
+        class SumCountSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'temp_C_SUM', 'temp_C_COUNT']
+
+        sensor = SumCountSensor('084EB18E44FFA/7-MB-1')
+        dataTimeSeries = DataTimeSeries()
+        columnarDataTimeSeries = ColumnarDataTimeSeries()
+        for i in range(-5, 16):
+            dataTimePoint = PhysicalDataTimePoint(t=1458896400+i*60, tz=sensor.timezone, data=PhysicalData(labels=['temp_C'], values=[20.0+i]), validity_region=sensor.Points_validity_region)
+            dataTimeSeries.append(dataTimePoint)
+            columnarDataTimeSeries.append(dataTimePoint)
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,10,0, tzinfo=sensor.timezone)
+
+        # Serial and vectorized
+        results = []
+        for series in [dataTimeSeries, columnarDataTimeSeries]:
+            dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('10m'),
+                                                                              Sensor            = sensor,
+                                                                              data_to_aggregate = PhysicalDataTimePoint)
+            dataTimeSeriesAggregatorProcess.start(dataTimeSeries=series, start_dt=from_dt, end_dt=to_dt)
+            results.append(list(dataTimeSeriesAggregatorProcess.get_results()))
+
+        # Online
+        dataTimeSeriesOnlineAggregatorProcess = DataTimeSeriesOnlineAggregatorProcess(timeSlotSpan=TimeSlotSpan('10m'), Sensor=sensor, start_dt=from_dt)
+        results.append(dataTimeSeriesOnlineAggregatorProcess.push(dataTimeSeries))
+
+        # From 10:00 (included) to 10:10 (excluded)
+        for dataTimeSlots in results:
+            self.assertEqual(len(dataTimeSlots), 1)
+            self.assertEqual(dataTimeSlots[0].data.content['temp_C_SUM'], sum(20.0+i for i in range(10)))
+            self.assertEqual(dataTimeSlots[0].data.content['temp_C_COUNT'], 10)
+            self.assertAlmostEqual(dataTimeSlots[0].data.content['temp_C_AVG'], results[0][0].data.content['temp_C_AVG'])
+
+    def test_Quantile_Aggregation(self):
+
+        class QuantileSensor(SimpleSensor):
+            Slots_data_labels = ['temp_C_AVG', 'temp_C_P50', 'temp_C_P95', 'temp_C_P75']
+
+        sensor = QuantileSensor('084EB18E44FFA/7-MB-1')
+        dataTimeSeries = DataTimeSeries()
+        values = []
+        for i in range(61):
+            values.append(20.0+(i*7)%11)
+            dataTimeSeries.append(PhysicalDataTimePoint(t=1458896400+i*60, tz=sensor.timezone, data=PhysicalData(labels=['temp_C'], values=[values[-1]]), validity_region=sensor.Points_validity_region))
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)
+
+        # Aggregate in 10m slots and roll them up in 30m slots
+        dataTimeSeriesMultiAggregatorProcess = DataTimeSeriesMultiAggregatorProcess(timeSlotSpans     = [TimeSlotSpan('10m'), TimeSlotSpan('30m')],
+                                                                                    Sensor            = sensor,
+                                                                                    data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesMultiAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=from_dt, end_dt=to_dt)
+        slots_10m, slots_30m = [list(results) for results in dataTimeSeriesMultiAggregatorProcess.get_results()]
+
+        # Quantiles weighted by the time the Points are representative of in the slot (the ones on the boundaries
+        # are half in it) within the sketch accuracy
+        def weighted_quantile(start, end, q):
+            weighted_values = sorted([(values[i], 0.5 if i in [start, end] else 1.0) for i in range(start, end+1)])
+            cumulative = 0.0
+            for value, weight in weighted_values:
+                cumulative += weight
+                if cumulative >= q * (end - start):
+                    return value
+
+        for i, dataTimeSlot in enumerate(slots_10m):
+            self.assertAlmostEqual(dataTimeSlot.data.content['temp_C_P50'], weighted_quantile(i*10, (i+1)*10, 0.5), delta=0.3)
+            self.assertAlmostEqual(dataTimeSlot.data.content['temp_C_P95'], weighted_quantile(i*10, (i+1)*10, 0.95), delta=0.3)
+            self.assertEqual(sorted(dataTimeSlot.states.keys()), ['temp_C_P50', 'temp_C_P75', 'temp_C_P95'])
+
+        # Rolled up by merging the sketches, not by aggregating the quantiles
+        self.assertAlmostEqual(slots_30m[0].data.content['temp_C_P50'], weighted_quantile(0, 30, 0.5), delta=0.3)
+        self.assertAlmostEqual(slots_30m[0].data.content['temp_C_P95'], weighted_quantile(0, 30, 0.95), delta=0.3)
+
+        # Stored and loaded back with the sketches, to roll them up later
+        storage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=True)
+        dataTimeSlots = DataTimeSeries()
+        for dataTimeSlot in slots_10m:
+            dataTimeSlots.append(dataTimeSlot)
+        storage.put(dataTimeSlots, sensor=sensor, can_initialize=True)
+        stored_slots = DataTimeSeries()
+        for dataTimeSlot in storage.get(sensor=sensor, timeSlotSpan=TimeSlotSpan('10m')):
+            stored_slots.append(dataTimeSlot)
+        self.assertEqual([dataTimeSlot.states for dataTimeSlot in stored_slots], [json.loads(json.dumps(dataTimeSlot.states)) for dataTimeSlot in slots_10m])
+        dataTimeSlot = DataTimeSlotsAggregator(sensor).aggregate(stored_slots, start_dt=from_dt, end_dt=to_dt, timeSlotSpan=TimeSlotSpan('30m'))
+        self.assertEqual(dataTimeSlot.data.content, slots_30m[0].data.content)
+
+    def test_Energy_Aggregation(self):
+
+        class PowerSensor(PhysicalDataTimeSensor):
+            type_ID = 1
+            Points_data_labels = ['power_W']
+            Points_validity_region = TimeSlot(span='1m')
+            Slots_data_labels = ['power_W_AVG', 'energy_kWh_TOT', 'energy_Wh_TOT']
+            timezone = 'Europe/Rome'
+            class energy_Wh_TOT(TimeIntegralGenerator):
+                integrand = 'power_W'
+                method    = 'step'
+                factor    = 1/3600.0
+
+        sensor = PowerSensor('084EB18E44FFA/7-MB-1')
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,11,0,0, tzinfo=sensor.timezone)
+
+        # Integrals are computed as streaming operations on the power
+        plan = get_aggregation_plan(sensor)
+        self.assertEqual([(step.label, step.operate_on, step.streaming) for step in plan.steps[1:]], [('energy_kWh_TOT', 'power_W', True), ('energy_Wh_TOT', 'power_W', True)])
+
+        def aggregate(power, gap=(), timeSlotSpans=('10m', '1h')):
+            dataTimeSeries = DataTimeSeries()
+            for i in range(-2, 63):
+                if i not in gap:
+                    dataTimeSeries.append(PhysicalDataTimePoint(t=1458896400+i*60, tz=sensor.timezone, data=PhysicalData(labels=['power_W'], values=[power(i*60)]), validity_region=sensor.Points_validity_region))
+            dataTimeSeriesMultiAggregatorProcess = DataTimeSeriesMultiAggregatorProcess(timeSlotSpans     = [TimeSlotSpan(timeSlotSpan) for timeSlotSpan in timeSlotSpans],
+                                                                                        Sensor            = sensor,
+                                                                                        data_to_aggregate = PhysicalDataTimePoint)
+            dataTimeSeriesMultiAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=from_dt, end_dt=to_dt)
+            return [list(results) for results in dataTimeSeriesMultiAggregatorProcess.get_results()]
+
+        # A constant power, with the hourly energy summed from the 10m slots ones
+        slots_10m, slots_1h = aggregate(lambda t: 3600.0)
+        for dataTimeSlot in slots_10m:
+            self.assertAlmostEqual(dataTimeSlot.data.content['energy_kWh_TOT'], 0.6)
+            self.assertAlmostEqual(dataTimeSlot.data.content['energy_Wh_TOT'], 600.0)
+        self.assertAlmostEqual(slots_1h[0].data.content['energy_kWh_TOT'], 3.6)
+
+        # A linearly increasing power is integrated exactly by the trapezoidal method
+        slots_10m, slots_1h = aggregate(lambda t: float(t))
+        self.assertAlmostEqual(slots_1h[0].data.content['energy_kWh_TOT'], 3600**2/2/3600000.0)
+        self.assertAlmostEqual(sum(dataTimeSlot.data.content['energy_kWh_TOT'] for dataTimeSlot in slots_10m), 3600**2/2/3600000.0)
+
+        # The gaps (not covered by the validity regions) are not integrated
+        dataTimeSlot = aggregate(lambda t: float(t), gap=range(20, 30), timeSlotSpans=['1h'])[0][0]
+        self.assertAlmostEqual(dataTimeSlot.data.content['energy_kWh_TOT'], (3600**2/2 - (1770**2-1170**2)/2)/3600000.0)
+        self.assertAlmostEqual(dataTimeSlot.data.content['energy_Wh_TOT'], (3600**2/2 - (1770**2-1170**2)/2)/3600.0)
+
+        # Without the power in the Points, its (aggregated) average is integrated
+        class TriphasePowerSensor(EnergyElectricExtendedTriphase):
+            Slots_data_labels = EnergyElectricExtendedTriphase.Slots_data_labels + ['energy_kWh_TOT']
+        sensor = TriphasePowerSensor('084EB18E44FFA/7-MB-1')
+        self.assertEqual(get_aggregation_plan(sensor).steps[-1].Generator.__name__, 'energy_kWh_TOT')
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries = sqlite.DataTimeSeriesSQLiteStorage(in_memory=False, db_file=datasets_path + 'dataset1.sqlite').get(sensor=EnergyElectricExtendedTriphase(sensor.id)),
+                                              start_dt       = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone),
+                                              end_dt         = dt(2016,3,25,10,15,0, tzinfo=sensor.timezone))
+        dataTimeSlot = list(dataTimeSeriesAggregatorProcess.get_results())[0]
+        self.assertAlmostEqual(dataTimeSlot.data.content['energy_kWh_TOT'], dataTimeSlot.data.content['power_W_AVG'] * 900 / 3600000.0)
+
+    def test_Buffered_Aggregation(self):
+
+        sensor = EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1')
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)
+        dataTimePoints = list(sqlite.DataTimeSeriesSQLiteStorage(in_memory=False, db_file=datasets_path + 'dataset1.sqlite').get(sensor=sensor))
+
+        # Serial
+        dataTimeSeries = DataTimeSeries()
+        for dataTimePoint in dataTimePoints:
+            dataTimeSeries.append(dataTimePoint)
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('5m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=from_dt, end_dt=to_dt)
+        serial_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+
+        # Buffered, with the points swapped in pairs (late within the allowed lateness) and every
+        # fiftieth point arriving ten minutes late (later than the allowed lateness)
+        late_dataTimePoints = {}
+        pushed_dataTimePoints = []
+        for i, dataTimePoint in enumerate(dataTimePoints):
+            if i % 50 == 25:
+                late_dataTimePoints[dataTimePoint.t + 600] = dataTimePoint
+                continue
+            pushed_dataTimePoints.append(dataTimePoint)
+            for t in sorted(late_dataTimePoints):
+                if t <= dataTimePoint.t:
+                    pushed_dataTimePoints.append(late_dataTimePoints.pop(t))
+        pushed_dataTimePoints += [late_dataTimePoints[t] for t in sorted(late_dataTimePoints)]
+        for i in range(0, len(pushed_dataTimePoints)-1, 2):
+            pushed_dataTimePoints[i], pushed_dataTimePoints[i+1] = pushed_dataTimePoints[i+1], pushed_dataTimePoints[i]
+
+        storage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=True, can_initialize=True)
+        dataTimeSeriesBufferedAggregatorProcess = DataTimeSeriesBufferedAggregatorProcess(timeSlotSpan     = TimeSlotSpan('5m'),
+                                                                                          Sensor           = sensor,
+                                                                                          allowed_lateness = TimeSlotSpan('1m'),
+                                                                                          storage          = storage,
+                                                                                          start_dt         = from_dt,
+                                                                                          can_initialize   = True)
+        for dataTimePoint in pushed_dataTimePoints:
+            dataTimeSeriesBufferedAggregatorProcess.push(dataTimePoint)
+        dataTimeSeriesBufferedAggregatorProcess.flush()
+        self.assertEqual(dataTimeSeriesBufferedAggregatorProcess.late_points, 8)
+
+        # The dirty slots have been re-aggregated and upserted in the storage
+        buffered_slots = list(storage.get(sensor=sensor, from_dt=from_dt, to_dt=to_dt, timeSlotSpan=TimeSlotSpan('5m')))
+        self.assertEqual(len(buffered_slots), len(serial_slots))
+        for buffered_slot, serial_slot in zip(buffered_slots, serial_slots):
+            self.assertEqual(buffered_slot.start.t, serial_slot.start.t)
+            self.assertEqual(buffered_slot.coverage, serial_slot.coverage)
+            for label in sensor.Slots_data_labels:
+                self.assertAlmostEqual(buffered_slot.data.content[label], serial_slot.data.content[label])
+
+        # Without a storage, points later than the allowed lateness are discarded
+        dataTimeSeriesBufferedAggregatorProcess = DataTimeSeriesBufferedAggregatorProcess(timeSlotSpan=TimeSlotSpan('5m'), Sensor=sensor, start_dt=from_dt)
+        self.assertEqual(len(dataTimeSeriesBufferedAggregatorProcess.push(dataTimePoints[50:100])), 1)
+        self.assertEqual(dataTimeSeriesBufferedAggregatorProcess.push(dataTimePoints[10]), [])
+        self.assertEqual(dataTimeSeriesBufferedAggregatorProcess.discarded_points, 1)
+
+
+class test_multi_aggregation(unittest.TestCase):
+
+    def test_Multi_Aggregation(self):
+
+        sensor = EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1')
+        from_dt = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone)
+        to_dt   = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)
+        dataTimeSeriesSQLiteStorage = sqlite.DataTimeSeriesSQLiteStorage(in_memory=False, db_file=datasets_path + 'dataset1.sqlite')
+
+        dataTimeSeriesMultiAggregatorProcess = DataTimeSeriesMultiAggregatorProcess(timeSlotSpans     = [TimeSlotSpan('5m'), TimeSlotSpan('15m'), TimeSlotSpan('30m')],
+                                                                                    Sensor            = sensor,
+                                                                                    data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesMultiAggregatorProcess.start(dataTimeSeries=dataTimeSeriesSQLiteStorage.get(sensor=sensor), start_dt=from_dt, end_dt=to_dt)
+        results = [list(dataTimeSeries) for dataTimeSeries in dataTimeSeriesMultiAggregatorProcess.get_results()]
+        self.assertEqual([len(dataTimeSlots) for dataTimeSlots in results], [6, 2, 1])
+
+        # The finest slots are the same of a DataTimeSeriesAggregatorProcess
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('5m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeriesSQLiteStorage.get(sensor=sensor), start_dt=from_dt, end_dt=to_dt)
+        for dataTimeSlot, reference_dataTimeSlot in zip(results[0], dataTimeSeriesAggregatorProcess.get_results()):
+            self.assertEqual(str(dataTimeSlot), str(reference_dataTimeSlot))
+            self.assertEqual(dataTimeSlot.data.content, reference_dataTimeSlot.data.content)
+
+        # The coarser ones are aggregated from them, so minimums and maximums of the Points are exactly the same
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeriesSQLiteStorage.get(sensor=sensor), start_dt=from_dt, end_dt=to_dt)
+        for dataTimeSlot, reference_dataTimeSlot in zip(results[1], dataTimeSeriesAggregatorProcess.get_results()):
+            self.assertEqual(str(dataTimeSlot), str(reference_dataTimeSlot))
+            self.assertEqual(dataTimeSlot.coverage, reference_dataTimeSlot.coverage)
+            for Points_data_label in sensor.Points_data_labels:
+                for op in ['MIN', 'MAX']:
+                    self.assertEqual(dataTimeSlot.data.content[Points_data_label+'_'+op], reference_dataTimeSlot.data.content[Points_data_label+'_'+op])
+        self.assertEqual(results[2][0].data.content['power_W_MAX'], max(dataTimeSlot.data.content['power_W_MAX'] for dataTimeSlot in results[1]))
+
+        # Daily slots, starting at the local midnight also across a DST change
+        dataTimeSeries = DataTimeSeries()
+        start_t = s_from_dt(dt(2016,3,26,0,0,0, tzinfo=sensor.timezone))
+        for i in range(3*24*4):
+            dataTimeSeries.append(PhysicalDataTimePoint(t = start_t + i*900, tz = sensor.timezone, validity_region = TimeSlot(span='15m'),
+                                                        data = PhysicalData(labels=['temp_C'], values=[float(i)])))
+        dataTimeSeriesMultiAggregatorProcess = DataTimeSeriesMultiAggregatorProcess(timeSlotSpans     = [TimeSlotSpan('1h'), TimeSlotSpan('1D')],
+                                                                                    Sensor            = SimpleSensor('a'),
+                                                                                    data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesMultiAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=dt(2016,3,26,0,0,0, tzinfo=sensor.timezone), end_dt=dt(2016,3,28,0,0,0, tzinfo=sensor.timezone))
+        results = [list(dataTimeSeries) for dataTimeSeries in dataTimeSeriesMultiAggregatorProcess.get_results()]
+        self.assertEqual([len(dataTimeSlots) for dataTimeSlots in results], [47, 2])
+        self.assertEqual([(dataTimeSlot.start.dt, dataTimeSlot.end.dt) for dataTimeSlot in results[1]], [(dt(2016,3,26,0,0,0, tzinfo=sensor.timezone), dt(2016,3,27,0,0,0, tzinfo=sensor.timezone)),
+                                                                                                      (dt(2016,3,27,0,0,0, tzinfo=sensor.timezone), dt(2016,3,28,0,0,0, tzinfo=sensor.timezone))])
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('1D'),
+                                                                          Sensor            = SimpleSensor('a'),
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries=dataTimeSeries, start_dt=dt(2016,3,26,0,0,0, tzinfo=sensor.timezone), end_dt=dt(2016,3,28,0,0,0, tzinfo=sensor.timezone))
+        for dataTimeSlot, reference_dataTimeSlot in zip(results[1], dataTimeSeriesAggregatorProcess.get_results()):
+            self.assertEqual(str(dataTimeSlot), str(reference_dataTimeSlot))
+            self.assertEqual(dataTimeSlot.data.content['temp_C_MIN'], reference_dataTimeSlot.data.content['temp_C_MIN'])
+            self.assertEqual(dataTimeSlot.data.content['temp_C_MAX'], reference_dataTimeSlot.data.content['temp_C_MAX'])
+
+        # Start and end have to be consistent with the coarsest timeSlotSpan
+        with self.assertRaises(InputException):
+            dataTimeSeriesMultiAggregatorProcess.start(dataTimeSeries=dataTimeSeriesSQLiteStorage.get(sensor=sensor), start_dt=from_dt, end_dt=dt(2016,3,25,10,15,0, tzinfo=sensor.timezone))
+
+        # timeSlotSpans have to be nested
+        with self.assertRaises(InputException):
+            DataTimeSeriesMultiAggregatorProcess(timeSlotSpans=[TimeSlotSpan('10m'), TimeSlotSpan('15m')], Sensor=sensor, data_to_aggregate=PhysicalDataTimePoint)
+        with self.assertRaises(InputException):
+            DataTimeSeriesMultiAggregatorProcess(timeSlotSpans=[TimeSlotSpan('15m'), TimeSlotSpan('5m')], Sensor=sensor, data_to_aggregate=PhysicalDataTimePoint)
+        for timeSlotSpans in [['1M','1D'], ['1Y','1M'], ['1W','1M'], ['3D','1M'], ['2D','1W'], ['1D','1D'], ['5M','1Y'], ['7m','1D'], ['1h','1D_1h']]:
+            with self.assertRaises(InputException):
+                DataTimeSeriesMultiAggregatorProcess(timeSlotSpans=[TimeSlotSpan(span) for span in timeSlotSpans], Sensor=sensor, data_to_aggregate=PhysicalDataTimePoint)
+        for timeSlotSpans in [['15m','1h','1D','1W'], ['1h','1D','1M','3M','1Y'], ['1W','2W'], ['2D','4D']]:
+            DataTimeSeriesMultiAggregatorProcess(timeSlotSpans=[TimeSlotSpan(span) for span in timeSlotSpans], Sensor=sensor, data_to_aggregate=PhysicalDataTimePoint)
+
+        # On timezones with non-whole-hour offsets the local midnights are not on the hours
+        class IndianSensor(SimpleSensor):
+            timezone = 'Asia/Kolkata'
+        with self.assertRaises(InputException):
+            DataTimeSeriesMultiAggregatorProcess(timeSlotSpans=[TimeSlotSpan('1h'), TimeSlotSpan('1D')], Sensor=IndianSensor('a'), data_to_aggregate=PhysicalDataTimePoint)
+        DataTimeSeriesMultiAggregatorProcess(timeSlotSpans=[TimeSlotSpan('30m'), TimeSlotSpan('1D')], Sensor=IndianSensor('a'), data_to_aggregate=PhysicalDataTimePoint)
@@ -0,0 +1,72 @@
+import unittest
+import os
+import shutil
+import tempfile
+from functools import partial
+from luna.spacetime.time import dt, TimeSlotSpan
+from luna.datatypes.dimensional import PhysicalDataTimePoint
+from luna.common.exceptions import InputException
+from luna.storages.sqlite import sensor_storage as sqlite
+from luna.aggregators.components import DataTimeSeriesAggregatorProcess
+from luna.aggregators.fleet import AggregationJob, FleetAggregationRunner
+from luna.aggregators.tests import test_aggregators
+
+
+class test_fleet(unittest.TestCase):
+
+    def setUp(self):
+        # Work on copies of the dataset as the results are stored in it. Two copies are used since an SQLite
+        # database cannot be written by a process while being read (streamed) by another one.
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_files = []
+        for i in range(2):
+            self.db_files.append(os.path.join(self.tmp_dir, 'dataset1_{}.sqlite'.format(i)))
+            shutil.copy(test_aggregators.datasets_path + 'dataset1.sqlite', self.db_files[i])
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_fleet_aggregation(self):
+
+        sensor   = test_aggregators.EnergyElectricExtendedTriphase('084EB18E44FFA/7-MB-1')
+        storages = [partial(sqlite.DataTimeSeriesSQLiteStorage, db_file=db_file) for db_file in self.db_files]
+
+        # Reference (serial) results
+        dataTimeSeriesAggregatorProcess = DataTimeSeriesAggregatorProcess(timeSlotSpan      = TimeSlotSpan('15m'),
+                                                                          Sensor            = sensor,
+                                                                          data_to_aggregate = PhysicalDataTimePoint)
+        dataTimeSeriesAggregatorProcess.start(dataTimeSeries = storages[0]().get(sensor=sensor),
+                                              start_dt       = dt(2016,3,25,10,0,0, tzinfo=sensor.timezone),
+                                              end_dt         = dt(2016,3,25,10,30,0, tzinfo=sensor.timezone))
+        reference_slots = list(dataTimeSeriesAggregatorProcess.get_results())
+
+        # One job per slot, plus one for a sensor without data
+        jobs = [AggregationJob(sensor, storages[0], dt(2016,3,25,10,0,0, tzinfo=sensor.timezone), dt(2016,3,25,10,15,0, tzinfo=sensor.timezone)),
+                AggregationJob(sensor, storages[1], dt(2016,3,25,10,15,0, tzinfo=sensor.timezone), dt(2016,3,25,10,30,0, tzinfo=sensor.timezone)),
+                (test_aggregators.SimpleSensor('084EB18E44FFA/7-MB-1'), storages[0], dt(2016,3,25,10,0,0, tzinfo=sensor.timezone), dt(2016,3,25,10,30,0, tzinfo=sensor.timezone))]
+
+        for max_workers in [2, 0]:
+            reports = FleetAggregationRunner(timeSlotSpan=TimeSlotSpan('15m'), max_workers=max_workers, batch_size=1, can_initialize=True).run(jobs)
+
+            # Reports are in the jobs order
+            self.assertEqual([report.index for report in reports], [0,1,2])
+            for report in reports[0:2]:
+                self.assertEqual(report.error, None)
+                self.assertEqual(report.slots, 1)
+                self.assertEqual(report.batches, 1)
+                self.assertTrue(report.elapsed_s >= report.storing_s > 0)
+            self.assertTrue(reports[2].error.startswith('StorageException'))
+            self.assertEqual(reports[2].slots, 0)
+
+            # Results have been stored
+            slots = list(storages[0]().get(sensor=sensor, timeSlotSpan=TimeSlotSpan('15m'))) + list(storages[1]().get(sensor=sensor, timeSlotSpan=TimeSlotSpan('15m')))
+            self.assertEqual(len(slots), 2)
+            for slot, reference_slot in zip(slots, reference_slots):
+                self.assertEqual(slot.start.t, reference_slot.start.t)
+                self.assertEqual(slot.coverage, reference_slot.coverage)
+                for label in sensor.Slots_data_labels:
+                    self.assertAlmostEqual(slot.data.content[label], reference_slot.data.content[label])
+
+        # Storage instances cannot be sent to the workers
+        with self.assertRaises(InputException):
+            FleetAggregationRunner(timeSlotSpan=TimeSlotSpan('15m')).run([(sensor, storages[0](), jobs[0].start_dt, jobs[0].end_dt)])
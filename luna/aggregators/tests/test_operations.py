@@ -0,0 +1,123 @@
+import unittest
+from luna.datatypes.dimensional import TimePoint, TimeSlot, PhysicalData, PhysicalDataTimePoint, PhysicalDataTimeSlot, DataTimeSeries
+from luna.aggregators.operations import AVG, MIN, MAX, TOT, SUM, COUNT, FIRST, LAST, VAR, STD
+from luna.spacetime.time import TimeSlotSpan
+from luna.aggregators.utilities import compute_1D_aggregates
+
+
+class test_operations_on_Slots(unittest.TestCase):
+
+    def setUp(self):
+
+        # Four 5 minutes slots, the third one without data and the last one with half coverage
+        self.dataTimeSeries = DataTimeSeries()
+        for i, (values, coverage) in enumerate([([20.0, 1.5], 1.0), ([22.0, 2.5], 1.0), ([None, None], 0.0), ([26.0, 0.5], 0.5)]):
+            self.dataTimeSeries.append(PhysicalDataTimeSlot(start    = TimePoint(t=1436022000 + (i*300), tz='Europe/Rome'),
+                                                            end      = TimePoint(t=1436022000 + ((i+1)*300), tz='Europe/Rome'),
+                                                            data     = PhysicalData(labels=['temp_C_AVG', 'energy_kWh_TOT'], values=values, trustme=True),
+                                                            span     = TimeSlotSpan('5m'),
+                                                            coverage = coverage))
+        self.start_Point = TimePoint(t=1436022000, tz='Europe/Rome')
+        self.end_Point   = TimePoint(t=1436022000 + 1200, tz='Europe/Rome')
+
+    def test_compute_on_Slots(self):
+
+        # Coverage-weighted average
+        self.assertAlmostEqual(AVG.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('temp_C_AVG'), self.start_Point, self.end_Point), (20.0+22.0+26.0*0.5)/2.5)
+
+        # Min of mins, max of maxes and sum of totals, skipping the missing data
+        self.assertEqual(MIN.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('temp_C_AVG'), self.start_Point, self.end_Point), 20.0)
+        self.assertEqual(MAX.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('temp_C_AVG'), self.start_Point, self.end_Point), 26.0)
+        self.assertEqual(TOT.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('energy_kWh_TOT'), self.start_Point, self.end_Point), 4.5)
+
+        # Sum of sums and counts, first and last, skipping the missing data
+        self.assertEqual(SUM.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('energy_kWh_TOT'), self.start_Point, self.end_Point), 4.5)
+        self.assertEqual(COUNT.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('energy_kWh_TOT'), self.start_Point, self.end_Point), 4.5)
+        self.assertEqual(FIRST.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('temp_C_AVG'), self.start_Point, self.end_Point), 20.0)
+        self.assertEqual(LAST.compute_on_Slots(self.dataTimeSeries.lazy_filter_data_label('temp_C_AVG'), self.start_Point, self.end_Point), 26.0)
+
+        # No data at all
+        dataTimeSeries = self.dataTimeSeries.filter(from_dt=self.dataTimeSeries[1436022000+600].start.dt, to_dt=self.dataTimeSeries[1436022000+600].end.dt)
+        for Operation in [AVG, MIN, MAX, TOT, SUM, COUNT, FIRST, LAST, VAR]:
+            self.assertEqual(Operation.compute_on_Slots(dataTimeSeries.lazy_filter_data_label('energy_kWh_TOT'), self.start_Point, self.end_Point), None)
+
+
+class test_streaming_operations(unittest.TestCase):
+
+    def setUp(self):
+
+        # Twenty points every minute from 16:58:00 (Europe/Rome), with a gap
+        self.dataTimeSeries = DataTimeSeries()
+        for i in range(20):
+            if 8 < i < 12:
+                continue
+            self.dataTimeSeries.append(PhysicalDataTimePoint(t    = 1436022000 - 120 + (i*60),
+                                                             tz   = 'Europe/Rome',
+                                                             data = PhysicalData(labels=['temp_C'], values=[20.0+(i*7)%5]),
+                                                             validity_region = TimeSlot(span='1m')))
+        self.start_Point = TimePoint(t=1436022000, tz='Europe/Rome')
+        self.end_Point   = TimePoint(t=1436022000 + 900, tz='Europe/Rome')
+
+    def test_compute(self):
+
+        # Computed in a single pass, the same as compute_on_Points
+        for Operation in [AVG, MIN, MAX]:
+            self.assertTrue(Operation.is_stremaing)
+            result = compute_1D_aggregates(self.dataTimeSeries, self.start_Point, self.end_Point, labels=['temp_C'], operations=[('temp_C', Operation)])[1]['temp_C'][Operation.__name__]
+            self.assertAlmostEqual(result, Operation.compute_on_Points(self.dataTimeSeries.lazy_filter_data_label('temp_C'), self.start_Point, self.end_Point))
+
+        # Only the Points in the slot are summed, counted or taken as the first and last ones
+        in_slot_values = [20.0+(i*7)%5 for i in range(2, 17) if not 8 < i < 12]
+        for Operation, value in [(SUM, sum(in_slot_values)), (COUNT, len(in_slot_values)), (FIRST, in_slot_values[0]), (LAST, in_slot_values[-1])]:
+            self.assertTrue(Operation.in_slot_only)
+            self.assertEqual(Operation.compute_on_Points(self.dataTimeSeries.lazy_filter_data_label('temp_C'), self.start_Point, self.end_Point), value)
+
+        # The variance is weighted as the average, by the time the Points are representative of in the slot
+        weighted_values = [(20.0+(i*7)%5, 30 if i in [2, 17] else 60) for i in range(2, 18) if not 8 < i < 12]
+        total_weight = float(sum(weight for _, weight in weighted_values))
+        mean = sum(value*weight for value, weight in weighted_values) / total_weight
+        variance = sum(weight*(value-mean)**2 for value, weight in weighted_values) / total_weight
+        self.assertAlmostEqual(VAR.compute_on_Points(self.dataTimeSeries.lazy_filter_data_label('temp_C'), self.start_Point, self.end_Point), variance)
+        self.assertAlmostEqual(STD.compute_on_Points(self.dataTimeSeries.lazy_filter_data_label('temp_C'), self.start_Point, self.end_Point), variance**0.5)
+
+        # Non streaming operations
+        self.assertFalse(TOT.is_stremaing)
+        with self.assertRaises(NotImplementedError):
+            TOT.init_state()
+
+    def test_merge(self):
+
+        # Merging the states of two halves is the same as updating a single one
+        values = [(20.0, 60), (25.0, 30), (18.0, 60), (22.0, 0), (21.0, 60)]
+        states = {}
+        for Operation in [AVG, MIN, MAX, SUM, COUNT, FIRST, LAST, VAR, STD]:
+            state = Operation.init_state()
+            first_state = Operation.init_state()
+            second_state = Operation.init_state()
+            for i, (value, weight) in enumerate(values):
+                state = Operation.update(state, value, weight)
+                if i < 2:
+                    first_state = Operation.update(first_state, value, weight)
+                else:
+                    second_state = Operation.update(second_state, value, weight)
+            self.assertAlmostEqual(Operation.finalize(Operation.merge(first_state, second_state), 0, 300), Operation.finalize(state, 0, 300))
+            states[Operation] = state
+        self.assertAlmostEqual(AVG.finalize(states[AVG], 0, 300), (20.0*60+25.0*30+18.0*60+21.0*60)/300)
+        self.assertEqual(MIN.finalize(states[MIN], 0, 300), 18.0)
+        self.assertEqual(MAX.finalize(states[MAX], 0, 300), 25.0)
+        self.assertEqual(SUM.finalize(states[SUM], 0, 300), 106.0)
+        self.assertEqual(COUNT.finalize(states[COUNT], 0, 300), 5)
+        self.assertEqual(FIRST.finalize(states[FIRST], 0, 300), 20.0)
+        self.assertEqual(LAST.finalize(states[LAST], 0, 300), 21.0)
+        mean = (20.0*60+25.0*30+18.0*60+21.0*60)/210
+        self.assertAlmostEqual(VAR.finalize(states[VAR], 0, 300), (60*(20.0-mean)**2+30*(25.0-mean)**2+60*(18.0-mean)**2+60*(21.0-mean)**2)/210)
+
+        # Numerically stable with large values
+        state = VAR.init_state()
+        for value in [1e9+4, 1e9+7, 1e9+13, 1e9+16]:
+            state = VAR.update(state, value, None)
+        self.assertAlmostEqual(VAR.finalize(state, 0, 300), 22.5)
+
+        # Not weighted (no validity region) and empty
+        self.assertEqual(AVG.finalize(AVG.update(AVG.update(AVG.init_state(), 20.0, None), 22.0, None), 0, 300), 21.0)
+        self.assertEqual(AVG.finalize(AVG.init_state(), 0, 300), None)
@@ -0,0 +1,77 @@
+import unittest
+import json
+import random
+from luna.common.exceptions import InputException
+from luna.aggregators.sketches import QuantileSketch
+
+
+class test_sketches(unittest.TestCase):
+
+    def setUp(self):
+        random.seed(42)
+        self.values = [random.lognormvariate(3, 1) for _ in range(5000)] + [0.0, -2.5, -0.1]
+
+    def exact_quantile(self, values, q):
+        values = sorted(values)
+        return values[max(0, int(round(q * len(values))) - 1)]
+
+    def test_quantile(self):
+
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in self.values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, len(self.values))
+
+        # Within the relative accuracy (plus the rank rounding)
+        for q in [0.5, 0.9, 0.95, 0.99]:
+            self.assertAlmostEqual(sketch.quantile(q), self.exact_quantile(self.values, q), delta=self.exact_quantile(self.values, q)*0.02)
+
+        # Extremes are exact, negatives and zeros are handled
+        self.assertEqual(sketch.quantile(0), -2.5)
+        self.assertEqual(sketch.quantile(1), max(self.values))
+        self.assertAlmostEqual(QuantileSketch().add(-2.5).add(-0.1).add(0.0).quantile(0.5), -0.1, delta=0.01)
+
+        # Empty and wrong quantile
+        self.assertEqual(QuantileSketch().quantile(0.5), None)
+        with self.assertRaises(InputException):
+            sketch.quantile(95)
+
+    def test_weights(self):
+
+        # A value lasting three times the other one
+        sketch = QuantileSketch().add(10.0, 60).add(20.0, 20)
+        self.assertAlmostEqual(sketch.quantile(0.5), 10.0, delta=0.1)
+        self.assertAlmostEqual(sketch.quantile(0.8), 20.0, delta=0.2)
+
+        # No weight, no value
+        self.assertEqual(QuantileSketch().add(10.0, 0).count, 0)
+
+    def test_merge(self):
+
+        # Merging the sketches of two halves is the same as a single one (also through JSON)
+        sketch = QuantileSketch()
+        first_sketch = QuantileSketch()
+        second_sketch = QuantileSketch()
+        for i, value in enumerate(self.values):
+            sketch.add(value)
+            (first_sketch if i < 1000 else second_sketch).add(value)
+        merged_sketch = QuantileSketch(json.loads(json.dumps(first_sketch.state))).merge(second_sketch)
+        for q in [0.01, 0.5, 0.95, 0.99]:
+            self.assertEqual(merged_sketch.quantile(q), sketch.quantile(q))
+
+        # Only with the same relative accuracy
+        with self.assertRaises(InputException):
+            QuantileSketch(relative_accuracy=0.02).merge(sketch)
+
+    def test_max_buckets(self):
+
+        # The lowest buckets are collapsed, the highest quantiles keep their accuracy
+        sketch = QuantileSketch(max_buckets=64)
+        for value in self.values:
+            sketch.add(value)
+        self.assertTrue(len(sketch.state['positive'][1]) <= 64)
+        self.assertAlmostEqual(sketch.quantile(0.99), self.exact_quantile(self.values, 0.99), delta=self.exact_quantile(self.values, 0.99)*0.02)
+        self.assertTrue(sketch.quantile(0.05) >= self.exact_quantile(self.values, 0.05))
+
+        with self.assertRaises(InputException):
+            QuantileSketch(relative_accuracy=1.5)
@@ -1,7 +1,8 @@
 import unittest
 from luna.datatypes.dimensional import TimePoint
 from luna.datatypes.dimensional import DataTimePoint, PhysicalData, PhysicalDataTimePoint, DataTimeSeries, TimeSlot
-from luna.aggregators.utilities import compute_1D_coverage
+from luna.aggregators.utilities import compute_1D_coverage, compute_1D_aggregates
+from luna.aggregators.operations import AVG, MIN, MAX
 from luna.common.exceptions import InputException
 from luna.spacetime.time import dt, TimeSlotSpan, correct_dt_dst, timezonize, s_from_dt
 import datetime
@@ -152,6 +153,43 @@ class test_compute_1D_coverage(unittest.TestCase):
 
 
 
+class test_compute_1D_aggregates(unittest.TestCase):
+
+    # Same TimeSeries used for the coverage
+    setUp = test_compute_1D_coverage.setUp
+
+    def test_compute_1D_aggregates_basic(self):
+
+        # Wrong init parameters
+        with self.assertRaises(InputException):
+            compute_1D_aggregates(dataSeries = None, start_Point = None, end_Point = None, labels=['power_W'])
+        with self.assertRaises(InputException):
+            compute_1D_aggregates(dataSeries = self.dataTimeSeries1, start_Point = 5, end_Point = TimePoint(t=3), labels=['power_W'])
+
+        # Results must be the same as the coverage and the operations, computed one by one
+        start_Point = TimePoint(t=1436022000,      tz='Europe/Rome')  # 2015-07-04 17:00:00+02:00
+        for end_Point in [TimePoint(t=1436022000+1800, tz='Europe/Rome'), TimePoint(t=1436022000+1830, tz='Europe/Rome')]:
+            for dataTimeSeries in [self.dataTimeSeries1, self.dataTimeSeries2, self.dataTimeSeries3, self.dataTimeSeries4, self.dataTimeSeries5]:
+                Slot_coverage, Slot_aggregates = compute_1D_aggregates(dataSeries  = dataTimeSeries,
+                                                                       start_Point = start_Point,
+                                                                       end_Point   = end_Point,
+                                                                       labels      = ['power_W'])
+                self.assertEqual(Slot_coverage, compute_1D_coverage(dataTimeSeries, start_Point, end_Point))
+                for Operation in [AVG, MIN, MAX]:
+                    self.assertEqual(Slot_aggregates['power_W'][Operation.__name__],
+                                     Operation.compute_on_Points(dataTimeSeries.lazy_filter_data_label(label='power_W'), start_Point, end_Point))
+                self.assertEqual(Slot_aggregates['power_W']['_n'], len(dataTimeSeries))
+
+        # Sum and count on all the points
+        Slot_coverage, Slot_aggregates = compute_1D_aggregates(dataSeries  = self.dataTimeSeries2,
+                                                               start_Point = start_Point,
+                                                               end_Point   = TimePoint(t=1436022000+1800, tz='Europe/Rome'),
+                                                               labels      = ['power_W'])
+        self.assertEqual(Slot_aggregates['power_W']['_sum'], float(sum(range(154, 154+34))))
+        self.assertEqual(Slot_aggregates['power_W']['_n'], 34)
+
+
+
 
 
 
@@ -0,0 +1,80 @@
+import unittest
+from luna.datatypes.dimensional import TimePoint, TimeSlot, PhysicalData, PhysicalDataTimePoint, DataTimeSeries, ColumnarDataTimeSeries
+from luna.aggregators.utilities import compute_1D_coverage, compute_1D_aggregates
+from luna.aggregators.operations import AVG, MIN, MAX
+from luna.aggregators.vectorized import numpy, is_vectorizable
+from luna.spacetime.time import dt_from_s
+
+
+@unittest.skipIf(numpy is None, 'NumPy not available')
+class test_vectorized(unittest.TestCase):
+
+    def setUp(self):
+
+        # Same TimeSeries, list and array backed, from 16:58:00 to 17:32:00 (Europe/Rome) with
+        # a gap of ten minutes in the middle and some spare points
+        self.dataTimeSeries = DataTimeSeries()
+        self.columnarDataTimeSeries = ColumnarDataTimeSeries()
+        start_t = 1436022000 - 120
+        validity_region = TimeSlot(span='1m')
+        for i in range(35):
+            if i > 10 and i <21:
+                continue
+            data = PhysicalData(labels=['power_W', 'voltage_V'], values=[154.3+i, 230.1-(i%7)])
+            physicalDataTimePoint = PhysicalDataTimePoint(t    = start_t + (i*60) + (i%3),
+                                                          tz   = "Europe/Rome",
+                                                          data = data,
+                                                          validity_region = validity_region)
+            self.dataTimeSeries.append(physicalDataTimePoint)
+            self.columnarDataTimeSeries.append(physicalDataTimePoint)
+
+    def test_is_vectorizable(self):
+        self.assertFalse(is_vectorizable(self.dataTimeSeries))
+        self.assertTrue(is_vectorizable(self.columnarDataTimeSeries))
+        self.assertTrue(is_vectorizable(self.columnarDataTimeSeries.lazy_filter_data_label('power_W')))
+        self.assertFalse(is_vectorizable(ColumnarDataTimeSeries()))
+
+    def test_equivalence(self):
+
+        for start_t, end_t in [(1436022000, 1436022000+1800), (1436022000+600, 1436022000+900),
+                               (1436022000-300, 1436022000+60), (1436022000+1860, 1436022000+3600)]:
+            start_Point = TimePoint(t=start_t, tz='Europe/Rome')
+            end_Point   = TimePoint(t=end_t, tz='Europe/Rome')
+
+            # Also on filtered (view) TimeSeries
+            from_dt = dt_from_s(start_t-120, tz='Europe/Rome')
+            to_dt   = dt_from_s(end_t+120, tz='Europe/Rome')
+            for dataTimeSeries, columnarDataTimeSeries in [(self.dataTimeSeries, self.columnarDataTimeSeries),
+                                                           (self.dataTimeSeries.filter(from_dt=from_dt, to_dt=to_dt), self.columnarDataTimeSeries.filter(from_dt=from_dt, to_dt=to_dt))]:
+
+                # Coverage
+                self.assertAlmostEqual(compute_1D_coverage(columnarDataTimeSeries, start_Point, end_Point),
+                                       compute_1D_coverage(dataTimeSeries, start_Point, end_Point))
+
+                # Aggregates
+                coverage, aggregates = compute_1D_aggregates(dataTimeSeries, start_Point, end_Point, ['power_W', 'voltage_V'])
+                vectorized_coverage, vectorized_aggregates = compute_1D_aggregates(columnarDataTimeSeries, start_Point, end_Point, ['power_W', 'voltage_V'])
+                self.assertAlmostEqual(vectorized_coverage, coverage)
+                for label in ['power_W', 'voltage_V']:
+                    for op in ['AVG', 'MIN', 'MAX', '_sum', '_n']:
+                        self.assertAlmostEqual(vectorized_aggregates[label][op], aggregates[label][op])
+
+                # Operations
+                for label in ['power_W', 'voltage_V']:
+                    for Operation in [AVG, MIN, MAX]:
+                        self.assertAlmostEqual(Operation.compute_on_Points(columnarDataTimeSeries.lazy_filter_data_label(label), start_Point, end_Point),
+                                               aggregates[label][Operation.__name__])
+
+    def test_single_Point_avg(self):
+
+        # The only DataPoint is weighted by its validity region limited to the slot, on every path
+        dataTimeSeries = DataTimeSeries()
+        columnarDataTimeSeries = ColumnarDataTimeSeries()
+        physicalDataTimePoint = PhysicalDataTimePoint(t=1436022000+10, tz='Europe/Rome', data=PhysicalData(labels=['power_W'], values=[150.0]), validity_region=TimeSlot(span='1m'))
+        dataTimeSeries.append(physicalDataTimePoint)
+        columnarDataTimeSeries.append(physicalDataTimePoint)
+        start_Point = TimePoint(t=1436022000, tz='Europe/Rome')
+        end_Point   = TimePoint(t=1436022000+300, tz='Europe/Rome')
+        for series in [dataTimeSeries, columnarDataTimeSeries]:
+            self.assertAlmostEqual(AVG.compute_on_Points(series.lazy_filter_data_label('power_W'), start_Point, end_Point), 150.0*40/300)
+            self.assertAlmostEqual(compute_1D_aggregates(series, start_Point, end_Point, ['power_W'])[1]['power_W']['AVG'], 150.0*40/300)
@@ -1,8 +1,10 @@
 
+import copy
 from luna.common.exceptions import ConsistencyException
 from luna.spacetime.time import s_from_dt
 from luna.common.exceptions import InputException
 from luna.datatypes.dimensional import Point
+from luna.aggregators.vectorized import is_vectorizable, compute_1D_aggregates_vectorized, compute_single_Point_avg
 
 #--------------------------
 #    Logger
@@ -42,6 +44,10 @@ def compute_1D_coverage(dataSeries, start_Point, end_Point, trustme=False):
         if not isinstance(end_Point, Point):
             raise InputException('end_Point not of type Point, got {}'.format(type(end_Point)))
 
+    # Use the NumPy backend if the dataSeries is array-backed
+    if is_vectorizable(dataSeries):
+        return compute_1D_aggregates_vectorized(dataSeries, start_Point, end_Point, labels=[])[0]
+
     # Support vars
     prev_dataPoint_valid_until = None
     missing_coverage = None
@@ -155,10 +161,327 @@ def compute_1D_coverage(dataSeries, start_Point, end_Point, trustme=False):
     return coverage
 
 
+def compute_1D_Slots_coverage(dataSeries, start_Point, end_Point, trustme=False):
+    '''Compute the data coverage of a 1-dimensional dataSeries of Slots, as the sum of the (part within start and
+    end of the) Slots lengths, weighted by their coverage (if any).
+
+    Args:
+        dataSeries(dataSeries): the DataSeries of Slots
+        start_Point(Point): start Point for the coverage calculation
+        end_Point(Point): end Point for the coverage calculation
+
+    Raises:
+        InputException: if some argument is passed in a wrong format
+
+    Returns:
+        float: float value between 0.0 and 1.0
+    '''
+
+    # Sanity checks
+    if not trustme:
+        if dataSeries is None:
+            raise InputException('You must provide dataSeries, got None')
+
+        if not isinstance(start_Point, Point):
+            raise InputException('start_Point not of type Point, got {}'.format(type(start_Point)))
+
+        if not isinstance(end_Point, Point):
+            raise InputException('end_Point not of type Point, got {}'.format(type(end_Point)))
+
+    start_t = start_Point.values[0]
+    end_t   = end_Point.values[0]
+
+    covered = 0.0
+    for dataSlot in dataSeries:
+        slot_start_t = dataSlot.start.values[0] if dataSlot.start.values[0] > start_t else start_t
+        slot_end_t   = dataSlot.end.values[0] if dataSlot.end.values[0] < end_t else end_t
+        if slot_end_t > slot_start_t:
+            coverage = getattr(dataSlot, 'coverage', None)
+            covered += (slot_end_t - slot_start_t) * (coverage if coverage is not None else 1.0)
+
+    coverage = covered / (end_t - start_t)
+    if coverage > 1:
+        coverage = 1.0
+
+    logger.debug('compute_1D_Slots_coverage: Returning %s (%s percent)', coverage, coverage*100.0)
+    return coverage
+
+
+def compute_1D_aggregates(dataSeries, start_Point, end_Point, labels, operations=None, trustme=False):
+    '''Compute, in a single pass over the dataSeries, the data coverage (as compute_1D_coverage) together with
+    the weighted average, min, max, sum and count of the values for each one of the given data labels. Every
+    DataPoint is read only once. Results match the ones of compute_1D_coverage and of the AVG, MIN and MAX
+    operations' compute_on_Points (including their boundary handling), which are kept as the reference.
+
+    Args:
+        dataSeries(dataSeries): the DataSeries
+        start_Point(Point): start Point for the computation
+        end_Point(Point): end Point for the computation
+        labels(list): the data labels to compute the aggregates for
+
+    Raises:
+        InputException: if some argument is passed in a wrong format
+
+    Returns:
+        tuple: the coverage (float value between 0.0 and 1.0) and a dict with, for each label, a dict with the
+        results by operation name ('AVG', 'MIN', 'MAX', and the ones of the streaming operations, given as
+        (label, Operation) pairs) plus the '_sum' and '_n' of all the DataPoints, also outside the slot. The 'AVG' is not provided if some DataPoints have no validity region,
+        as the weighted average cannot be computed.
+    '''
+
+    # Sanity checks
+    if not trustme:
+        if dataSeries is None:
+            raise InputException('You must provide dataSeries, got None')
+
+        if start_Point is None or end_Point is None:
+            raise NotImplementedError('Sorry, you must set start/end for now.')
+
+        if not isinstance(start_Point, Point):
+            raise InputException('start_Point not of type Point, got {}'.format(type(start_Point)))
+
+        if not isinstance(end_Point, Point):
+            raise InputException('end_Point not of type Point, got {}'.format(type(end_Point)))
+
+    # Use the NumPy backend if the dataSeries is array-backed (and there are no streaming operations)
+    if not operations and is_vectorizable(dataSeries):
+        return compute_1D_aggregates_vectorized(dataSeries, start_Point, end_Point, labels)
+
+    accumulator = Aggregates1DAccumulator(start_t=start_Point.values[0], end_t=end_Point.values[0], labels=labels, operations=operations)
+    positions   = None
+    span        = None
+    half_span   = None
+
+    for this_dataPoint in dataSeries:
+
+        values = this_dataPoint.data.values
+        if positions is None:
+            positions = [this_dataPoint.data.labels.index(label) for label in labels]
+
+        # Get the validity region (without anchoring it, which would require a copy)
+        validity_region = getattr(this_dataPoint, '_validity_region', None)
+        if validity_region is not None:
+            if validity_region.span is not span:
+                span = validity_region.span
+                half_span = span.value[0]/2.0
+            accumulator.add(this_dataPoint.t, [values[position] for position in positions], half_span)
+        else:
+            accumulator.add(this_dataPoint.t, [values[position] for position in positions], None)
+
+    coverage, results = accumulator.results()
+
+    logger.debug('compute_1D_aggregates: coverage=%s, results=%s', coverage, results)
+    return coverage, results
+
+
+class Aggregates1DAccumulator(object):
+    '''Incremental version of compute_1D_aggregates: DataPoints are added one at a time (as their time, values for
+    the labels and half span of the validity region, or None if they have no validity region) and only a constant
+    size state is kept, which can be saved and restored with get_state() and from_state() (it is a dict of plain
+    types, which can be serialized as JSON for example). The streaming operations, as (label, Operation) pairs,
+    are computed as well: every DataPoint updates their states once, when its weight is known (only the DataPoints
+    with their time in the slot for the in_slot_only ones, and as it is added for the timed ones).'''
+
+    def __init__(self, start_t, end_t, labels, operations=None):
+
+        self.start_t = start_t
+        self.end_t   = end_t
+        self.labels  = list(labels)
+
+        # Streaming operations and their states
+        self.operations = list(operations) if operations else []
+        self.states     = [Operation.init_state() for _, Operation in self.operations]
+        self._operations_positions = [self.labels.index(label) for label, _ in self.operations]
+        self._timed_operations = [i for i, (_, Operation) in enumerate(self.operations) if Operation.is_timed]
+
+        # Support vars for the coverage
+        self.prev_dataPoint_valid_until = None
+        self.missing_coverage = None
+        self.validity_region_presence = None
+        self.empty_dataSeries = True
+
+        # Support vars for the operations
+        self.sums        = [0.0 for _ in labels]
+        self.mins        = [None for _ in labels]
+        self.maxs        = [None for _ in labels]
+        self.count       = 0
+        self.weighted    = True
+        self.avg_sums    = [0.0 for _ in labels]
+        self.prev_values = None
+        self.prev_valid_from  = None
+        self.prev_valid_until = None
+        self.last_weight = None
+        self.last_t      = None
+
+    def add(self, t, values, half_span):
+        '''Add a DataPoint, given its time, values (in the labels order) and validity region half span'''
+
+        start_t = self.start_t
+        end_t   = self.end_t
+
+        if half_span is not None:
+            valid_from  = t - half_span
+            valid_until = t + half_span
+        else:
+            self.weighted = False
+            valid_from  = t
+            valid_until = t
+
+        prev_t = self.last_t
+        self.last_t = t
+
+        #----------------------
+        # Coverage
+        #----------------------
+        if t <= end_t:
+            if self.validity_region_presence is not None and self.validity_region_presence != (half_span is not None):
+                raise InputException('Got DataPoints both with and without a validity region')
+            self.validity_region_presence = half_span is not None
+
+        if t < start_t:
+            self.prev_dataPoint_valid_until = valid_until
+        elif t > end_t:
+            pass
+        else:
+            self.empty_dataSeries = False
+            if self.prev_dataPoint_valid_until is None:
+                value = valid_from - start_t
+            else:
+                value = valid_from - self.prev_dataPoint_valid_until
+            if value > 0:
+                if self.missing_coverage is None:
+                    self.missing_coverage = value
+                else:
+                    self.missing_coverage = self.missing_coverage + value
+            self.prev_dataPoint_valid_until = valid_until
+
+        #----------------------
+        # Min, max, sum, count
+        #----------------------
+        mins = self.mins
+        maxs = self.maxs
+        sums = self.sums
+        for i, value in enumerate(values):
+            if mins[i] is None or value < mins[i]:
+                mins[i] = value
+            if maxs[i] is None or value > maxs[i]:
+                maxs[i] = value
+            sums[i] += value
+        self.count += 1
+
+        # Timed streaming operations are updated with every DataPoint, as it is added
+        for i in self._timed_operations:
+            self.states[i] = self.operations[i][1].update_on_Point(self.states[i], t, values[self._operations_positions[i]], half_span, start_t, end_t)
+
+        #----------------------
+        # Weighted average
+        #----------------------
+
+        # Limit the validity region to the start and end
+        this_valid_from  = start_t if valid_from < start_t else valid_from
+        this_valid_until = end_t if valid_until > end_t else valid_until
+
+        if self.prev_values is not None:
+            # Weight the previous point up to the start of the validity of this one
+            prev_valid_until = self.prev_valid_until if this_valid_from > self.prev_valid_until else this_valid_from
+            self.last_weight = prev_valid_until - self.prev_valid_from
+            weight = self.last_weight if self.last_weight > 0 else 0
+            avg_sums = self.avg_sums
+            for i, prev_value in enumerate(self.prev_values):
+                avg_sums[i] += weight * prev_value
+            if self.operations:
+                self._update(self.states, self.prev_values, weight, start_t <= prev_t < end_t)
+
+        self.prev_values      = values
+        self.prev_valid_from  = this_valid_from
+        self.prev_valid_until = this_valid_until
+
+    def results(self):
+        '''Get the results, as compute_1D_aggregates'''
+
+        start_t = self.start_t
+        end_t   = self.end_t
+
+        #----------------------
+        # Finalize coverage
+        #----------------------
+        missing_coverage = self.missing_coverage
+        if self.prev_dataPoint_valid_until is not None:
+            if end_t > self.prev_dataPoint_valid_until:
+                if missing_coverage is not None:
+                    missing_coverage += (end_t - self.prev_dataPoint_valid_until)
+                else:
+                    missing_coverage = (end_t - self.prev_dataPoint_valid_until)
+
+        if self.empty_dataSeries:
+            coverage = 0.0
+        elif missing_coverage is not None:
+            coverage = 1.0 - float(missing_coverage) / (end_t - start_t)
+            if coverage < 0:
+                coverage = 0.0
+            if coverage > 1:
+                coverage = 1.0
+        else:
+            coverage = 1.0
 
+        #----------------------
+        # Finalize operations
+        #----------------------
+        results = {}
+        for i, label in enumerate(self.labels):
+            results[label] = {'MIN': self.mins[i], 'MAX': self.maxs[i], '_sum': self.sums[i], '_n': self.count}
 
+            if self.weighted and self.count:
+                if self.count == 1:
+                    results[label]['AVG'] = compute_single_Point_avg(self.prev_values[i], self.prev_valid_from, self.prev_valid_until, start_t, end_t)
+                else:
+                    avg_sum = self.avg_sums[i]
+                    # Last step, weighting the last point with the last weight if not after the end
+                    if self.last_t <= end_t:
+                        avg_sum += self.last_weight * self.prev_values[i]
+                    results[label]['AVG'] = avg_sum / (end_t - start_t)
 
+        # Streaming operations, updating (a copy of) their states with the last point, weighted as above
+        if self.operations:
+            states = copy.deepcopy(self.states)
+            if self.prev_values is not None:
+                if self.count == 1:
+                    weight = self.prev_valid_until - self.prev_valid_from
+                else:
+                    weight = self.last_weight if self.last_t <= end_t else 0
+                self._update(states, self.prev_values, weight if weight > 0 else 0, start_t <= self.last_t < end_t)
+            for (label, Operation), state in zip(self.operations, states):
+                results[label][Operation.__name__] = Operation.finalize(state, start_t, end_t)
+                if Operation.keeps_state:
+                    results[label].setdefault('STATES', {})[Operation.__name__] = state
 
+        return coverage, results
 
+    def _update(self, states, values, weight, in_slot):
+        weight = weight if self.weighted else None
+        for i, (_, Operation) in enumerate(self.operations):
+            if Operation.is_timed or (Operation.in_slot_only and not in_slot):
+                continue
+            states[i] = Operation.update(states[i], values[self._operations_positions[i]], weight)
 
+    def get_state(self):
+        '''Get the state, as a dict (the streaming operations are not included, only their states)'''
+        state = dict(self.__dict__)
+        for key in ['labels', 'sums', 'mins', 'maxs', 'avg_sums', 'prev_values']:
+            if state[key] is not None:
+                state[key] = list(state[key])
+        state['states'] = copy.deepcopy(self.states)
+        del state['operations']
+        del state['_operations_positions']
+        del state['_timed_operations']
+        return state
 
+    @classmethod
+    def from_state(cls, state, operations=None):
+        '''Create an Aggregates1DAccumulator from a state got with get_state(), with the same streaming operations'''
+        accumulator = cls(start_t=state['start_t'], end_t=state['end_t'], labels=state['labels'], operations=operations)
+        if len(state.get('states', [])) != len(accumulator.operations):
+            raise InputException('The state has {} streaming operation states, but got {} streaming operations'.format(len(state.get('states', [])), len(accumulator.operations)))
+        for key, value in state.items():
+            setattr(accumulator, key, copy.deepcopy(value) if key == 'states' else list(value) if isinstance(value, (list, tuple)) else value)
+        return accumulator
@@ -0,0 +1,167 @@
+from luna.common.exceptions import InputException
+from luna.datatypes.dimensional import Point, ColumnarDataTimeSeries, SequenceSliceView
+
+# NumPy is optional: if not available, the pure-Python path is used
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+#--------------------------
+#    Logger
+#--------------------------
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+#--------------------------
+#    Support functions
+#--------------------------
+
+def is_vectorizable(dataSeries):
+    '''Return True if the dataSeries can be processed by the NumPy backend, which is when NumPy is
+    available and the dataSeries is array-backed (a ColumnarDataTimeSeries or a filtered one).'''
+    return numpy is not None and isinstance(dataSeries, ColumnarDataTimeSeries) and len(dataSeries) > 0
+
+
+def as_numpy_array(column):
+    '''Get a NumPy array (view) of an array-backed column, without copying it'''
+    if isinstance(column, SequenceSliceView):
+        if column.start == column.stop:
+            return numpy.empty(0)
+        return numpy.frombuffer(column.items, dtype='d')[column.start:column.stop]
+    if not column:
+        return numpy.empty(0)
+    return numpy.frombuffer(column, dtype='d')
+
+
+def get_arrays(dataSeries, labels):
+    '''Get the timestamps, the validity regions half spans (None if no validity region) and the values
+    for the given labels of an array-backed dataSeries, as NumPy arrays'''
+    t = as_numpy_array(dataSeries._t)
+    values_by_label = {}
+    for label in labels:
+        values_by_label[label] = as_numpy_array(dataSeries._columns[dataSeries._data_labels.index(label)])
+    validity_region = dataSeries._validity_region
+    half_span = validity_region.span.value[0]/2.0 if validity_region is not None else None
+    return t, half_span, values_by_label
+
+
+def compute_single_Point_avg(value, valid_from, valid_until, start_t, end_t):
+    '''Compute the weighted average of a slot with only one DataPoint: its value weighted by its validity
+    region limited to the slot start and end, as for each DataPoint when there are more of them.'''
+    weight = min(valid_until, end_t) - max(valid_from, start_t)
+    return value * weight / (end_t - start_t) if weight > 0 else 0.0
+
+
+def get_operation_label(dataSeries):
+    '''Get the label an operation has to be computed on: the lazy filtered one, or the only one'''
+    if dataSeries.data_label_to_lazy_filter is not None:
+        return dataSeries.data_label_to_lazy_filter
+    if dataSeries._data_labels is not None and len(dataSeries._data_labels) == 1:
+        return dataSeries._data_labels[0]
+    return None
+
+
+#--------------------------
+#    Kernels
+#--------------------------
+
+def compute_1D_aggregates_on_arrays(t, half_span, values_by_label, start_t, end_t):
+    '''Vectorized version of compute_1D_aggregates, operating on NumPy arrays of timestamps and values.
+    The half_span of the validity regions can be a single value, a per-point array or None if the points
+    have no validity region. Results are the same (up to floating point summation order) as the
+    pure-Python path, including the boundary handling.'''
+
+    n = len(t)
+    if half_span is None:
+        valid_from  = t
+        valid_until = t
+    else:
+        valid_from  = t - half_span
+        valid_until = t + half_span
+
+    #----------------------
+    # Coverage
+    #----------------------
+
+    # Points in the middle are the ones with start <= t <= end, which are contiguous as t is sorted
+    first_inside = int(numpy.searchsorted(t, start_t, side='left'))
+    after_inside = int(numpy.searchsorted(t, end_t, side='right'))
+
+    if first_inside >= after_inside:
+        coverage = 0.0
+    else:
+        # The validity of each point in the middle starts after the end of the validity of the previous one
+        prev_valid_until = numpy.empty(after_inside - first_inside)
+        prev_valid_until[0] = valid_until[first_inside-1] if first_inside > 0 else start_t
+        prev_valid_until[1:] = valid_until[first_inside:after_inside-1]
+        gaps = valid_from[first_inside:after_inside] - prev_valid_until
+        gaps = gaps[gaps > 0]
+        missing_coverage = gaps.sum() if len(gaps) else None
+
+        # Compute the coverage until the end point
+        last_valid_until = valid_until[after_inside-1]
+        if end_t > last_valid_until:
+            missing_coverage = (end_t - last_valid_until) if missing_coverage is None else (missing_coverage + (end_t - last_valid_until))
+
+        if missing_coverage is None:
+            coverage = 1.0
+        else:
+            coverage = 1.0 - float(missing_coverage) / (end_t - start_t)
+            if coverage < 0:
+                coverage = 0.0
+            if coverage > 1:
+                coverage = 1.0
+
+    #----------------------
+    # Weights for the AVG
+    #----------------------
+    if half_span is not None and n > 1:
+
+        # Limit the validity regions to the start and end
+        clipped_valid_from  = numpy.maximum(valid_from, start_t)
+        clipped_valid_until = numpy.minimum(valid_until, end_t)
+
+        # Weight each point up to the start of the validity of the next one (skipping negative ones)
+        weights = numpy.minimum(clipped_valid_until[:-1], clipped_valid_from[1:]) - clipped_valid_from[:-1]
+        last_weight = weights[-1]
+        weights = numpy.maximum(weights, 0)
+        last_in_slot = t[-1] <= end_t
+
+    #----------------------
+    # Operations
+    #----------------------
+    results = {}
+    for label, values in values_by_label.items():
+        if not n:
+            results[label] = {'MIN': None, 'MAX': None, '_sum': 0.0, '_n': 0}
+            continue
+        results[label] = {'MIN': float(values.min()), 'MAX': float(values.max()), '_sum': float(values.sum()), '_n': n}
+
+        if half_span is not None:
+            if n == 1:
+                results[label]['AVG'] = compute_single_Point_avg(float(values[0]), float(valid_from[0]), float(valid_until[0]), start_t, end_t)
+            else:
+                avg_sum = float(numpy.dot(weights, values[:-1]))
+                # Last step, weighting the last point with the last weight if not after the end
+                if last_in_slot:
+                    avg_sum += float(last_weight) * float(values[-1])
+                results[label]['AVG'] = avg_sum / (end_t - start_t)
+
+    return coverage, results
+
+
+def compute_1D_aggregates_vectorized(dataSeries, start_Point, end_Point, labels):
+    '''Same as compute_1D_aggregates, but using the NumPy backend on an array-backed dataSeries'''
+
+    if not isinstance(start_Point, Point):
+        raise InputException('start_Point not of type Point, got {}'.format(type(start_Point)))
+    if not isinstance(end_Point, Point):
+        raise InputException('end_Point not of type Point, got {}'.format(type(end_Point)))
+
+    t, half_span, values_by_label = get_arrays(dataSeries, labels)
+    coverage, results = compute_1D_aggregates_on_arrays(t, half_span, values_by_label, start_Point.values[0], end_Point.values[0])
+    logger.debug('compute_1D_aggregates_vectorized: coverage=%s, results=%s', coverage, results)
+    return coverage, results
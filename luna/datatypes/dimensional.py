@@ -1,6 +1,6 @@
 
 from luna import PERFORMANCE_TIPS_ENABLED
-from luna.spacetime.time import timezonize, dt_from_t, s_from_dt, TimeSlotSpan
+from luna.spacetime.time import dt_from_t, s_from_dt, TimeSlotSpan, get_tz_id, get_tz, get_tzinfo, UTC_TZ_ID
 from luna.spacetime.space import SurfaceSpan, SpaceSpan
 from luna.common.exceptions import InputException, ConsistencyException
 from datetime import datetime
@@ -746,21 +746,10 @@ class TimePoint(Point):
         # Handle timezone. If no timezone is given, no timezone is storead and UTC is assumed
         if 'tz' in kwargs:
             
-            # Validate timezone
-            timezonize(kwargs['tz'])
-
-            # For now, we store the timezone as String. Beacause it is easier and:         
-            # sys.getsizeof(timezonize('UTC')) -> 64 bytes
-            # sys.getsizeof(chronos.timezonize('Europe/Rome')) -> 64 bytes
-            # sys.getsizeof('Europe/Rome') -> 48 bytes
-            # sys.getsizeof('UTC') -> 40 bytes
-            # sys.getsizeof('America/Argentina/ComodRivadavia') -> 69 bytes
-            #
-            # The next step is to enumerate timezones from the pytz package, i.e.
-            # http://stackoverflow.com/questions/13866926/python-pytz-list-of-timezones
-            # and then of course: sys.getsizeof(1) -> 24 Bytes (Python uses float double precision everywhere..)
-            
-            self._tz = kwargs.pop('tz')
+            # We store the id of the timezone in the interned timezones registry (validated only the first time
+            # it is seen), which is a small integer shared by all the points: sys.getsizeof(1) -> 28 Bytes, but
+            # small integers are cached by Python.
+            self._tz_id = get_tz_id(kwargs.pop('tz'))
 
         # Try to get value from 't' arg, if successful set labels as well
         try:
@@ -785,10 +774,10 @@ class TimePoint(Point):
                     
                     # Check for coherence of time zone
                     try:
-                        if str(self._tz) != str(kwargs['values'][0].tzinfo):
-                            raise InputException('Error, explicitly set time zone ({}) differs from datetime timezone ({})'.format(self._tz, kwargs['values'][0].tzinfo))
+                        if self._tz_id != get_tz_id(kwargs['values'][0].tzinfo):
+                            raise InputException('Error, explicitly set time zone ({}) differs from datetime timezone ({})'.format(self.tz, kwargs['values'][0].tzinfo))
                     except AttributeError:
-                        self._tz = kwargs['values'][0].tzinfo
+                        self._tz_id = get_tz_id(kwargs['values'][0].tzinfo)
     
                 # Now convert and set labels
                 kwargs['values'] = [s_from_dt(kwargs['values'][0])]
@@ -824,15 +813,22 @@ class TimePoint(Point):
 
     @property
     def dt(self):
-        return dt_from_t(self.t, self.tz)
+        return dt_from_t(self.t, get_tzinfo(self.tz_id))
 
     @property
     def tz(self):
         try:
-            return self._tz
+            return get_tz(self._tz_id)
         except AttributeError:
             return 'UTC'
 
+    @property
+    def tz_id(self):
+        try:
+            return self._tz_id
+        except AttributeError:
+            return UTC_TZ_ID
+
 
 class SurfacePoint(Point):
     '''Point in a 2-dimensional space, the surface.'''
@@ -888,6 +884,10 @@ class TimeSlot(Slot):
         # Timezone is taken from the start
         return self.start.tz
 
+    @property
+    def tz_id(self):
+        return self.start.tz_id
+
 
 class SurfaceSlot(Slot):
     '''A slot in a 3-dimensional space, the space.'''
@@ -978,6 +978,10 @@ class PhysicalData(Coordinates, PhysicalSpace):
 
 from datetime import datetime
 from copy import copy, deepcopy
+from array import array
+from bisect import bisect_left, bisect_right
+import operator
+from itertools import islice
 
 from luna.common.exceptions import InputException, ConsistencyException
 from luna.spacetime.time import dt_from_s
@@ -1120,11 +1124,13 @@ class DataPoint(Point):
 
 class DataSlot(Slot):
     '''A Slot with some data attached, which can be both dimensional (i.e. another point) or undimensional (i.e. an image).
-    The coverage is a metric to help you understand how much you can rely on the slot's data. Read the doc for more info on the coverage concept.'''
+    The coverage is a metric to help you understand how much you can rely on the slot's data. Read the doc for more info on the coverage concept.
+    The states are the ones of the operations which need them to aggregate the slot further (i.e. the quantile sketches), by data label.'''
 
     def __init__(self, *argv, **kwargs):
         self.data     = kwargs.pop('data', None)
         self.coverage = kwargs.pop('coverage', None)
+        self.states   = kwargs.pop('states', None)
         super(DataSlot, self).__init__(*argv, **kwargs)    
 
     def __repr__(self):
@@ -1275,6 +1281,112 @@ class PhysicalDataTimeSlot(TimeSlot, PhysicalDataSlot):
     pass
 
 
+#---------------------------------------
+# Compact TimePoints
+#---------------------------------------
+
+class CompactTimePoint(TimePoint):
+    '''A TimePoint with the same API but a faster init, for the time series hot case. It does not go trough
+    the Base/Space/Coordinates/Point init chain: it just stores the time and the time zone using __slots__, while
+    the ['t'] labels list is shared among all the instances (do not modify it). It is 4-10x faster to create, but
+    as it subclasses the TimePoint (to pass the isinstance checks of the series, aggregators and storages) its
+    instances still have a __dict__ and take only about 2x less memory (see benchmarks/benchmark_points.py). To
+    cut the memory of a time series, use a ColumnarDataTimeSeries, which does not keep the points at all.'''
+
+    __slots__ = ('_t', '_tz_id')
+
+    # Shared labels and flags
+    _labels     = ['t']
+    _has_labels = True
+    _has_values = True
+
+    def __init__(self, t=None, tz=None, dt=None, labels=None, values=None, trustme=False):
+
+        # Init by labels and values (as the Spans do)
+        if values is not None:
+            if not trustme:
+                if (labels is not None and labels != ['t']) or len(values) != 1:
+                    raise InputException('{}: Got labels different than [\'t\'] or more than one value (got labels={} and values={})'.format(self.classname, labels, values))
+                if t is not None or dt is not None:
+                    raise InputException('Error: double time assignment (got values and t or dt)')
+            t = values[0]
+
+        # Init by datetime
+        if dt is not None:
+            if not trustme:
+                if t is not None:
+                    raise InputException('Error: double time assignment (got both dt and t)')
+                if not dt.tzinfo:
+                    raise InputException('Sorry, no time zone set for datetime, this is not allowed in Luna (got tzinfo={})'.format(dt.tzinfo))
+                if tz is not None and get_tz_id(tz) != get_tz_id(dt.tzinfo):
+                    raise InputException('Error, explicitly set time zone ({}) differs from datetime timezone ({})'.format(tz, dt.tzinfo))
+            if tz is None:
+                tz = dt.tzinfo
+            t = s_from_dt(dt)
+
+        # Check for everything ok
+        if not trustme:
+            if t is None:
+                raise InputException('{}: Got no values at all.'.format(self.classname))
+            if not isinstance(t, (int, float)):
+                raise InputException('Wrong time of type "{}" with value "{}", only int and float types are valid'.format(t.__class__.__name__, t))
+
+        self._t = t
+        if tz is not None:
+            self._tz_id = get_tz_id(tz)
+
+    @property
+    def t(self):
+        return self._t
+
+    @property
+    def values(self):
+        return [self._t]
+
+    @property
+    def _values(self):
+        return [self._t]
+
+
+class CompactDataTimePoint(CompactTimePoint, DataTimePoint):
+    '''A DataTimePoint with the same API but a compact memory representation (see CompactTimePoint).'''
+
+    __slots__ = ('data', '_validity_region')
+
+    def __init__(self, t=None, tz=None, dt=None, data=None, validity_region=None, labels=None, values=None, trustme=False):
+
+        # Check for presence of data
+        if not trustme and data is None:
+            raise InputException('{}: Sorry, you need to specify some date, i got None'.format(self.classname))
+
+        self.data = data
+        self._validity_region = validity_region
+
+        # Call parent Init
+        super(CompactDataTimePoint, self).__init__(t=t, tz=tz, dt=dt, labels=labels, values=values, trustme=trustme)
+
+    # Point_part (not cached, to keep the footprint small). We use a standard TimePoint
+    # so that it can be compared and subtracted with the other TimePoints.
+    @property
+    def Point_part(self):
+        try:
+            return TimePoint(labels=['t'], values=[self._t], tz=get_tzinfo(self._tz_id), trustme=True)
+        except AttributeError:
+            return TimePoint(labels=['t'], values=[self._t], trustme=True)
+
+
+class CompactPhysicalDataTimePoint(CompactDataTimePoint, PhysicalDataTimePoint):
+    '''A PhysicalDataTimePoint with the same API but a compact memory representation (see CompactTimePoint).'''
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs):
+        if not kwargs.get('trustme', False):
+            if kwargs.get('data', None) is not None and not isinstance(kwargs['data'], PhysicalData):
+                raise InputException('No PhysicalData found in data')
+        super(CompactPhysicalDataTimePoint, self).__init__(*args, **kwargs)
+
+
 
 #---------------------------------------------------
 #
@@ -1379,11 +1491,8 @@ class DataTimeSeries(TimeSeries):
         # Initialize time zone
         self._tz= tz
         
-        # Initialize index if required
-        if index:
-            self.index = {}
-        else:
-            self.index = None
+        # Index argument is kept for compatibility: lookups always bisect on the (sorted) timestamps
+        self.index = None
             
         # Handle wrapper and filtering 
         self.wrapped        = wrapped
@@ -1457,20 +1566,17 @@ class DataTimeSeries(TimeSeries):
                 if isinstance(timeData_Point_or_Slot.data, Space):
                     timeData_Point_or_Slot.data.is_compatible_with(last_timeData_Point_or_Slot.data, raises=True)
                 
-                # Check also the tz. We need to check with strings.. 
-                # TOOD: improve this check?  
-                if str(last_timeData_Point_or_Slot.tz) != str(timeData_Point_or_Slot.tz):
+                # Check also the tz (by interned id)
+                if last_timeData_Point_or_Slot.tz_id != timeData_Point_or_Slot.tz_id:
                     raise InputException('Error, you are trying to add data with timezone "{}" but I have timezone "{}"'.format(timeData_Point_or_Slot.tz, last_timeData_Point_or_Slot.tz))
         
             else:
                 
                 # Only check timezone consistence if any
-                if self._tz and timeData_Point_or_Slot.tz != self.tz:       
+                if self._tz and timeData_Point_or_Slot.tz_id != get_tz_id(self._tz):
                     raise InputException('Error, you are trying to add data with timezone "{}" but I have timezone "{}"'.format(timeData_Point_or_Slot.tz, self._tz))
 
         
-        if self.index is not None:
-            self.index[timeData_Point_or_Slot.t] = len(self._data)
           
         self._data.append(timeData_Point_or_Slot)
        
@@ -1494,14 +1600,15 @@ class DataTimeSeries(TimeSeries):
             self.wrapper_current += 1
             return self.wrapped.__next__(filter_from_dt=self.filter_from_dt, filter_to_dt=self.filter_to_dt, filter_labels=self.filter_labels, data_label_to_lazy_filter = self.data_label_to_lazy_filter,  current=self.wrapper_current-1)
         
-        # Use current of our wrapper
-        current =  current if current is not None else self.current
+        # Use current of our wrapper (if iterated by a wrapper, our own current is not set nor updated)
+        wrapper_iteration = current is not None
+        current =  current if wrapper_iteration else self.current
         
         # Iterator logic
         if current > len(self._data)-2:
             raise StopIteration
         else:
-            if not self.wrapped:
+            if not self.wrapped and not wrapper_iteration:
                 self.current += 1
 
             if filter_labels is not None or filter_from_dt is not None and self.filter_to_dt is not None or data_label_to_lazy_filter is not None:
@@ -1525,50 +1632,61 @@ class DataTimeSeries(TimeSeries):
     def next(self):
         return self.__next__()
 
+    #----------------
     # Index
-    def __getitem__(self, key):
-        
-        # Sanitize input 
-        if isinstance(key, datetime):
-            epoch_s = dt_from_s(key)
-        elif isinstance(key, int):
-            epoch_s = key
+    #----------------
+
+    @property
+    def _timestamps(self):
+        '''Sorted sequence of the epoch timestamps of the items (the start ones for TimeSlots), used as index'''
+        if self._data and isinstance(self._data[0], TimeSlot):
+            return TimestampsView(self._data, of='start')
         else:
-            raise InputException("key not int or datetime")
+            return TimestampsView(self._data)
 
-        # Use index table?
-        if self.index is not None:
-            return self._data[self.index[epoch_s]]
+    @staticmethod
+    def _key_to_epoch_s(key):
+        if isinstance(key, datetime):
+            return s_from_dt(key)
+        elif isinstance(key, (int, float)):
+            return key
+        else:
+            raise InputException("key not int, float or datetime")
 
-        # Search with bisection for the right element. Surely improvable
-        # TODO: add timestamps <-> position in list mapping table?
-        floor = 0
-        ceil  = len(self._data)-1
-        count = 0
-        
-        while True:          
-            if count > len(self._data):
-                raise Exception("Internal error when looking for the given timestamp (too many iterations)")
-            
-            # Bisection mid point:
-            middle = floor + int((ceil-floor)/2)
-            
-            # Not found?
-            if floor==ceil or floor==middle or ceil==middle:
-                raise IndexError('Timestamp {} not found in TimeSeries!'.format(key))
-            
-            # We found?
-            if self._data[floor].t == epoch_s: return self._data[floor]
-            if self._data[ceil].t == epoch_s: return self._data[ceil]
-            if self._data[middle].t == epoch_s: return self._data[middle]
-
-            if epoch_s > self._data[middle].t:
-                floor = middle
-            elif epoch_s < self._data[middle].t:
-                ceil = middle
-            else:
-                raise Exception("Internal error when looking for the given timestamp (unconsistent condition)")
-            count += 1
+    def __getitem__(self, key):
+        return self.at(key)
+
+    def at(self, key):
+        '''Get the item at the given epoch timestamp (int or float) or datetime. For TimeSlots the start is used.'''
+        epoch_s = self._key_to_epoch_s(key)
+        timestamps = self._timestamps
+        position = bisect_left(timestamps, epoch_s)
+        if position == len(timestamps) or timestamps[position] != epoch_s:
+            raise IndexError('Timestamp {} not found in TimeSeries!'.format(key))
+        return self._data[position]
+
+    def floor_item(self, key):
+        '''Get the last item at or before the given epoch timestamp or datetime, or None if there is no such item'''
+        position = bisect_right(self._timestamps, self._key_to_epoch_s(key))
+        return self._data[position-1] if position > 0 else None
+
+    def ceil_item(self, key):
+        '''Get the first item at or after the given epoch timestamp or datetime, or None if there is no such item'''
+        timestamps = self._timestamps
+        position = bisect_left(timestamps, self._key_to_epoch_s(key))
+        return self._data[position] if position < len(timestamps) else None
+
+    def nearest(self, key):
+        '''Get the item nearest to the given epoch timestamp or datetime (the previous one if in the middle),
+        or None if the TimeSeries is empty'''
+        epoch_s = self._key_to_epoch_s(key)
+        timestamps = self._timestamps
+        position = bisect_left(timestamps, epoch_s)
+        if position == len(timestamps):
+            position -= 1
+        elif position > 0 and (epoch_s - timestamps[position-1]) <= (timestamps[position] - epoch_s):
+            position -= 1
+        return self._data[position] if position >= 0 else None
             
     #------------------
     # ALPHA code
@@ -1639,19 +1757,27 @@ class DataTimeSeries(TimeSeries):
             # TODO: disable if streaming? Cannot work..
             #--------------------------------------------
             
-            # Filter on time: initialize new DataTimeSeries to return as container
-            filtered_timeSereies = DataTimeSeries(tz=self.tz, index=self.index)
-            
+            # Filter on time using binary search on the epoch timestamps, left included, right excluded (for
+            # TimeSlots: start included, end included). No datetimes are created and no items are copied.
             logger.debug('Filtering time series from %s to %s', from_dt, to_dt)
-            for item in self:
-                if isinstance(item, TimePoint):
-                    if item.dt >= from_dt and item.dt < to_dt:
-                        filtered_timeSereies.append(item)   
-                elif isinstance(item, TimeSlot):
-                    if item.start.dt >= from_dt and item.end.dt <= to_dt:
-                        filtered_timeSereies.append(item)          
-                else:
-                    raise ConsistencyException('TimeSereie with neither TimePoint or TimeSlots?! It has {}'.format(type(item)))
+            from_t = s_from_dt(from_dt) if from_dt is not None else None
+            to_t   = s_from_dt(to_dt) if to_dt is not None else None
+
+            if not self._data:
+                from_position, to_position = 0, 0
+            elif isinstance(self._data[0], TimePoint):
+                from_position = bisect_left(TimestampsView(self._data), from_t) if from_t is not None else 0
+                to_position   = bisect_left(TimestampsView(self._data), to_t) if to_t is not None else len(self._data)
+            elif isinstance(self._data[0], TimeSlot):
+                from_position = bisect_left(TimestampsView(self._data, of='start'), from_t) if from_t is not None else 0
+                to_position   = bisect_right(TimestampsView(self._data, of='end'), to_t) if to_t is not None else len(self._data)
+            else:
+                raise ConsistencyException('TimeSereie with neither TimePoint or TimeSlots?! It has {}'.format(type(self._data[0])))
+            to_position = max(from_position, to_position)
+
+            # Initialize new DataTimeSeries to return as container, as a view on our data
+            filtered_timeSereies = DataTimeSeries(tz=self.tz)
+            filtered_timeSereies._data = SequenceSliceView(self._data, from_position, to_position)
             return filtered_timeSereies
                    
         else:
@@ -1661,6 +1787,491 @@ class DataTimeSeries(TimeSeries):
     def lazy_filter_data_label(self,label):
         return self.__class__(wrapped=self, data_label_to_lazy_filter=label)
 
+
+    #----------------
+    # Bulk init
+    #----------------
+
+    @staticmethod
+    def _validate_arrays(t, values_by_label, tz, point_type, validity_region, as_arrays=True):
+        '''Validate (once, over the entire batch) timestamps and values for the bulk init. Returns the timestamps
+        and the values columns as arrays of floats (or as lists keeping their types if as_arrays is not set),
+        together with the labels and the class to use for the data.'''
+
+        # Check the point type
+        if not (isinstance(point_type, type) and issubclass(point_type, TimePoint) and issubclass(point_type, DataPoint)):
+            raise InputException('point_type must be a DataTimePoint class, got {}'.format(point_type))
+
+        # Check the time zone
+        if tz is not None:
+            get_tz_id(tz)
+
+        # Check the validity region (we need the non-anchored one, which is the same for all the DataTimePoints)
+        if validity_region is not None:
+            if not isinstance(validity_region, TimeSlot):
+                raise InputException('validity_region must be a TimeSlot, got {}'.format(type(validity_region)))
+            if validity_region.anchor is not None:
+                validity_region = validity_region.__class__(span=validity_region.span)
+
+        # Check the timestamps, as a whole
+        t_list = t.tolist() if hasattr(t, 'tolist') else list(t)
+        try:
+            t = array('d', t_list)
+        except TypeError:
+            raise InputException('Timestamps must be int or float')
+        if not all(map(operator.lt, t, islice(t, 1, None))):
+            position = next(i for i in range(1, len(t)) if not t[i-1] < t[i])
+            raise InputException('Timestamps are not strictly increasing: got {} after {} at position {}'.format(t[position], t[position-1], position))
+        if not as_arrays:
+            t = t_list
+
+        # Check the values, as a whole
+        labels  = []
+        columns = []
+        for label, values in (values_by_label.items() if hasattr(values_by_label, 'items') else values_by_label):
+            values = values.tolist() if hasattr(values, 'tolist') else list(values)
+            try:
+                column = array('d', values)
+            except TypeError:
+                raise InputException('Only int and float values are supported, got something else for label "{}"'.format(label))
+            if not as_arrays:
+                column = values
+            if len(column) != len(t):
+                raise InputException('Got {} values for label "{}" but {} timestamps'.format(len(column), label, len(t)))
+            labels.append(label)
+            columns.append(column)
+
+        # Check the labels, once, by initializing a (validated) prototype data object
+        Data_class = point_type.data_type if isinstance(getattr(point_type, 'data_type', None), type) else Point
+        if t:
+            Data_class(labels=labels, values=[column[0] for column in columns])
+
+        return t, labels, columns, Data_class, validity_region
+
+    @classmethod
+    def from_arrays(cls, t, values_by_label, tz=None, point_type=DataTimePoint, validity_region=None):
+        '''Create a DataTimeSeries in bulk, from an array of timestamps and an array of values for each data label.
+        The values_by_label can be a dict (label->values) or a list of (label, values) pairs, to fix the order of the
+        labels. The ordering of the timestamps and the compatibility of the labels are validated only once, over the
+        entire batch, and the values keep their types. The DataTimePoints are not created in the bulk init, but
+        only when accessed (see BulkDataTimePoints). Use ColumnarDataTimeSeries.from_arrays() to store the values
+        as floats in arrays, without ever keeping the DataTimePoints.'''
+
+        t, labels, columns, Data_class, validity_region = cls._validate_arrays(t, values_by_label, tz, point_type, validity_region, as_arrays=False)
+
+        dataTimeSeries = cls(tz=tz)
+        if not t:
+            return dataTimeSeries
+
+        # The DataTimePoints are created from the (validated) first one, only when accessed
+        kwargs = {'validity_region': validity_region, 'trustme': True}
+        if tz is not None:
+            kwargs['tz'] = tz
+        prototype = point_type(t=t[0], data=Data_class(labels=labels, values=[column[0] for column in columns], trustme=True), **kwargs)
+        dataTimeSeries._data = BulkDataTimePoints(prototype, t, columns, kwargs)
+        return dataTimeSeries
+
+    @classmethod
+    def from_records(cls, records, labels, tz=None, point_type=DataTimePoint, validity_region=None):
+        '''Create a DataTimeSeries in bulk from an iterable of records, where every record is a tuple of
+        a timestamp followed by the values for the given labels: (t, value_label_1, value_label_2, ...)'''
+
+        # Transpose records in columns
+        columns = list(zip(*records))
+        if not columns:
+            columns = [[] for _ in range(len(labels)+1)]
+        if len(columns) != len(labels)+1:
+            raise InputException('Records must have a timestamp and a value for each one of the {} labels, got {} items'.format(len(labels), len(columns)))
+
+        return cls.from_arrays(t=columns[0], values_by_label=list(zip(labels, columns[1:])), tz=tz,
+                               point_type=point_type, validity_region=validity_region)
+
+
+#---------------------------------------------
+# ColumnarDataTimeSeries
+#---------------------------------------------
+
+class SequenceSliceView(object):
+    '''Zero-copy view over a slice (from start, included, to stop, excluded) of a sequence (a list or an array),
+    which is shared with the owner. The view is copy-on-write: on append, the slice is copied and from then on
+    the view owns its own items. Used by the DataTimeSeries filtering.'''
+
+    def __init__(self, items, start, stop):
+        # If slicing a view, point directly to the original items
+        if isinstance(items, SequenceSliceView):
+            start += items.start
+            stop  += items.start
+            items  = items.items
+        self.items = items
+        self.start = start
+        self.stop  = stop
+        self.owned = False
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __bool__(self):
+        return self.stop > self.start
+
+    # Python 2.x
+    def __nonzero__(self):
+        return self.__bool__()
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            start, stop, step = position.indices(len(self))
+            if step == 1:
+                return SequenceSliceView(self, start, max(start, stop))
+            return [self.items[self.start+i] for i in range(start, stop, step)]
+        if position < 0:
+            position += len(self)
+        if position < 0 or position >= len(self):
+            raise IndexError('{} index out of range'.format(self.__class__.__name__))
+        return self.items[self.start+position]
+
+    def __iter__(self):
+        if isinstance(self.items, BulkDataTimePoints):
+            # Do not create the DataTimePoints before the start
+            return (self.items[i] for i in range(self.start, self.stop))
+        return islice(self.items, self.start, self.stop)
+
+    def __eq__(self, other):
+        try:
+            if len(self) != len(other):
+                return False
+        except TypeError:
+            return False
+        for this_item, other_item in zip(self, other):
+            if this_item != other_item:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def append(self, item):
+        # Copy on write
+        if not self.owned:
+            self.items = self.items[self.start:self.stop]
+            self.start = 0
+            self.stop  = len(self.items)
+            self.owned = True
+        self.items.append(item)
+        self.stop += 1
+
+
+class TimestampsView(object):
+    '''Read-only sequence of the epoch timestamps (in seconds) of the items of a DataTimeSeries, to bisect on time
+    without creating any datetime. For TimeSlots, the timestamps of the start (or of the end) are used.'''
+
+    def __init__(self, items, of=None):
+        self.items = items
+        self.of    = of
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, position):
+        if self.of == 'start':
+            return self.items[position].start.t
+        elif self.of == 'end':
+            return self.items[position].end.t
+        else:
+            return self.items[position].t
+
+
+class BulkDataTimePoints(object):
+    '''Sequence of the DataTimePoints of a DataTimeSeries created in bulk from arrays (see DataTimeSeries.from_arrays()).
+    The DataTimePoints are cloned from a prototype (the first one, sharing its labels, timezone and validity region)
+    only when they are first accessed, and then kept. On append all of them are created, as in a list.'''
+
+    def __init__(self, prototype, t, columns, kwargs):
+        self.t       = t
+        self.columns = columns
+        self.kwargs  = kwargs
+        self.items   = [None] * len(t)
+        self.items[0] = prototype
+        self.created  = 1
+
+        # Standard DataTimePoints are cloned through their attributes, the others (i.e. compact ones) are initialized
+        prototype_dict = getattr(prototype, '__dict__', {})
+        prototype_data_dict = getattr(prototype.data, '__dict__', {})
+        if '_values' in prototype_dict and '_values' in prototype_data_dict:
+            self.prototype_dict      = prototype_dict
+            self.prototype_data_dict = prototype_data_dict
+        else:
+            self.prototype_dict = self.prototype_data_dict = None
+
+    def _create(self, position):
+        prototype = self.items[0]
+        values = [column[position] for column in self.columns]
+        if self.prototype_dict is None:
+            data = prototype.data.__class__(labels=prototype.data.labels, values=values, trustme=True)
+            dataTimePoint = prototype.__class__(t=self.t[position], data=data, **self.kwargs)
+        else:
+            data = object.__new__(prototype.data.__class__)
+            data.__dict__ = self.prototype_data_dict.copy()
+            data._values  = values
+            dataTimePoint = object.__new__(prototype.__class__)
+            dataTimePoint.__dict__ = self.prototype_dict.copy()
+            dataTimePoint._values  = [self.t[position]]
+            dataTimePoint.data     = data
+        self.items[position] = dataTimePoint
+        self.created += 1
+        return dataTimePoint
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return len(self.items) > 0
+
+    # Python 2.x
+    def __nonzero__(self):
+        return self.__bool__()
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        item = self.items[position]
+        if item is None:
+            item = self._create(position if position >= 0 else position + len(self.items))
+        return item
+
+    def __iter__(self):
+        for i in range(len(self.items)):
+            yield self[i]
+
+    def __eq__(self, other):
+        try:
+            if len(self) != len(other):
+                return False
+        except TypeError:
+            return False
+        for this_item, other_item in zip(self, other):
+            if this_item != other_item:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def append(self, item):
+        # Create all the DataTimePoints, as from now on they are just a list
+        if self.created < len(self.items):
+            for i in range(len(self.items)):
+                self[i]
+        self.items.append(item)
+        self.created += 1
+
+
+class ColumnarDataTimePoints(object):
+    '''Sequence of the DataTimePoints of a ColumnarDataTimeSeries. The DataTimePoints are not stored but
+    created on the fly (as lightweight views over the columns) only when they are accessed.'''
+
+    def __init__(self, series):
+        self.series = series
+
+    def __len__(self):
+        return len(self.series._t)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    # Python 2.x
+    def __nonzero__(self):
+        return self.__bool__()
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.series._get_DataTimePoint(i) for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if position < 0 or position >= len(self):
+            raise IndexError('{} index out of range'.format(self.__class__.__name__))
+        return self.series._get_DataTimePoint(position)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.series._get_DataTimePoint(i)
+
+    def __eq__(self, other):
+        try:
+            if len(self) != len(other):
+                return False
+        except TypeError:
+            return False
+        for this_item, other_item in zip(self, other):
+            if this_item != other_item:
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+
+class ColumnarDataTimeSeries(DataTimeSeries):
+    '''A DataTimeSeries of DataTimePoints carrying dimensional data, stored column-wise: the timestamps are stored
+    in a contiguous array of floats and every data label in its own array of floats. The DataTimePoint class, the data
+    labels, the time zone and the validity region are stored only once for the entire series, as they have to be the
+    same for all the DataTimePoints. DataTimePoints are re-created on the fly (as views) only when they are accessed,
+    by iterating or indexing. DataTimeSlots are not supported.'''
+
+    def __init__(self, *args, **kwargs):
+
+        # Call parent init
+        super(ColumnarDataTimeSeries, self).__init__(*args, **kwargs)
+
+        # Columns
+        self._t       = array('d')
+        self._columns = []
+
+        # Metadata shared by all the DataTimePoints
+        self._DataTimePoint_class = None
+        self._Data_class          = None
+        self._data_labels         = None
+        self._points_tz_id        = None
+        self._validity_region     = None
+
+        # The DataTimePoints, created only on access
+        self._data = ColumnarDataTimePoints(self)
+
+    @property
+    def tz(self):
+        if self._t:
+            return get_tz(self._points_tz_id) if self._points_tz_id is not None else 'UTC'
+        else:
+            return self._tz
+
+    def _get_DataTimePoint(self, position):
+        '''Create the DataTimePoint at the given position (the "view")'''
+        data = self._Data_class(labels  = self._data_labels,
+                                values  = [column[position] for column in self._columns],
+                                trustme = True)
+        kwargs = {'t': self._t[position], 'data': data, 'validity_region': self._validity_region, 'trustme': True}
+        if self._points_tz_id is not None:
+            kwargs['tz'] = get_tzinfo(self._points_tz_id)
+        return self._DataTimePoint_class(**kwargs)
+
+    def append(self, dataTimePoint, trust_me=False):
+        '''You can append DataTimePoints carrying dimensional data (i.e. PhysicalData)'''
+
+        # Get the validity region (the non-anchored one, which is the same for all the DataTimePoints)
+        validity_region = dataTimePoint._validity_region if isinstance(dataTimePoint, DataPoint) else None
+        if validity_region is not None and validity_region.anchor is not None:
+            validity_region = validity_region.__class__(span=validity_region.span)
+
+        if not trust_me:
+
+            # Check for DataTimePoints with dimensional data (which lives in a Space)
+            if not isinstance(dataTimePoint, TimePoint) or not isinstance(dataTimePoint, DataPoint):
+                raise InputException('{}: Sorry, only DataTimePoints are supported (got {})'.format(self.__class__.__name__, type(dataTimePoint)))
+            if not isinstance(dataTimePoint.data, Space):
+                raise InputException('{}: Sorry, only dimensional data is supported (got {})'.format(self.__class__.__name__, type(dataTimePoint.data)))
+
+            if self._t:
+
+                # Check that the item being appended is the same type of the already added ones
+                if not isinstance(dataTimePoint, self._DataTimePoint_class):
+                    raise InputException("Wrong data Type")
+
+                # Check that we are adding time-ordered data
+                if dataTimePoint.t <= self._t[-1]:
+                    raise InputException("Sorry, you are trying to append data with a timestamp which preceeds (or is equal to) the last one stored. As last I have {}, and I got {}"
+                                         .format(dt_from_s(self._t[-1], tz=self.tz), dt_from_s(dataTimePoint.t, tz=self.tz)))
+
+                # Check data compatibility
+                if not isinstance(dataTimePoint.data, self._Data_class) or dataTimePoint.data.labels != self._data_labels:
+                    raise InputException('{}: Error, data labels {} are not compatible with labels {}'.format(self.__class__.__name__, dataTimePoint.data.labels, self._data_labels))
+
+                # Check the tz
+                if (self._points_tz_id if self._points_tz_id is not None else UTC_TZ_ID) != dataTimePoint.tz_id:
+                    raise InputException('Error, you are trying to add data with timezone "{}" but I have timezone "{}"'.format(dataTimePoint.tz, self.tz))
+
+                # Check the validity region, which is stored only once
+                if (validity_region is None) != (self._validity_region is None) or (validity_region is not None and validity_region.span != self._validity_region.span):
+                    raise InputException('{}: Error, all the DataTimePoints must have the same validity region'.format(self.__class__.__name__))
+
+            else:
+
+                # Only check timezone consistence if any
+                if self._tz and dataTimePoint.tz_id != get_tz_id(self._tz):
+                    raise InputException('Error, you are trying to add data with timezone "{}" but I have timezone "{}"'.format(dataTimePoint.tz, self._tz))
+
+        # Convert the values (this will raise on non-numeric values, before touching the columns)
+        try:
+            values = array('d', dataTimePoint.data.values)
+        except TypeError:
+            raise InputException('{}: only int and float data values can be stored, got {}'.format(self.__class__.__name__, dataTimePoint.data.values))
+
+        # If first DataTimePoint, set the metadata and the columns
+        if not self._t:
+            self._DataTimePoint_class = dataTimePoint.__class__
+            self._Data_class          = dataTimePoint.data.__class__
+            self._data_labels         = dataTimePoint.data.labels
+            self._points_tz_id        = getattr(dataTimePoint, '_tz_id', None)
+            self._validity_region     = validity_region
+            self._columns             = [array('d') for _ in self._data_labels]
+
+        # Append
+        self._t.append(dataTimePoint.t)
+        for i, column in enumerate(self._columns):
+            column.append(values[i])
+
+    @classmethod
+    def from_arrays(cls, t, values_by_label, tz=None, point_type=DataTimePoint, validity_region=None):
+        '''Create a ColumnarDataTimeSeries in bulk, from an array of timestamps and an array of values for each
+        data label. Validated arrays are used directly as columns, without creating any DataTimePoint.'''
+
+        t, labels, columns, Data_class, validity_region = cls._validate_arrays(t, values_by_label, tz, point_type, validity_region)
+
+        dataTimeSeries = cls(tz=tz)
+        if t:
+            dataTimeSeries._DataTimePoint_class = point_type
+            dataTimeSeries._Data_class          = Data_class
+            dataTimeSeries._data_labels         = labels
+            dataTimeSeries._points_tz_id        = get_tz_id(tz) if tz is not None else None
+            dataTimeSeries._validity_region     = validity_region
+            dataTimeSeries._t                   = t
+            dataTimeSeries._columns             = columns
+        return dataTimeSeries
+
+    # Index (lookups are handled by the parent, bisecting on the timestamps column)
+    @property
+    def _timestamps(self):
+        return self._t
+
+    #----------------
+    # Filtering
+    #----------------
+
+    def filter(self, from_dt=None, to_dt=None, labels=None, trustme=False):
+
+        # Filtering on labels is handled by the parent (wrapping)
+        if labels is not None:
+            return super(ColumnarDataTimeSeries, self).filter(from_dt=from_dt, to_dt=to_dt, labels=labels, trustme=trustme)
+
+        # Sanity checks..
+        if not trustme:
+            if from_dt is None and to_dt is None:
+                raise InputException('At least one argument of the three is required: from_dt, to_dt, labels')
+
+        # Filter on time using the timestamps column (left included, right excluded). Columns are shared (as views).
+        from_position = bisect_left(self._t, s_from_dt(from_dt)) if from_dt is not None else 0
+        to_position   = bisect_left(self._t, s_from_dt(to_dt)) if to_dt is not None else len(self._t)
+
+        filtered_timeSeries = self.__class__(tz=self.tz)
+        if from_position < to_position:
+            filtered_timeSeries._DataTimePoint_class = self._DataTimePoint_class
+            filtered_timeSeries._Data_class          = self._Data_class
+            filtered_timeSeries._data_labels         = self._data_labels
+            filtered_timeSeries._points_tz_id        = self._points_tz_id
+            filtered_timeSeries._validity_region     = self._validity_region
+            filtered_timeSeries._t                   = SequenceSliceView(self._t, from_position, to_position)
+            filtered_timeSeries._columns             = [SequenceSliceView(column, from_position, to_position) for column in self._columns]
+        return filtered_timeSeries
+
+
 #class PhysicalDataTimeSeries(object):
 #    '''An ordered serie of PhysicalDataTimePoints or PhysicalDataTimeSlots'''
 #    # TODO: really implement this one..?
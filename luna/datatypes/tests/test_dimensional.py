@@ -1,7 +1,12 @@
 import unittest
 from luna.datatypes.dimensional import *
 from luna.common.exceptions import InputException
-from luna.spacetime.time import dt, TimeSlotSpan
+from luna.spacetime.time import dt, dt_from_s, TimeSlotSpan
+import pytz
+try:
+    import zoneinfo
+except ImportError:
+    zoneinfo = None
 
 class test_dimensional(unittest.TestCase):
 
@@ -272,6 +277,25 @@ class test_dimensional(unittest.TestCase):
         self.assertEqual(timePoint.dt, timestamp_dt)
         self.assertEqual(str(timePoint.tz), 'UTC')
 
+        # Timezones are interned: the same id whatever their representation
+        self.assertEqual(TimePoint(t=60, tz='Europe/Rome').tz_id, TimePoint(dt=dt(2015,2,27,13,54,32, tz='Europe/Rome')).tz_id)
+        self.assertEqual(TimePoint(t=60, tz=timestamp_dt.tzinfo).tz_id, TimePoint(t=60).tz_id)
+        self.assertEqual(TimePoint(t=60, tz=timestamp_dt.tzinfo).tz, 'UTC')
+        self.assertNotEqual(TimePoint(t=60, tz='Europe/Rome').tz_id, TimePoint(t=60).tz_id)
+        with self.assertRaises(Exception):
+            _ = TimePoint(t=60, tz='Europe/Nowhere')
+
+        # Timezones which are not named pytz ones keep their tzinfo object (also on the compact TimePoints)
+        timezones = [pytz.FixedOffset(60)]
+        if zoneinfo:
+            timezones.append(zoneinfo.ZoneInfo('Europe/Rome'))
+        for tzinfo in timezones:
+            timestamp_dt = datetime(2020,7,1,tzinfo=tzinfo)
+            for timePoint in [TimePoint(dt=timestamp_dt), CompactTimePoint(dt=timestamp_dt)]:
+                self.assertEqual(timePoint.dt, timestamp_dt)
+                self.assertEqual(str(timePoint.dt), '2020-07-01 00:00:00+{}'.format('01:00' if tzinfo is timezones[0] else '02:00'))
+                self.assertIs(timePoint.tz, tzinfo)
+
 
     def test_SpacePoint(self):
         pass
@@ -555,6 +579,39 @@ class test_dataTimePoint_DataTimeSeries(unittest.TestCase):
         for i in range(10000):
             self.assertEqual(self.ref_dataTimeSeries_2[1000000000 + (i*60)].t, 1000000000 + (i*60))
 
+        # Test float and datetime keys, and not found
+        self.assertEqual(self.ref_dataTimeSeries_1[1000000060.0].t, 1000000060)
+        self.assertEqual(self.ref_dataTimeSeries_1[dt(2001,9,9,3,47,40, tz='Europe/Rome')].t, 1000000060)
+        self.assertEqual(self.ref_dataTimeSeries_1.at(1000000000 + (9999*60)).t, 1000000000 + (9999*60))
+        with self.assertRaises(IndexError):
+            self.ref_dataTimeSeries_1[1000000001]
+        with self.assertRaises(IndexError):
+            self.ref_dataTimeSeries_1[999999940]
+        with self.assertRaises(IndexError):
+            DataTimeSeries()[1000000000]
+        with self.assertRaises(InputException):
+            self.ref_dataTimeSeries_1['1000000000']
+
+    def test_nearest_lookups(self):
+        dataTimeSeries = self.ref_dataTimeSeries_1
+
+        # Floor and ceil
+        self.assertEqual(dataTimeSeries.floor_item(1000000059).t, 1000000000)
+        self.assertEqual(dataTimeSeries.floor_item(1000000060).t, 1000000060)
+        self.assertEqual(dataTimeSeries.floor_item(999999999), None)
+        self.assertEqual(dataTimeSeries.ceil_item(1000000001).t, 1000000060)
+        self.assertEqual(dataTimeSeries.ceil_item(1000000060).t, 1000000060)
+        self.assertEqual(dataTimeSeries.ceil_item(1000000000 + (9999*60) + 1), None)
+        self.assertEqual(dataTimeSeries.floor_item(dt(2001,9,9,3,47,50, tz='Europe/Rome')).t, 1000000060)
+
+        # Nearest (the previous one if in the middle)
+        self.assertEqual(dataTimeSeries.nearest(1000000029).t, 1000000000)
+        self.assertEqual(dataTimeSeries.nearest(1000000030).t, 1000000000)
+        self.assertEqual(dataTimeSeries.nearest(1000000031).t, 1000000060)
+        self.assertEqual(dataTimeSeries.nearest(0).t, 1000000000)
+        self.assertEqual(dataTimeSeries.nearest(2000000000).t, 1000000000 + (9999*60))
+        self.assertEqual(DataTimeSeries().nearest(0), None)
+
     def test_append_consistency(self):
         
         data1 = Point(labels=["x","y", "z"], values=[1,2,3])
@@ -572,6 +629,34 @@ class test_dataTimePoint_DataTimeSeries(unittest.TestCase):
         with self.assertRaises(InputException):
             dataTimeSeries.append(dataTimePoint3)
 
+        # Timezones are compared whatever their representation
+        dataTimeSeries.append(DataTimePoint(t=240, data=data1, tz=dt(2015,2,27,13,54,32, tz='Europe/Rome').tzinfo))
+        self.assertEqual(dataTimeSeries.tz, 'Europe/Rome')
+
+    def test_filter(self):
+        from_dt = dt(2001,9,9,3,46,40, tz='Europe/Rome') + TimeSlotSpan('5m') # 1000000300
+        to_dt   = from_dt + TimeSlotSpan('10m')
+
+        for dataTimeSeries in [self.ref_dataTimeSeries_1, self.ref_dataTimeSeries_2]:
+            filtered_dataTimeSeries = dataTimeSeries.filter(from_dt=from_dt, to_dt=to_dt)
+            self.assertEqual([item.t for item in filtered_dataTimeSeries], [1000000300 + (i*60) for i in range(10)])
+            self.assertEqual(filtered_dataTimeSeries[1000000300+540].t, 1000000300+540)
+
+            # Items are shared with the parent (view), and not copied
+            self.assertTrue(filtered_dataTimeSeries._data[0] is dataTimeSeries._data[5])
+
+            # Filtering a filtered one and open intervals
+            self.assertEqual(len(filtered_dataTimeSeries.filter(from_dt=from_dt + TimeSlotSpan('5m'), to_dt=to_dt + TimeSlotSpan('1h'))), 5)
+            self.assertEqual(len(dataTimeSeries.filter(from_dt=dt_from_s(1000000000 + (9990*60), tz='Europe/Rome'))), 10)
+            self.assertEqual(len(dataTimeSeries.filter(to_dt=from_dt)), 5)
+            self.assertEqual(len(dataTimeSeries.filter(from_dt=to_dt, to_dt=from_dt)), 0)
+
+            # Appending to the filtered does not touch the parent (copy on write)
+            filtered_dataTimeSeries = dataTimeSeries.filter(from_dt=from_dt, to_dt=to_dt)
+            filtered_dataTimeSeries.append(DataTimePoint(t=1000000300+3600, tz="Europe/Rome", data=Point(labels=["power_W", "current_A", "voltage_V"], values=[1,2,3])))
+            self.assertEqual(len(filtered_dataTimeSeries), 11)
+            self.assertEqual(dataTimeSeries._data[15].t, 1000000300+600)
+            self.assertEqual(len(dataTimeSeries), 10000)
 
     def tearDown(self):
         pass
@@ -606,8 +691,217 @@ class test_dataTimeSlot_DataTimeSeries(unittest.TestCase):
             
         self.assertEqual(dataTimeSeries.tz, "Europe/Rome")
 
+        # Test filter (start included, end included)
+        filtered_dataTimeSeries = dataTimeSeries.filter(from_dt = dt_from_s(1000000080, tz="Europe/Rome"),
+                                                        to_dt   = dt_from_s(1000000260, tz="Europe/Rome"))
+        self.assertEqual([item.start.t for item in filtered_dataTimeSeries], [1000000080, 1000000140, 1000000200])
+
+        # Test lookups (on the start)
+        self.assertEqual(dataTimeSeries[1000000080].start.t, 1000000080)
+        self.assertEqual(dataTimeSeries.floor_item(1000000100).start.t, 1000000080)
+        self.assertEqual(dataTimeSeries.ceil_item(1000000100).start.t, 1000000140)
+
  
 
+class test_compactTimePoints(unittest.TestCase):
+
+    def test_CompactTimePoint(self):
+
+        timePoint = TimePoint(t=1436021994, tz='Europe/Rome')
+        compactTimePoint = CompactTimePoint(t=1436021994, tz='Europe/Rome')
+
+        # Same API
+        self.assertTrue(isinstance(compactTimePoint, TimePoint))
+        self.assertEqual(compactTimePoint.t, timePoint.t)
+        self.assertEqual(compactTimePoint.dt, timePoint.dt)
+        self.assertEqual(compactTimePoint.tz, timePoint.tz)
+        self.assertEqual(compactTimePoint.labels, timePoint.labels)
+        self.assertEqual(compactTimePoint.values, timePoint.values)
+        self.assertTrue(compactTimePoint < CompactTimePoint(t=1436021995))
+        self.assertEqual(CompactTimePoint(t=60).tz, 'UTC')
+        self.assertEqual(CompactTimePoint(dt=dt(2015,7,4,16,59,54, tz='Europe/Rome')), compactTimePoint)
+
+        # Shared labels, no per-instance dict
+        self.assertTrue(compactTimePoint.labels is CompactTimePoint(t=60).labels)
+        self.assertFalse(compactTimePoint.__dict__)
+
+        # Wrong inits
+        with self.assertRaises(InputException):
+            CompactTimePoint()
+        with self.assertRaises(InputException):
+            CompactTimePoint(t='hey!')
+        with self.assertRaises(Exception):
+            CompactTimePoint(t=60, tz='Europe/Nowhere')
+
+    def test_CompactPhysicalDataTimePoint(self):
+
+        data = PhysicalData(labels=['temperature_C'], values=[20.5])
+        dataTimePoint = PhysicalDataTimePoint(t=1436021994, tz='Europe/Rome', data=data, validity_region=TimeSlot(span='1m'))
+        compactDataTimePoint = CompactPhysicalDataTimePoint(t=1436021994, tz='Europe/Rome', data=data, validity_region=TimeSlot(span='1m'))
+
+        # Same API
+        self.assertTrue(isinstance(compactDataTimePoint, PhysicalDataTimePoint))
+        self.assertEqual(compactDataTimePoint, dataTimePoint)
+        self.assertEqual(compactDataTimePoint.data.content, {'temperature_C': 20.5})
+        self.assertEqual(compactDataTimePoint.Point_part, dataTimePoint.Point_part)
+        self.assertEqual(compactDataTimePoint.validity_region.start, TimePoint(t=1436021964))
+        self.assertEqual(compactDataTimePoint.validity_region.end, TimePoint(t=1436022024))
+
+        # Can be used in a DataTimeSeries
+        dataTimeSeries = DataTimeSeries()
+        dataTimeSeries.append(compactDataTimePoint)
+        dataTimeSeries.append(CompactPhysicalDataTimePoint(t=1436022054, tz='Europe/Rome', data=data))
+        self.assertEqual(len(dataTimeSeries), 2)
+
+        # Data is required and must be PhysicalData
+        with self.assertRaises(InputException):
+            CompactPhysicalDataTimePoint(t=1436021994)
+        with self.assertRaises(InputException):
+            CompactPhysicalDataTimePoint(t=1436021994, data='string_data')
+
+
+class test_dataTimePoint_ColumnarDataTimeSeries(unittest.TestCase):
+
+    def setUp(self):
+
+        # Reference DataTimeSeries and ColumnarDataTimeSeries with the same content
+        self.ref_dataTimeSeries = DataTimeSeries()
+        self.ref_columnarDataTimeSeries = ColumnarDataTimeSeries()
+        validity_region = TimeSlot(span='1m')
+        for i in range(1000):
+            data = PhysicalData(labels=["power_W", "voltage_V"], values=[113.67+i, 23.76+i])
+            dataTimePoint = PhysicalDataTimePoint(t = 1000000000 + (i*60), tz="Europe/Rome", data=data, validity_region=validity_region)
+            self.ref_dataTimeSeries.append(dataTimePoint)
+            self.ref_columnarDataTimeSeries.append(dataTimePoint)
+
+    def test_storage(self):
+        self.assertEqual(len(self.ref_columnarDataTimeSeries), 1000)
+        self.assertEqual(len(self.ref_columnarDataTimeSeries._t), 1000)
+        self.assertEqual(len(self.ref_columnarDataTimeSeries._columns), 2)
+        self.assertEqual(self.ref_columnarDataTimeSeries._columns[1][10], 23.76+10)
+        self.assertEqual(self.ref_columnarDataTimeSeries.tz, "Europe/Rome")
+        self.assertEqual(self.ref_columnarDataTimeSeries.data.labels, ["power_W", "voltage_V"])
+
+    def test_iterator(self):
+        for i, dataTimePoint in enumerate(self.ref_columnarDataTimeSeries):
+            self.assertTrue(isinstance(dataTimePoint, PhysicalDataTimePoint))
+            self.assertEqual(dataTimePoint.t, 1000000000 + (i*60))
+            self.assertEqual(dataTimePoint.tz, "Europe/Rome")
+            self.assertEqual(dataTimePoint.data.content, {"power_W": 113.67+i, "voltage_V": 23.76+i})
+            self.assertEqual(dataTimePoint.validity_region.start.t, 1000000000 + (i*60) - 30)
+        self.assertEqual(self.ref_columnarDataTimeSeries, self.ref_dataTimeSeries)
+
+    def test_index(self):
+        for i in range(1000):
+            self.assertEqual(self.ref_columnarDataTimeSeries[1000000000 + (i*60)].t, 1000000000 + (i*60))
+        with self.assertRaises(IndexError):
+            self.ref_columnarDataTimeSeries[1000000001]
+
+    def test_filter(self):
+        from_dt = dt(2001,9,9,3,46,40, tz='Europe/Rome') # 1000000000
+        from_dt = from_dt + TimeSlotSpan('5m')
+        to_dt   = from_dt + TimeSlotSpan('10m')
+        filtered_columnarDataTimeSeries = self.ref_columnarDataTimeSeries.filter(from_dt=from_dt, to_dt=to_dt)
+        filtered_dataTimeSeries = self.ref_dataTimeSeries.filter(from_dt=from_dt, to_dt=to_dt)
+        self.assertEqual(len(filtered_columnarDataTimeSeries), 10)
+        self.assertEqual(list(filtered_columnarDataTimeSeries), list(filtered_dataTimeSeries))
+
+    def test_append_consistency(self):
+
+        columnarDataTimeSeries = ColumnarDataTimeSeries()
+        columnarDataTimeSeries.append(DataTimePoint(t=60, data=Point(labels=["x","y"], values=[1,2]), tz="Europe/Rome"))
+
+        # Not ordered
+        with self.assertRaises(InputException):
+            columnarDataTimeSeries.append(DataTimePoint(t=60, data=Point(labels=["x","y"], values=[1,2]), tz="Europe/Rome"))
+        # Different time zone
+        with self.assertRaises(InputException):
+            columnarDataTimeSeries.append(DataTimePoint(t=120, data=Point(labels=["x","y"], values=[1,2]), tz="UTC"))
+        # Different labels
+        with self.assertRaises(InputException):
+            columnarDataTimeSeries.append(DataTimePoint(t=120, data=Point(labels=["x","z"], values=[1,2]), tz="Europe/Rome"))
+        # Different validity region
+        with self.assertRaises(InputException):
+            columnarDataTimeSeries.append(DataTimePoint(t=120, data=Point(labels=["x","y"], values=[1,2]), tz="Europe/Rome", validity_region=TimeSlot(span='1m')))
+        # Non-dimensional data
+        with self.assertRaises(InputException):
+            ColumnarDataTimeSeries().append(DataTimePoint(t=120, data='string_data'))
+        self.assertEqual(len(columnarDataTimeSeries), 1)
+
+
+class test_DataTimeSeries_bulk_init(unittest.TestCase):
+
+    def setUp(self):
+
+        # Reference DataTimeSeries
+        self.t = [1000000000 + (i*60) for i in range(1000)]
+        self.power_W   = [113.67+i for i in range(1000)]
+        self.voltage_V = [23.76+i for i in range(1000)]
+        self.ref_dataTimeSeries = DataTimeSeries()
+        validity_region = TimeSlot(span='1m')
+        for i in range(1000):
+            data = PhysicalData(labels=["power_W", "voltage_V"], values=[self.power_W[i], self.voltage_V[i]])
+            self.ref_dataTimeSeries.append(PhysicalDataTimePoint(t=self.t[i], tz="Europe/Rome", data=data, validity_region=validity_region))
+
+    def test_from_arrays(self):
+        for DataTimeSeries_class in [DataTimeSeries, ColumnarDataTimeSeries]:
+            dataTimeSeries = DataTimeSeries_class.from_arrays(t = self.t,
+                                                              values_by_label = [("power_W", self.power_W), ("voltage_V", self.voltage_V)],
+                                                              tz = "Europe/Rome",
+                                                              point_type = PhysicalDataTimePoint,
+                                                              validity_region = TimeSlot(span='1m'))
+            self.assertTrue(isinstance(dataTimeSeries, DataTimeSeries_class))
+            self.assertEqual(len(dataTimeSeries), 1000)
+            self.assertEqual(dataTimeSeries.tz, "Europe/Rome")
+            self.assertEqual(list(dataTimeSeries), list(self.ref_dataTimeSeries))
+            self.assertEqual(dataTimeSeries[1000000060].validity_region.end.t, 1000000090)
+            self.assertTrue(isinstance(dataTimeSeries[1000000060].data, PhysicalData))
+
+        # Default point type, dict of values and empty
+        dataTimeSeries = DataTimeSeries.from_arrays(t=[60, 120], values_by_label={"x": [1, 2]})
+        self.assertEqual(dataTimeSeries[120].data.content, {"x": 2.0})
+        self.assertEqual(dataTimeSeries.tz, "UTC")
+        self.assertEqual(len(ColumnarDataTimeSeries.from_arrays(t=[], values_by_label={"x": []})), 0)
+        self.assertEqual(len(DataTimeSeries.from_arrays(t=[], values_by_label={"x": []})), 0)
+
+        # Values keep their types, and DataTimePoints are created once and can then be appended to
+        self.assertTrue(isinstance(dataTimeSeries[120].data.values[0], int))
+        self.assertTrue(isinstance(dataTimeSeries[120].t, int))
+        self.assertIs(dataTimeSeries[120], dataTimeSeries[120])
+        dataTimeSeries.append(DataTimePoint(t=180, data=Point(labels=["x"], values=[3.5])))
+        self.assertEqual([dataTimePoint.data.values[0] for dataTimePoint in dataTimeSeries], [1, 2, 3.5])
+        with self.assertRaises(InputException):
+            dataTimeSeries.append(DataTimePoint(t=180, data=Point(labels=["x"], values=[4])))
+
+    def test_from_records(self):
+        records = list(zip(self.t, self.power_W, self.voltage_V))
+        for DataTimeSeries_class in [DataTimeSeries, ColumnarDataTimeSeries]:
+            dataTimeSeries = DataTimeSeries_class.from_records(records, labels=["power_W", "voltage_V"], tz="Europe/Rome",
+                                                               point_type=PhysicalDataTimePoint, validity_region=TimeSlot(span='1m'))
+            self.assertEqual(list(dataTimeSeries), list(self.ref_dataTimeSeries))
+        with self.assertRaises(InputException):
+            DataTimeSeries.from_records([(60, 1, 2)], labels=["x"])
+
+    def test_consistency(self):
+        # Not ordered
+        with self.assertRaises(InputException):
+            DataTimeSeries.from_arrays(t=[60, 180, 120], values_by_label={"x": [1, 2, 3]})
+        with self.assertRaises(InputException):
+            ColumnarDataTimeSeries.from_arrays(t=[60, 60], values_by_label={"x": [1, 2]})
+        # Wrong lengths
+        with self.assertRaises(InputException):
+            DataTimeSeries.from_arrays(t=[60, 120], values_by_label={"x": [1, 2, 3]})
+        # Non-numeric values
+        with self.assertRaises(InputException):
+            DataTimeSeries.from_arrays(t=[60, 120], values_by_label={"x": [1, 'a']})
+        # Wrong labels for PhysicalData
+        with self.assertRaises(InputException):
+            DataTimeSeries.from_arrays(t=[60, 120], values_by_label={"x": [1, 2]}, point_type=PhysicalDataTimePoint)
+        # Wrong point type
+        with self.assertRaises(InputException):
+            DataTimeSeries.from_arrays(t=[60, 120], values_by_label={"x": [1, 2]}, point_type=TimePoint)
+
+
 # TODO: missing tests for class PhysicalDataPoint (test_PhysicalDataPoint)
 
 
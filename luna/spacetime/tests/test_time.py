@@ -1,8 +1,15 @@
 import unittest
-from luna.datatypes.dimensional import DataTimePoint
+from luna.datatypes.dimensional import DataTimePoint, TimePoint
 from luna.common.exceptions import InputException
-from luna.spacetime.time import dt, TimeSlotSpan, correct_dt_dst, timezonize, s_from_dt, dt_to_str, dt_from_str, change_tz
+from luna.spacetime.time import dt, TimeSlotSpan, correct_dt_dst, timezonize, s_from_dt, dt_from_s, dt_to_str, dt_from_str, change_tz
+from luna.spacetime.time import offset_at, offsets_at, check_dt_consistency, get_tz_id, get_tz_name, get_tzinfo, get_tz_transitions, t_range, dt_range
 import datetime
+import pytz
+from luna.spacetime.time import tzoffset
+try:
+    import zoneinfo
+except ImportError:
+    zoneinfo = None
 
 class test_time(unittest.TestCase):
 
@@ -247,6 +254,169 @@ class test_time(unittest.TestCase):
 
 
 
+    def test_tz_registry(self):
+
+        # Any representation of a timezone gets the same id, which is its position in pytz.all_timezones
+        tz_id = get_tz_id('Europe/Rome')
+        self.assertEqual(tz_id, pytz.all_timezones.index('Europe/Rome'))
+        self.assertEqual(get_tz_id(timezonize('Europe/Rome')), tz_id)
+        self.assertEqual(get_tz_id(dt(2015,8,1, tzinfo='Europe/Rome').tzinfo), tz_id)
+        self.assertEqual(get_tz_name(tz_id), 'Europe/Rome')
+        self.assertTrue(get_tzinfo(tz_id) is timezonize('Europe/Rome'))
+        self.assertEqual(get_tz_id(pytz.utc), get_tz_id('UTC'))
+
+        # Non-pytz timezones get a new id
+        if tzoffset:
+            self.assertEqual(get_tz_name(get_tz_id(tzoffset(None, 3600))), str(tzoffset(None, 3600)))
+            self.assertTrue(get_tz_id(tzoffset(None, 3600)) >= len(pytz.all_timezones))
+
+        # ..also if named as a pytz one, which is never replaced by them
+        if zoneinfo:
+            zoneinfo_tz_id = get_tz_id(zoneinfo.ZoneInfo('Europe/Vaduz'))
+            self.assertNotEqual(zoneinfo_tz_id, get_tz_id('Europe/Vaduz'))
+            self.assertEqual(get_tz_id(zoneinfo.ZoneInfo('Europe/Vaduz')), zoneinfo_tz_id)
+            self.assertEqual(TimePoint(t=0, tz=zoneinfo.ZoneInfo('Europe/Vaduz')).tz_id, zoneinfo_tz_id)
+            self.assertTrue('pytz' in str(type(timezonize('Europe/Vaduz'))))
+            self.assertEqual(str(dt(2015,3,29,10, tzinfo='Europe/Vaduz')), '2015-03-29 10:00:00+02:00')
+
+            # ..and they do not share the (pytz) transitions cache, whatever comes first
+            self.assertIsNone(get_tz_transitions(zoneinfo.ZoneInfo('Europe/Zurich')))
+            self.assertEqual(get_tz_transitions('Europe/Zurich')[2][0].zone, 'Europe/Zurich')
+            self.assertIsNone(get_tz_transitions(zoneinfo.ZoneInfo('Europe/Zurich')))
+
+        # Unknown timezones are not allowed
+        with self.assertRaises(pytz.UnknownTimeZoneError):
+            get_tz_id('Europe/Nowhere')
+
+
+    def test_tz_offsets(self):
+
+        # Offsets, also across DST changes (2015-03-29 01:00 UTC and 2015-10-25 01:00 UTC on Europe/Rome) and in the past
+        self.assertEqual(offset_at(1427590799, 'Europe/Rome'), 3600)
+        self.assertEqual(offset_at(1427590800, 'Europe/Rome'), 7200)
+        self.assertEqual(offset_at(1445734799, timezonize('Europe/Rome')), 7200)
+        self.assertEqual(offset_at(1445734800, 'Europe/Rome'), 3600)
+        self.assertEqual(offset_at(s_from_dt(dt(1856,12,1,16,46, tzinfo='Europe/Rome')), 'Europe/Rome'), 3000)
+        self.assertEqual(offset_at(1445734800, 'UTC'), 0)
+        self.assertEqual(offset_at(1445734800), 0)
+        self.assertEqual(list(offsets_at([1427590799, 1427590800, 1445734799, 1445734800], 'Europe/Rome')), [3600, 7200, 7200, 3600])
+        self.assertEqual(list(offsets_at([1427590799, 1427590800], 'UTC')), [0, 0])
+
+        # Conversions use them
+        self.assertEqual(str(dt_from_s(1445734799, tz='Europe/Rome')), '2015-10-25 02:59:59+02:00')
+        self.assertEqual(str(dt_from_s(1445734800, tz='Europe/Rome')), '2015-10-25 02:00:00+01:00')
+        self.assertEqual(str(dt_from_s(1445734800.5)), '2015-10-25 01:00:00.500000+00:00')
+        self.assertEqual(dt_from_s(1445734800, tz='Europe/Rome').tzinfo, dt(2015,10,25,2,0,0, tzinfo='Europe/Rome').tzinfo)
+
+        # ..and so does the consistency check
+        self.assertTrue(check_dt_consistency(dt_from_s(1445734800, tz='Europe/Rome')))
+        self.assertFalse(check_dt_consistency(dt(2015,3,29,2,15,0, tzinfo='Europe/Rome', trustme=True)))
+
+
+    def test_t_math(self):
+
+        # Same as the datetime ones, also across 1970-1-1 and DST changes
+        for string, tz in [('1h', 'Europe/Rome'), ('15m', 'Europe/Rome'), ('5m', 'UTC'), ('2h', 'Europe/Rome'), ('6h', 'America/New_York')]:
+            timeSlotSpan = TimeSlotSpan(string)
+            for dateTime in [dt(2015,1,1,16,37,14, tzinfo=tz), dt(1969,12,31,22,59,59, tzinfo=tz), dt(2015,10,25,2,15,0, tzinfo=tz, trustme=True)]:
+                self.assertEqual(timeSlotSpan.floor_t(s_from_dt(dateTime), tz=tz), s_from_dt(timeSlotSpan.floor_dt(dateTime)))
+                self.assertEqual(timeSlotSpan.ceil_t(s_from_dt(dateTime), tz=tz), s_from_dt(timeSlotSpan.ceil_dt(dateTime)))
+                self.assertEqual(timeSlotSpan.round_t(s_from_dt(dateTime), tz=tz), s_from_dt(timeSlotSpan.round_dt(dateTime)))
+                self.assertEqual(timeSlotSpan.shift_t(s_from_dt(dateTime), times=-3, tz=tz), s_from_dt(timeSlotSpan.shift_dt(dateTime, times=-3)))
+
+        # Lists
+        timeSlotSpan = TimeSlotSpan('15m')
+        self.assertEqual(timeSlotSpan.floor_t([1420130234, 899.5, -1]), [1420129800, 0, -900])
+        self.assertEqual(timeSlotSpan.shift_t([0, 900], times=2), [1800, 2700])
+
+        # Slot starts, from the slot containing from_t and up to to_t excluded
+        self.assertEqual(list(timeSlotSpan.slot_starts(100, 3600)), [0, 900, 1800, 2700])
+        self.assertEqual(list(timeSlotSpan.slot_starts(100, 3601)), [0, 900, 1800, 2700, 3600])
+        self.assertEqual(len(timeSlotSpan.slot_starts(3600, 3600)), 0)
+        self.assertEqual(len(TimeSlotSpan('1m').slot_starts(s_from_dt(dt(2015,1,1, tzinfo='Europe/Rome')), s_from_dt(dt(2016,1,1, tzinfo='Europe/Rome')), tz='Europe/Rome')), 525600)
+
+        # Complex timeSlotSpans are not handable
+        with self.assertRaises(InputException):
+            TimeSlotSpan('1D_3h_5m').floor_t(0)
+
+
+    def test_logical_dt_math(self):
+
+        # Days, aligned to the local midnight also across DST changes
+        timeSlotSpan = TimeSlotSpan('1D')
+        self.assertEqual(timeSlotSpan.floor_dt(dt(2015,3,29,16,37,14, tzinfo='Europe/Rome')), dt(2015,3,29,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(timeSlotSpan.ceil_dt(dt(2015,3,29,16,37,14, tzinfo='Europe/Rome')), dt(2015,3,30,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(timeSlotSpan.floor_dt(dt(2015,10,25,23,59,59, tzinfo='Europe/Rome')), dt(2015,10,25,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(timeSlotSpan.round_dt(dt(2015,10,25,12,29,0, tzinfo='Europe/Rome')), dt(2015,10,26,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(timeSlotSpan.duration_s(dt(2015,3,29, tzinfo='Europe/Rome')), 23*3600)
+        self.assertEqual(timeSlotSpan.duration_s(dt(2015,10,25, tzinfo='Europe/Rome')), 25*3600)
+        self.assertEqual(timeSlotSpan.duration_s(dt(2015,10,25, tzinfo='UTC')), 24*3600)
+        self.assertEqual(dt(2015,3,28,10,0,0, tzinfo='Europe/Rome') + timeSlotSpan, dt(2015,3,29,10,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('3D').floor_dt(dt(1970,1,5,10,0,0, tzinfo='UTC')), dt(1970,1,4,0,0,0, tzinfo='UTC'))
+
+        # Weeks (starting on Mondays), months and years
+        self.assertEqual(TimeSlotSpan('1W').floor_dt(dt(2015,10,25,23,59,59, tzinfo='Europe/Rome')), dt(2015,10,19,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('1M').floor_dt(dt(2015,10,25,23,59,59, tzinfo='Europe/Rome')), dt(2015,10,1,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('3M').ceil_dt(dt(2015,10,25,23,59,59, tzinfo='Europe/Rome')), dt(2016,1,1,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('1Y').floor_dt(dt(2015,10,25,23,59,59, tzinfo='Europe/Rome')), dt(2015,1,1,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('1M').duration_s(dt(2016,2,1, tzinfo='UTC')), 29*86400)
+
+        # Shifting keeps the wall clock time (with the day limited to the length of the month)
+        self.assertEqual(TimeSlotSpan('1M').shift_dt(dt(2015,1,31,10,0,0, tzinfo='Europe/Rome'), times=1), dt(2015,2,28,10,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('1M').shift_dt(dt(2015,10,1, tzinfo='Europe/Rome'), times=-10), dt(2014,12,1, tzinfo='Europe/Rome'))
+        self.assertEqual(TimeSlotSpan('1Y').shift_dt(dt(2015,1,1, tzinfo='Europe/Rome'), times=-100), dt(1915,1,1, tzinfo='Europe/Rome'))
+
+        # ..shifting the calendar date, also on leap years, month ends and DST days
+        for span, time_dt, times, shifted_dt in [('1Y', dt(2015,3,29,12, tz='Europe/Rome'), 1,  dt(2016,3,29,12, tz='Europe/Rome')),
+                                                         ('3M', dt(2015,3,29,12, tz='Europe/Rome'), 1,  dt(2015,6,29,12, tz='Europe/Rome')),
+                                                         ('1Y', dt(2016,2,29,10, tz='Europe/Rome'), 1,  dt(2017,2,28,10, tz='Europe/Rome')),
+                                                         ('1Y', dt(2016,2,29,10, tz='Europe/Rome'), 4,  dt(2020,2,29,10, tz='Europe/Rome')),
+                                                         ('1M', dt(2016,1,31,15,30, tz='Europe/Rome'), 1, dt(2016,2,29,15,30, tz='Europe/Rome')),
+                                                         ('1M', dt(2015,3,31,23, tz='Europe/Rome'), -1, dt(2015,2,28,23, tz='Europe/Rome')),
+                                                         ('1D', dt(2015,3,28,12, tz='Europe/Rome'), 1,  dt(2015,3,29,12, tz='Europe/Rome')),
+                                                         ('1D', dt(2015,10,24,12, tz='Europe/Rome'), 1, dt(2015,10,25,12, tz='Europe/Rome')),
+                                                         ('1W', dt(2015,3,25,12, tz='Europe/Rome'), 1,  dt(2015,4,1,12, tz='Europe/Rome'))]:
+            self.assertEqual(TimeSlotSpan(span).shift_dt(time_dt, times=times), shifted_dt)
+            self.assertEqual(TimeSlotSpan(span).shift_t(s_from_dt(time_dt), times=times, tz='Europe/Rome'), s_from_dt(shifted_dt))
+
+        # A wall clock time which does not exist (in the DST gap) is moved forward, as the clock
+        self.assertEqual(TimeSlotSpan('1D').shift_dt(dt(2015,3,28,2,30, tz='Europe/Rome'), times=1), dt(2015,3,29,3,0, tz='Europe/Rome'))
+
+        # Epochs and slot starts
+        from_t = s_from_dt(dt(2015,1,1, tzinfo='Europe/Rome'))
+        to_t   = s_from_dt(dt(2025,1,1, tzinfo='Europe/Rome'))
+        self.assertEqual(len(timeSlotSpan.slot_starts(from_t, to_t, tz='Europe/Rome')), 3653)
+        self.assertEqual(list(TimeSlotSpan('1M').slot_starts(from_t, from_t+86400*60, tz='Europe/Rome')),
+                         [from_t, s_from_dt(dt(2015,2,1, tzinfo='Europe/Rome')), s_from_dt(dt(2015,3,1, tzinfo='Europe/Rome'))])
+        self.assertEqual(TimeSlotSpan('1M').floor_t([from_t+1, to_t-1], tz='Europe/Rome'), [from_t, s_from_dt(dt(2024,12,1, tzinfo='Europe/Rome'))])
+
+
+    def test_t_range(self):
+
+        # Physical, end included, also across DST changes
+        from_t = s_from_dt(dt(2015,3,29,0,0,0, tzinfo='Europe/Rome'))
+        self.assertEqual(list(t_range(from_t, from_t+1800, TimeSlotSpan('15m'))), [from_t, from_t+900, from_t+1800])
+        self.assertEqual([str(item) for item in t_range(from_t, from_t+3*3600, TimeSlotSpan('1h'), tz='Europe/Rome', as_dt=True)],
+                         ['2015-03-29 00:00:00+01:00', '2015-03-29 01:00:00+01:00', '2015-03-29 03:00:00+02:00', '2015-03-29 04:00:00+02:00'])
+        self.assertEqual([str(item) for item in dt_range(dt(2015,3,29,0,0,0, tzinfo='Europe/Rome'), dt(2015,3,29,3,0,0, tzinfo='Europe/Rome'), TimeSlotSpan('1h'))],
+                         ['2015-03-29 00:00:00+01:00', '2015-03-29 01:00:00+01:00', '2015-03-29 03:00:00+02:00'])
+
+        # Logical, on the calendar or keeping the wall clock time
+        self.assertEqual([str(item) for item in dt_range(dt(2015,3,28,0,0,0, tzinfo='Europe/Rome'), dt(2015,3,30,0,0,0, tzinfo='Europe/Rome'), TimeSlotSpan('1D'))],
+                         ['2015-03-28 00:00:00+01:00', '2015-03-29 00:00:00+01:00', '2015-03-30 00:00:00+02:00'])
+        self.assertEqual([str(item) for item in t_range(from_t+36000, from_t+2*86400, TimeSlotSpan('1D'), tz='Europe/Rome', as_dt=True)],
+                         ['2015-03-29 11:00:00+02:00', '2015-03-30 11:00:00+02:00'])
+
+        # Chunks, without end
+        timeRange = t_range(s_from_dt(dt(2015,4,1, tzinfo='Europe/Rome')), None, TimeSlotSpan('1M'), tz='Europe/Rome', chunk_size=12)
+        self.assertEqual(list(next(timeRange)), [s_from_dt(dt(2015,month,1, tzinfo='Europe/Rome')) for month in range(4,13)] + [s_from_dt(dt(2016,month,1, tzinfo='Europe/Rome')) for month in range(1,4)])
+        self.assertEqual(len(next(timeRange)), 12)
+        self.assertEqual(sum(len(chunk) for chunk in t_range(from_t, from_t+365*86400, TimeSlotSpan('1m'), chunk_size=100000)), 525601)
+
+        with self.assertRaises(InputException):
+            next(t_range(from_t, None, TimeSlotSpan('1m'), chunk_size=10, as_dt=True))
+
+
     def test_shift_dt(self):
         
         # TODO
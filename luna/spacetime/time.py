@@ -1,5 +1,7 @@
+import math
 import datetime
 import calendar
+from bisect import bisect_left, bisect_right
 from luna.common.exceptions import InputException, ConsistencyException
 from luna.datatypes.auxiliary import SlotSpan
 try:
@@ -8,6 +10,11 @@ except ImportError:
     tzoffset = None
 import pytz
 
+# NumPy is optional: if not available, sequences of timestamps are processed one by one
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 #--------------------------
 #    Logger
@@ -90,9 +97,86 @@ def dt(*args, **kwargs):
 
 def get_tz_offset_s(time_dt):
     '''Get the time zone offset in seconds'''
-    return s_from_dt(time_dt.replace(tzinfo=pytz.UTC)) - s_from_dt(time_dt)
-    
-    
+    offset = time_dt.utcoffset()
+    return int(offset.total_seconds()) if offset is not None else 0
+
+
+# Cache for the UTC offset transitions of the timezones
+_tz_transitions = {}
+
+def get_tz_transitions(tz):
+    '''Get the UTC offset transitions of a (pytz) timezone, as a tuple of three lists: the epochs from which each
+    offset applies, the offsets in seconds and the (localized) tzinfo objects. They are extracted only once per
+    timezone from the pytz tables and then cached. Returns None if the timezone is not a pytz one.'''
+    if not tz:
+        tz = 'UTC'
+    key = get_tz_id(tz)
+    try:
+        return _tz_transitions[key]
+    except KeyError:
+        pass
+
+    tz = get_tzinfo(key)
+    if not 'pytz' in str(type(tz)):
+        return None
+
+    utc_transition_times = getattr(tz, '_utc_transition_times', None)
+    if utc_transition_times:
+        # The first transition is at datetime.min, i.e. its offset applies since ever
+        transitions_t = [float('-inf')] + [calendar.timegm(item.utctimetuple()) for item in utc_transition_times[1:]]
+        offsets_s     = [int(info[0].total_seconds()) for info in tz._transition_info]
+        tzinfos       = [tz._tzinfos[info] for info in tz._transition_info]
+    else:
+        # Static timezone (UTC included)
+        transitions_t = [float('-inf')]
+        offsets_s     = [int(tz.utcoffset(datetime.datetime(1970,1,1)).total_seconds())]
+        tzinfos       = [tz]
+
+    _tz_transitions[key] = (transitions_t, offsets_s, tzinfos)
+    return _tz_transitions[key]
+
+
+def offset_at(time_t, tz=None):
+    '''Get the UTC offset in seconds of a timezone at the given epoch, by bisecting its (cached) transitions'''
+    transitions = get_tz_transitions(tz)
+    if transitions is None:
+        return get_tz_offset_s(dt_from_s(time_t, tz=tz))
+    transitions_t, offsets_s, _ = transitions
+    if len(offsets_s) == 1:
+        return offsets_s[0]
+    return offsets_s[bisect_right(transitions_t, time_t)-1]
+
+
+def offsets_at(times_t, tz=None):
+    '''Get the UTC offsets in seconds of a timezone at the given epochs (a list or a NumPy array). Returns a
+    NumPy array if NumPy is available or a list otherwise.'''
+    transitions = get_tz_transitions(tz)
+    if numpy is None or transitions is None:
+        return [offset_at(time_t, tz) for time_t in times_t]
+    transitions_t, offsets_s, _ = transitions
+    if len(offsets_s) == 1:
+        return numpy.full(len(times_t), offsets_s[0])
+    return numpy.array(offsets_s)[numpy.searchsorted(numpy.array(transitions_t), times_t, side='right')-1]
+
+
+def t_from_local_t(local_t, tz=None):
+    '''Get the epoch at which the wall clock time of a timezone reaches local_t (a wall clock time expressed as
+    if it were on UTC). If it occurs twice the first one is returned, if it does not exist (DST gap) the epoch at
+    which the wall clock jumps over it is returned.'''
+    transitions = get_tz_transitions(tz)
+    if transitions is None:
+        raise InputException('Sorry, only pytz timezones are supported by this operation (got "{}")'.format(tz))
+    transitions_t, offsets_s, _ = transitions
+
+    # Check the offsets of the transitions around (offsets are always less than a day), in order
+    first = max(bisect_right(transitions_t, local_t - 2*86400)-1, 0)
+    last  = bisect_right(transitions_t, local_t + 2*86400)
+    for i in range(first, last):
+        time_t = max(transitions_t[i], local_t - offsets_s[i])
+        if i+1 == len(transitions_t) or time_t < transitions_t[i+1]:
+            return time_t
+    raise ConsistencyException('Cannot convert local time {} on timezone {}'.format(local_t, tz))
+
 
 def check_dt_consistency(date_dt):
     '''Check that the timezone is consistent with the datetime (some conditions in Python lead to have summertime set in winter)'''
@@ -104,8 +188,8 @@ def check_dt_consistency(date_dt):
         return True
     else:
         
-        # This check is quite heavy but there is apparently no other way to do it.
-        if date_dt.utcoffset() != dt_from_s(s_from_dt(date_dt), tz=date_dt.tzinfo).utcoffset():
+        # The offset has to be the one of the timezone at that time
+        if get_tz_offset_s(date_dt) != offset_at(s_from_dt(date_dt), tz=date_dt.tzinfo):
             return False
         else:
             return True
@@ -133,17 +217,72 @@ def correct_dt_dst(datetime_obj):
 
 def timezonize(timezone):
     '''Convert a string representation of a timezone to its pytz object or do nothing if the argument is already a pytz timezone'''
-    
-    # Check if timezone is a valid pytz object is hard as it seems that they are spread arount the pytz package.
-    # Option 1): Try to convert if string or unicode, else try to
-    # instantiate a datetiem object with the timezone to see if it is valid 
-    # Option 2): Get all memebers of the pytz package and check for type, see
-    # http://stackoverflow.com/questions/14570802/python-check-if-object-is-instance-of-any-class-from-a-certain-module
-    # Option 3) perform a hand.made test. We go for this one, tests would fail if it gets broken
-    
-    if not 'pytz' in str(type(timezone)):
-        timezone = pytz.timezone(timezone)
-    return timezone
+    # Timezones are interned, so this is just a lookup after the first time
+    return _tz_tzinfos[get_tz_id(timezone)]
+
+
+#--------------------------
+#    Timezones registry
+#--------------------------
+
+# Interned timezones. Every timezone gets a small integer id and its tzinfo object is cached. The pytz
+# timezones get their position in pytz.all_timezones (so that ids are the same in every process) and any
+# representation of them (name, tzinfo or localized tzinfo object) maps to the same id.
+_tz_names       = list(pytz.all_timezones)
+_tz_tzinfos     = [None] * len(_tz_names)
+_tz_ids_by_name = dict((name, tz_id) for tz_id, name in enumerate(_tz_names))
+_tz_ids         = {}
+
+def get_tz_id(tz):
+    '''Get the id of a timezone (name or tzinfo object) from the interned timezones registry. A timezone
+    is validated (and its tzinfo object created) only the first time it is seen. Non-pytz tzinfo objects
+    (i.e. zoneinfo or dateutil ones) get their own ids, after the pytz ones and keyed by the object and
+    not by its name: these ids depend on the order in which they are first seen, so they are valid only
+    in the current process and must not be persisted or sent to other processes.'''
+    try:
+        return _tz_ids[tz]
+    except (KeyError, TypeError):
+        # TypeError is for unhashable tzinfo objects
+        pass
+
+    tz_id = None
+    if isinstance(tz, datetime.tzinfo) and (not 'pytz' in str(type(tz)) or str(tz) not in _tz_ids_by_name):
+        # Non-pytz (or non-standard pytz, as a FixedOffset) timezone, look it up by equality
+        for other_tz_id in range(len(pytz.all_timezones), len(_tz_tzinfos)):
+            if _tz_tzinfos[other_tz_id] == tz:
+                tz_id = other_tz_id
+                break
+        else:
+            tz_id = len(_tz_names)
+            _tz_names.append(str(tz))
+            _tz_tzinfos.append(tz)
+    else:
+        # Validate by getting the pytz timezone (str() of a pytz tzinfo object is the zone name)
+        tzinfo = pytz.timezone(tz if isinstance(tz, str) else str(tz))
+        tz_id  = _tz_ids_by_name[str(tzinfo)]
+        if _tz_tzinfos[tz_id] is None:
+            _tz_tzinfos[tz_id] = tzinfo
+
+    try:
+        _tz_ids[tz] = tz_id
+    except TypeError:
+        pass
+    return tz_id
+
+def get_tz_name(tz_id):
+    '''Get the name of an interned timezone by id'''
+    return _tz_names[tz_id]
+
+def get_tzinfo(tz_id):
+    '''Get the tzinfo object of an interned timezone by id'''
+    return _tz_tzinfos[tz_id]
+
+def get_tz(tz_id):
+    '''Get an interned timezone by id: its name if a pytz one, its tzinfo object otherwise (as it has no
+    name that could be looked up again)'''
+    return _tz_names[tz_id] if tz_id < len(pytz.all_timezones) else _tz_tzinfos[tz_id]
+
+UTC_TZ_ID = get_tz_id('UTC')
 
 
 def change_tz(dt, tz):
@@ -170,10 +309,14 @@ def dt_from_s(timestamp_s, tz=None):
     except TypeError:
         raise InputException('timestamp_s argument must be string or number, got {}'.format(type(timestamp_s)))
 
-    pytz_tz = timezonize(tz)
-    timestamp_dt = timestamp_dt.replace(tzinfo=pytz.utc).astimezone(pytz_tz)
-    
-    return timestamp_dt
+    # Use the cached transitions if a pytz timezone, as its astimezone() would do but without any lookup
+    transitions = get_tz_transitions(tz)
+    if transitions is None:
+        return timestamp_dt.replace(tzinfo=pytz.utc).astimezone(timezonize(tz))
+
+    transitions_t, offsets_s, tzinfos = transitions
+    index = bisect_right(transitions_t, float(timestamp_s))-1 if len(offsets_s) > 1 else 0
+    return (timestamp_dt + datetime.timedelta(seconds=offsets_s[index])).replace(tzinfo=tzinfos[index])
 
 # TOOD: dt_to_s?
 # TODO: t_from_dt?
@@ -260,24 +403,192 @@ class dt_range(object):
         self.timeSlotSpan = timeSlotSpan
 
     def __iter__(self):
-        self.current_dt = self.from_dt
+        # Iterate in epoch seconds, and materialize the datetimes only when returned
+        self._t_range = t_range(s_from_dt(self.from_dt), s_from_dt(self.to_dt), self.timeSlotSpan, tz=self.from_dt.tzinfo, as_dt=True)
         return self
 
     def __next__(self):
-
-        # Iterator logic
-        if self.current_dt > self.to_dt:
-            raise StopIteration
-        else:
-            prev_current_dt = self.current_dt
-            self.current_dt = self.current_dt + self.timeSlotSpan
-            return prev_current_dt
+        return next(self._t_range)
 
     # Python 2.x
     def next(self):
         return self.__next__()
 
 
+def t_range(from_t, to_t, timeSlotSpan, tz=None, chunk_size=None, as_dt=False):
+    '''Generate the epoch timestamps from from_t to to_t (included, or without end if None) in steps of the
+    timeSlotSpan, as dt_range does but without any datetime. Logical timeSlotSpans step on their calendar (so
+    on the local midnights of the tz). If chunk_size is set the timestamps are generated in chunks (NumPy
+    arrays if NumPy is available or lists otherwise), if as_dt is set they are converted to datetimes.'''
+
+    if timeSlotSpan.is_composite():
+        raise InputException('Sorry, only simple time intervals are supported by this operation')
+    if chunk_size is not None and chunk_size < 1:
+        raise InputException('Sorry, chunk_size has to be at least 1 (got {})'.format(chunk_size))
+    if chunk_size and as_dt:
+        raise InputException('Sorry, chunks of datetimes are not supported')
+
+    # Chunks are used internally in any case
+    size = chunk_size if chunk_size else 1024
+    timeSlotSpanCalendar = TimeSlotSpanCalendar.get(timeSlotSpan, tz) if timeSlotSpan.is_logical() else None
+    aligned = timeSlotSpanCalendar is not None and timeSlotSpan.floor_t(from_t, tz=tz) == from_t
+
+    generated = 0
+    last_t    = None
+    while True:
+
+        # Physical: just steps of the duration
+        if timeSlotSpanCalendar is None:
+            if numpy is not None:
+                chunk = from_t + numpy.arange(generated, generated+size, dtype=float) * timeSlotSpan.duration_s()
+            else:
+                chunk = [from_t + i * timeSlotSpan.duration_s() for i in range(generated, generated+size)]
+
+        # Logical, from a slot start: the next boundaries of the calendar
+        elif aligned:
+            first = timeSlotSpanCalendar.index(last_t)+1 if last_t is not None else timeSlotSpanCalendar.index(from_t)
+            timeSlotSpanCalendar.boundary(first+size)
+            chunk = timeSlotSpanCalendar.boundaries_t[first:first+size]
+            if numpy is not None:
+                chunk = numpy.array(chunk, dtype=float)
+
+        # Logical, from any other time: shift it
+        else:
+            chunk = [timeSlotSpan.shift_t(from_t, times=i, tz=tz) for i in range(generated, generated+size)]
+            if numpy is not None:
+                chunk = numpy.array(chunk, dtype=float)
+
+        # Stop at the end
+        ended = False
+        if to_t is not None and chunk[-1] > to_t:
+            chunk = chunk[:bisect_right(chunk, to_t)] if numpy is None else chunk[chunk <= to_t]
+            ended = True
+
+        if len(chunk):
+            generated += len(chunk)
+            last_t     = chunk[-1]
+            if chunk_size:
+                yield chunk
+            else:
+                for time_t in (chunk.tolist() if numpy is not None else chunk):
+                    yield dt_from_s(time_t, tz=tz) if as_dt else time_t
+
+        if ended:
+            return
+
+
+#----------------------------
+# Time Span calendar
+#----------------------------
+
+# Cache for the calendars of the logical TimeSlotSpans
+_timeSlotSpan_calendars = {}
+
+class TimeSlotSpanCalendar(object):
+    '''The calendar of the slot boundaries of a logical TimeSlotSpan on a timezone: a sorted list of the epochs
+    of the local midnights starting the days, weeks (on Mondays), months or years, aligned as the physical ones
+    (days on the days since 1970-01-01, months on the months since year zero and years on the years). It is
+    generated lazily, years by years, to cover the requested times. Use get() to get the (cached) one.'''
+
+    def __init__(self, timeSlotSpan, tz=None):
+        if not timeSlotSpan.is_logical() or timeSlotSpan.is_composite():
+            raise InputException('Sorry, a calendar can be built only for simple logical TimeSlotSpans (got {})'.format(timeSlotSpan))
+        self.timeSlotSpan       = timeSlotSpan
+        self.tz                 = timezonize(tz if tz else 'UTC')
+        self.from_year          = None
+        self.to_year            = None
+        self.boundaries_t       = []
+        self.boundaries_local_t = []
+        self._boundaries_array  = None
+
+        # How many years around a time are required to have at least a boundary before and one after it
+        span_days = timeSlotSpan.years*366 + timeSlotSpan.months*31 + timeSlotSpan.weeks*7 + timeSlotSpan.days
+        self._margin_years = span_days // 365 + 1
+
+    @classmethod
+    def get(cls, timeSlotSpan, tz=None):
+        '''Get the calendar of a logical TimeSlotSpan on a timezone, built only once'''
+        key = (timeSlotSpan.string, str(tz if tz else 'UTC'))
+        try:
+            return _timeSlotSpan_calendars[key]
+        except KeyError:
+            _timeSlotSpan_calendars[key] = cls(timeSlotSpan, tz)
+            return _timeSlotSpan_calendars[key]
+
+    def _local_boundaries(self, from_year, to_year):
+        '''Get the boundaries in the given years, as wall clock times'''
+        timeSlotSpan = self.timeSlotSpan
+        dates = []
+        if timeSlotSpan.years:
+            dates = [datetime.date(year,1,1) for year in range(from_year, to_year+1) if year % timeSlotSpan.years == 0]
+        elif timeSlotSpan.months:
+            dates = [datetime.date(year,month,1) for year in range(from_year, to_year+1) for month in range(1,13) if (year*12 + month-1) % timeSlotSpan.months == 0]
+        else:
+            # Days are aligned on 1970-01-01, weeks on Mondays (0001-01-01 was a Monday)
+            days         = timeSlotSpan.days or timeSlotSpan.weeks*7
+            ref_ordinal  = datetime.date(1970,1,1).toordinal() if timeSlotSpan.days else 1
+            first        = datetime.date(from_year,1,1).toordinal()
+            last         = datetime.date(to_year,12,31).toordinal()
+            dates = [datetime.date.fromordinal(ordinal) for ordinal in range(first + (ref_ordinal - first) % days, last+1, days)]
+        return [calendar.timegm(date.timetuple()) for date in dates]
+
+    def _extend(self, from_year, to_year):
+        '''Extend the calendar to cover (at least) from from_year to to_year'''
+        from_year = max(from_year, datetime.MINYEAR)
+        to_year   = min(to_year, datetime.MAXYEAR)
+        if self.from_year is None:
+            self.from_year, self.to_year = to_year+1, to_year
+        if from_year < self.from_year:
+            local_t = self._local_boundaries(from_year, self.from_year-1)
+            self.boundaries_local_t = local_t + self.boundaries_local_t
+            self.boundaries_t       = [t_from_local_t(item, self.tz) for item in local_t] + self.boundaries_t
+            self.from_year = from_year
+        if to_year > self.to_year:
+            local_t = self._local_boundaries(self.to_year+1, to_year)
+            self.boundaries_local_t = self.boundaries_local_t + local_t
+            self.boundaries_t       = self.boundaries_t + [t_from_local_t(item, self.tz) for item in local_t]
+            self.to_year = to_year
+        self._boundaries_array = None
+
+    def cover(self, time_t):
+        '''Make sure that the calendar has a boundary before (or at) and one after the given time'''
+        year = (datetime.datetime(1970,1,1) + datetime.timedelta(seconds=time_t + offset_at(time_t, self.tz))).year
+        if self.from_year is None or year - self._margin_years < self.from_year or year + self._margin_years > self.to_year:
+            self._extend(year - self._margin_years, year + self._margin_years)
+
+    def index(self, time_t):
+        '''Get the index of the boundary starting the slot containing the given time'''
+        self.cover(time_t)
+        return bisect_right(self.boundaries_t, time_t)-1
+
+    def indexes(self, times_t):
+        '''Get the indexes of the boundaries starting the slots containing the given times (a NumPy array)'''
+        if len(times_t):
+            self.cover(times_t.min())
+            self.cover(times_t.max())
+        return numpy.searchsorted(self.boundaries_array, times_t, side='right')-1
+
+    @property
+    def boundaries_array(self):
+        '''The boundaries as a NumPy array'''
+        if self._boundaries_array is None:
+            self._boundaries_array = numpy.array(self.boundaries_t, dtype=float)
+        return self._boundaries_array
+
+    def boundary(self, index):
+        '''Get a boundary by index, extending the calendar if required'''
+        while index < 0 or index >= len(self.boundaries_t):
+            if (index < 0 and self.from_year <= datetime.MINYEAR) or (index >= 0 and self.to_year >= datetime.MAXYEAR):
+                raise InputException('Sorry, {} slots out of the supported years range'.format(self.timeSlotSpan))
+            if index < 0:
+                added = len(self.boundaries_t)
+                self._extend(self.from_year - self._margin_years, self.to_year)
+                index += len(self.boundaries_t) - added
+            else:
+                self._extend(self.from_year, self.to_year + self._margin_years)
+        return self.boundaries_t[index]
+
+
 #----------------------------
 # Time Span
 #----------------------------
@@ -450,51 +761,59 @@ class TimeSlotSpan(SlotSpan):
 
         if not time_dt.tzinfo:
             raise InputException('Timezone of the datetime is required')    
-        
-        # Convert input time to seconds
-        time_s = s_from_dt(time_dt)
-        tz_offset_s = get_tz_offset_s(time_dt)
-        
+
+        # Round in epoch seconds (using the cached timezone transitions) and convert back
+        return dt_from_s(self.round_t(s_from_dt(time_dt), tz=time_dt.tzinfo, how=how), tz=time_dt.tzinfo)
+
+
+    def round_t(self, time_t, tz=None, how=None):
+        '''Round an epoch timestamp according to this TimeSlotSpan. Also accepts a list or a NumPy array of epoch
+        timestamps, which are then rounded all together.'''
+
+        if self.is_composite():
+            raise InputException('Sorry, only simple time intervals are supported by the rebase operation')
+
+        # Sequences (NumPy arrays are handled directly)
+        if isinstance(time_t, (list, tuple)):
+            if numpy is None:
+                return [self.round_t(item, tz=tz, how=how) for item in time_t]
+            return self.round_t(numpy.asarray(time_t, dtype=float), tz=tz, how=how).tolist()
+
         #-------------------------
         # Physical time 
         #-------------------------
         if self.type == self.PHYSICAL:
-            
+
             # Get TimeSlotSpan duration in seconds
-            timeSpan_s = self.duration_s(time_dt)
+            timeSpan_s = self.duration_s()
 
             # Apply modular math (including timezone time translation trick if required (multiple hours))
-            # TODO: check for correctness, the time shift should be always done...
-            
             if self.hours > 1 or self.minutes > 60:
-                time_floor_s = ( (time_s - tz_offset_s) - ( (time_s - tz_offset_s) % timeSpan_s) ) + tz_offset_s
-            else:
-                time_floor_s = time_s - (time_s % timeSpan_s)
-                
-            time_ceil_s   = time_floor_s + timeSpan_s
-            
-            if how == 'floor':
-                time_rounded_s = time_floor_s
-             
-            elif how == 'ceil':
-                time_rounded_s = time_ceil_s
-            
-            else:
-
-                distance_from_time_floor_s = abs(time_s - time_floor_s) # Distance from floot
-                distance_from_time_ceil_s  = abs(time_s - time_ceil_s)  # Distance from ceil
-
-                if distance_from_time_floor_s < distance_from_time_ceil_s:
-                    time_rounded_s = time_floor_s
+                if numpy is not None and isinstance(time_t, numpy.ndarray):
+                    tz_offset_s = offsets_at(time_t, tz)
                 else:
-                    time_rounded_s = time_ceil_s
+                    tz_offset_s = offset_at(time_t, tz)
+                time_floor_t = ( (time_t - tz_offset_s) - ( (time_t - tz_offset_s) % timeSpan_s) ) + tz_offset_s
+            else:
+                time_floor_t = time_t - (time_t % timeSpan_s)
 
+            time_ceil_t = time_floor_t + timeSpan_s
 
         #-------------------------
         # Logical time 
         #-------------------------
         elif self.type == self.LOGICAL:
-            raise NotImplementedError('Logical not yet implemented')
+
+            # Look up the boundaries around in the calendar
+            timeSlotSpanCalendar = TimeSlotSpanCalendar.get(self, tz)
+            if numpy is not None and isinstance(time_t, numpy.ndarray):
+                indexes = timeSlotSpanCalendar.indexes(time_t)
+                time_floor_t = timeSlotSpanCalendar.boundaries_array[indexes]
+                time_ceil_t  = timeSlotSpanCalendar.boundaries_array[indexes+1]
+            else:
+                index = timeSlotSpanCalendar.index(time_t)
+                time_floor_t = timeSlotSpanCalendar.boundaries_t[index]
+                time_ceil_t  = timeSlotSpanCalendar.boundaries_t[index+1]
 
         #-------------------------
         # Other (Consistency error)
@@ -502,53 +821,107 @@ class TimeSlotSpan(SlotSpan):
         else:
             raise ConsistencyException('Error, TimeSlot type not PHYSICAL nor LOGICAL?!')
 
-        return dt_from_s(time_rounded_s, tz=time_dt.tzinfo)
+        if how == 'floor':
+            return time_floor_t
+        elif how == 'ceil':
+            return time_ceil_t
+        elif numpy is not None and isinstance(time_t, numpy.ndarray):
+            return numpy.where(abs(time_t - time_floor_t) < abs(time_t - time_ceil_t), time_floor_t, time_ceil_t)
+        else:
+            return time_floor_t if abs(time_t - time_floor_t) < abs(time_t - time_ceil_t) else time_ceil_t
 
+    def floor_t(self, time_t, tz=None):
+        '''Floor an epoch timestamp (or a list/NumPy array of them) according to this TimeSlotSpan'''
+        return self.round_t(time_t, tz=tz, how='floor')
 
-    def floor_dt(self, time_dt):
-        '''Floor a datetime according to this TimeSlotSpan. Only simple time intervals are supported in this operation'''       
-        return self.round_dt(time_dt, how='floor')
-     
-    def ceil_dt(self, time_dt):
-        '''Ceil a datetime according to this TimeSlotSpan. Only simple time intervals are supported in this operation'''        
-        return self.round_dt(time_dt, how='ceil')
+    def ceil_t(self, time_t, tz=None):
+        '''Ceil an epoch timestamp (or a list/NumPy array of them) according to this TimeSlotSpan'''
+        return self.round_t(time_t, tz=tz, how='ceil')
 
-    def rebase_dt(self, time_dt):
-        '''Rebase a given datetime to this TimeSlotSpan. Only simple time intervals are supported in this operation'''
-        return self.round_dt(time_dt, how='floor')
-              
-    def shift_dt(self, time_dt, times=0):
-        '''Shift a given datetime of n times of this TimeSlotSpan. Only simple time intervals are supported in this operation'''
+    def shift_t(self, time_t, times=0, tz=None):
+        '''Shift an epoch timestamp (or a list/NumPy array of them) of n times of this TimeSlotSpan. For logical
+        TimeSlotSpans a slot start is shifted to the n-th next (or previous) one, any other time is shifted on the
+        calendar (with the day limited to the length of the month) keeping its wall clock time.'''
         if self.is_composite():
             raise InputException('Sorry, only simple time intervals are supported byt he rebase operation')
- 
-        # Convert input time to seconds
-        time_s = s_from_dt(time_dt)
-         
+
+        if isinstance(time_t, (list, tuple)):
+            return [self.shift_t(item, times=times, tz=tz) for item in time_t]
+
         #-------------------------
         # Physical time TimeSlot
         #-------------------------
         if self.type == self.PHYSICAL:
-            
-            # Get TimeSlotSpan duration in seconds
-            timeSpan_s = self.duration_s(time_dt)
-
-            time_shifted_s = time_s + ( timeSpan_s * times )
-            time_shifted_dt = dt_from_s(time_shifted_s, tz=time_dt.tzinfo)
+            return time_t + self.duration_s() * times
 
         #-------------------------
         # Logical time TimeSlot
         #-------------------------
         elif self.type == self.LOGICAL:
-            raise NotImplementedError('Shifting of Logical intervals not yet implemented')
+
+            if numpy is not None and isinstance(time_t, numpy.ndarray):
+                return numpy.array([self.shift_t(item, times=times, tz=tz) for item in time_t.tolist()], dtype=float)
+
+            timeSlotSpanCalendar = TimeSlotSpanCalendar.get(self, tz)
+            index   = timeSlotSpanCalendar.index(time_t)
+            start_t = timeSlotSpanCalendar.boundaries_t[index]
+            if time_t == start_t:
+                return timeSlotSpanCalendar.boundary(index+times)
+
+            # Shift the local date on the calendar, keeping the wall clock time
+            local_t    = time_t + offset_at(time_t, tz)
+            local_date = datetime.date(1970,1,1) + datetime.timedelta(days=int(local_t // 86400))
+            if self.years or self.months:
+                year, month = divmod(local_date.year*12 + local_date.month-1 + (self.years*12 + self.months)*times, 12)
+                shifted_local_date = datetime.date(year, month+1, min(local_date.day, calendar.monthrange(year, month+1)[1]))
+            else:
+                shifted_local_date = local_date + datetime.timedelta(days=(self.days + self.weeks*7)*times)
+            return t_from_local_t(local_t + (shifted_local_date - local_date).days*86400, tz)
 
         #-------------------------
         # Other (Consistency error)
         #-------------------------
         else:
             raise ConsistencyException('Error, TimeSlot type not PHYSICAL nor LOGICAL?!')
- 
-        return time_shifted_dt      
+
+    def slot_starts(self, from_t, to_t, tz=None):
+        '''Get the starts (epoch timestamps) of the slots of this TimeSlotSpan from the one containing from_t up to
+        to_t (excluded), as a NumPy array if NumPy is available or as a list otherwise.'''
+        if self.is_logical():
+            timeSlotSpanCalendar = TimeSlotSpanCalendar.get(self, tz)
+            timeSlotSpanCalendar.cover(to_t)
+            first = timeSlotSpanCalendar.index(from_t)
+            last  = max(bisect_left(timeSlotSpanCalendar.boundaries_t, to_t), first)
+            if numpy is not None:
+                return timeSlotSpanCalendar.boundaries_array[first:last].copy()
+            return timeSlotSpanCalendar.boundaries_t[first:last]
+
+        start_t    = self.floor_t(from_t, tz=tz)
+        timeSpan_s = self.duration_s()
+        slots      = int(math.ceil((to_t - start_t) / float(timeSpan_s))) if to_t > start_t else 0
+        if numpy is not None:
+            return start_t + numpy.arange(slots, dtype=float) * timeSpan_s
+        return [start_t + i * timeSpan_s for i in range(slots)]
+
+    def floor_dt(self, time_dt):
+        '''Floor a datetime according to this TimeSlotSpan. Only simple time intervals are supported in this operation'''       
+        return self.round_dt(time_dt, how='floor')
+     
+    def ceil_dt(self, time_dt):
+        '''Ceil a datetime according to this TimeSlotSpan. Only simple time intervals are supported in this operation'''        
+        return self.round_dt(time_dt, how='ceil')
+
+    def rebase_dt(self, time_dt):
+        '''Rebase a given datetime to this TimeSlotSpan. Only simple time intervals are supported in this operation'''
+        return self.round_dt(time_dt, how='floor')
+              
+    def shift_dt(self, time_dt, times=0):
+        '''Shift a given datetime of n times of this TimeSlotSpan. Only simple time intervals are supported in this operation'''
+        if self.is_composite():
+            raise InputException('Sorry, only simple time intervals are supported byt he rebase operation')
+
+        # Shift in epoch seconds and convert back
+        return dt_from_s(self.shift_t(s_from_dt(time_dt), times=times, tz=time_dt.tzinfo), tz=time_dt.tzinfo)
 
     def duration_s(self, start_time_dt=None):
         '''Get the duration of the interval in seconds'''
@@ -559,7 +932,8 @@ class TimeSlotSpan(SlotSpan):
             raise InputException('With a logical TimeSlotSpan you can ask for duration only if you provide the starting point')
         
         if self.type == 'Logical':
-            raise NotImplementedError('Computing the duration in seconds using a give start_time_dt is not yet supported')
+            start_t = s_from_dt(start_time_dt)
+            return self.shift_t(start_t, times=1, tz=start_time_dt.tzinfo) - start_t
 
         # Hours. Minutes, Seconds
         if self.hours:
@@ -585,6 +959,11 @@ class TimeSlotSpan(SlotSpan):
 
     # Get start/end/center
     def get_start(self, end=None, center=None):
+        if self.is_logical():
+            if end is not None:
+                return end.__class__(t=self.shift_t(end.t, times=-1, tz=end.tz), tz=end.tz)
+            elif center is not None:
+                return center.__class__(t=self.floor_t(center.t, tz=center.tz), tz=center.tz)
         new_values = []
         if end is not None:
             for i in range(len(self.value)):
@@ -598,6 +977,11 @@ class TimeSlotSpan(SlotSpan):
             raise InputException('get_start: Got not end nor center')        
             
     def get_end(self, start=None, center=None):
+        if self.is_logical():
+            if start is not None:
+                return start.__class__(t=self.shift_t(start.t, times=1, tz=start.tz), tz=start.tz)
+            elif center is not None:
+                return center.__class__(t=self.ceil_t(center.t, tz=center.tz), tz=center.tz)
         new_values = []
         if start is not None:
             for i in range(len(self.value)):
@@ -611,6 +995,11 @@ class TimeSlotSpan(SlotSpan):
             raise InputException('get_end: Got not end nor center')
 
     def get_center(self, start=None, end=None):
+        if self.is_logical():
+            if start is not None:
+                return start.__class__(t=(start.t + self.shift_t(start.t, times=1, tz=start.tz))/2.0, tz=start.tz)
+            elif end is not None:
+                return end.__class__(t=(self.shift_t(end.t, times=-1, tz=end.tz) + end.t)/2.0, tz=end.tz)
         new_values = []
         if start is not None:
             for i in range(len(self.value)):
@@ -5,6 +5,7 @@ from luna.spacetime.time import s_from_dt, dt_from_s
 from luna.datatypes.dimensional import StreamingDataTimeSeries, DataTimeStream
 from luna.common.exceptions import InputException, ConsistencyException, StorageException
 import sqlite3
+import json
 import os
 import math
 
@@ -126,7 +127,10 @@ class SQLiteDataTimeStream(DataTimeStream):
     
             # Hanlde the case of the Slots
             elif issubclass(DataTimeSlot, self.data_type):
-                values = list(db_data[4:-1])
+                # Values, coverage and the operations states (if the table has them, as JSON)
+                values   = list(db_data[4:4+len(self.labels)])
+                coverage = db_data[4+len(self.labels)]
+                states   = json.loads(db_data[5+len(self.labels)]) if len(db_data) > 5+len(self.labels) and db_data[5+len(self.labels)] else None
                 # Skip if the data is saved as None
                 if None in values:
                     continue
@@ -140,12 +144,14 @@ class SQLiteDataTimeStream(DataTimeStream):
                                                                         end      = TimePoint(t=db_data[1], tz = "Europe/Rome"),
                                                                         data     = data,
                                                                         span     = self.timeSlotSpan,
-                                                                        coverage = db_data[-1])
+                                                                        coverage = coverage,
+                                                                        states   = states)
                     else:
                         DataTime_Point_or_Slot = self.sensor.Slots_type(start    = TimePoint(t=db_data[0], tz = "Europe/Rome"),
                                                                         end      = TimePoint(t=db_data[1], tz = "Europe/Rome"),
                                                                         data     = data,
-                                                                        coverage = db_data[-1])
+                                                                        coverage = coverage,
+                                                                        states   = states)
             else:
                 raise ConsistencyException('Unknown type, got {}'.format(self.data_type))  
             
@@ -240,10 +246,14 @@ class DataTimeSeriesSQLiteStorage(SQLiteStorage):
     def initialize_structure_for_DataTimeSlots(self, cur, sensor):
         # Create the table
         labels_list = ' REAL, '.join([fix_label_to_sqlite(label) for label in sensor.Slots_data_labels]) + ' REAL, '
-        query = "CREATE TABLE {}_DataTimeSlots(start_ts INTEGER NOT NULL, end_ts INTEGER NOT NULL, sid TEXT NOT NULL, span TEXT NOT NULL, {} coverage REAL, PRIMARY KEY (start_ts, end_ts, sid, span));".format(sensor.__class__.__name__, labels_list)
+        query = "CREATE TABLE {}_DataTimeSlots(start_ts INTEGER NOT NULL, end_ts INTEGER NOT NULL, sid TEXT NOT NULL, span TEXT NOT NULL, {} coverage REAL, states TEXT, PRIMARY KEY (start_ts, end_ts, sid, span));".format(sensor.__class__.__name__, labels_list)
         logger.debug('Query: %s', query)
         cur.execute(query)              
 
+    def has_states_for_DataTimeSlots(self, cur, sensor):
+        '''Check if the DataTimeSlots structure can store the operations states (tables created before cannot)'''
+        return 'states' in [item[1] for item in cur.execute('PRAGMA table_info({}_DataTimeSlots);'.format(sensor.__class__.__name__))]
+
 
     #--------------------
     #  PUT
@@ -289,6 +299,7 @@ class DataTimeSeriesSQLiteStorage(SQLiteStorage):
 
         # For each put there might be different storgae structure 
         storage_structure_checked = False if not trustme else True
+        has_states = None
         
         # Initialize cursor:
         cur = self.conn.cursor()
@@ -319,12 +330,25 @@ class DataTimeSeriesSQLiteStorage(SQLiteStorage):
                 labels_list = ', '.join([fix_label_to_sqlite(label) for label in sensor.Slots_data_labels])
                 values_list = ', '.join([str(value) if value is not None else 'NULL' for value in item.data.values])
                 logger.debug("Inserting slot with start=%s, end=%s, lables=%s, values=%s", item.start, item.end, labels_list, values_list)
-                if item.coverage is None:
-                    query = "INSERT OR REPLACE INTO {}_DataTimeSlots(start_ts, end_ts, sid, span, {}) VALUES ({}, {},'{}','{}',{})".format(sensor.__class__.__name__, labels_list, item.start.t, item.end.t, sensor.id, item.span, values_list)
-                else:
-                    query = "INSERT OR REPLACE INTO {}_DataTimeSlots(start_ts, end_ts, sid, span, {}, coverage) VALUES ({}, {},'{}','{}',{},{})".format(sensor.__class__.__name__, labels_list, item.start.t, item.end.t, sensor.id, item.span, values_list, item.coverage)                    
+                if item.coverage is not None:
+                    labels_list += ', coverage'
+                    values_list += ', {}'.format(item.coverage)
+
+                # Also store the operations states, if any (i.e. the quantile sketches, to aggregate the slots further)
+                parameters = ()
+                if getattr(item, 'states', None):
+                    if has_states is None:
+                        has_states = self.has_states_for_DataTimeSlots(cur, sensor)
+                        if not has_states:
+                            logger.warning('The DataTimeSlots structure for the sensor %s has no states column, not storing the operations states', sensor)
+                    if has_states:
+                        labels_list += ', states'
+                        values_list += ', ?'
+                        parameters = (json.dumps(item.states),)
+
+                query = "INSERT OR REPLACE INTO {}_DataTimeSlots(start_ts, end_ts, sid, span, {}) VALUES ({}, {},'{}','{}',{})".format(sensor.__class__.__name__, labels_list, item.start.t, item.end.t, sensor.id, item.span, values_list)
                 logger.debug('Query: %s', query)
-                cur.execute(query)       
+                cur.execute(query, parameters)       
                 
             else:
                 raise InputException('{}: Sorry, data type {} is not support by this storage'.format(self.__class__.__name__, type(item)))